@@ -98,6 +98,7 @@ pg = st.navigation({
     ],
     "Ferramentas Clínicas": [
         st.Page("views/evolucao.py", title="Evolução Diária", icon="📋"),
+        st.Page("views/passagem.py", title="Passagem de Plantão", icon="🔁"),
         st.Page("views/infusao.py", title="Infusão Contínua", icon="💉"),
         st.Page("views/intubacao.py", title="Intubação Orotraqueal", icon="⚡"),
         st.Page("views/conversao.py", title="Conversor Universal", icon="🔄"),
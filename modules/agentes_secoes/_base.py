@@ -2,6 +2,7 @@
 12 agentes de IA para preencher os campos estruturados de cada seção
 a partir do texto já fatiado pelo ia_extrator.
 """
+import functools
 import json
 import re
 import streamlit as st
@@ -9,6 +10,8 @@ from openai import OpenAI
 from google import genai as _genai_new
 from google.genai import types as _genai_types
 
+from modules.ia import motor
+
 
 def _extrair_json(texto: str) -> dict | None:
     """Extrai JSON de texto que pode conter markdown ou explicações."""
@@ -30,6 +33,10 @@ def _extrair_json(texto: str) -> dict | None:
         return None
 
 
+def _json_valido(texto: str) -> bool:
+    return _extrair_json(texto.replace("```json", "").replace("```", "")) is not None
+
+
 _REGRA_DATA = """
 # REGRA GLOBAL DE DATAS
 - Ano padrão: se o ano não estiver explícito no texto, use sempre 2026. Ex: "04/03" → "04/03/2026"; "04/03/26" → "04/03/2026".
@@ -38,34 +45,38 @@ _REGRA_DATA = """
 """
 
 
-def _chamar_ia(prompt_system: str, texto: str, api_key: str, provider: str, modelo: str) -> dict:
-    """Helper: envia texto para a IA e retorna JSON parseado."""
+def agente(fn):
+    """
+    Agentes são corrotinas (await _chamar_ia); para quem chama continuam
+    funções síncronas. fn.assincrono é a corrotina original, usada no leque
+    de fluxo.rodar_agentes_paralelo (todos os agentes no loop do motor).
+    """
+    @functools.wraps(fn)
+    def sincrono(*args, **kwargs):
+        return motor.executar_uma(fn(*args, **kwargs))
+    sincrono.assincrono = fn
+    return sincrono
+
+
+async def _chamar_ia(prompt_system: str, texto: str, api_key: str, provider: str, modelo: str) -> dict:
+    """Helper: envia texto para a IA e retorna JSON parseado (respostas repetidas vêm do cache)."""
     prompt_system = prompt_system + _REGRA_DATA
+    entrada = f"TEXTO DA SEÇÃO:\n\n{texto}"
     try:
         if "OpenAI" in provider or "GPT" in provider:
-            client = OpenAI(api_key=api_key)
-            resp = client.chat.completions.create(
-                model=modelo if modelo.startswith("gpt") else "gpt-4o",
-                messages=[
-                    {"role": "system", "content": prompt_system},
-                    {"role": "user",   "content": f"TEXTO DA SEÇÃO:\n\n{texto}"}
-                ],
-                response_format={"type": "json_object"}
+            _modelo = modelo if modelo.startswith("gpt") else "gpt-4o"
+            txt = await motor.gerar(
+                "openai", api_key, _modelo, prompt_system, entrada,
+                {"response_format": {"type": "json_object"}, "temperature": 0.0}, valida=_json_valido,
             )
-            return json.loads(resp.choices[0].message.content)
+            return json.loads(txt)
         else:
             _modelo = modelo if modelo.startswith("gemini") else "gemini-2.5-pro-preview-05-06"
-            client = _genai_new.Client(api_key=api_key)
-            resp = client.models.generate_content(
-                model=_modelo,
-                contents=f"TEXTO DA SEÇÃO:\n\n{texto}",
-                config=_genai_types.GenerateContentConfig(
-                    system_instruction=prompt_system,
-                    temperature=0.0,
-                    thinking_config=_genai_types.ThinkingConfig(thinking_budget=0),
-                ),
+            txt = await motor.gerar(
+                "gemini", api_key, _modelo, prompt_system, entrada,
+                {"temperature": 0.0, "thinking_budget": 0}, valida=_json_valido,
             )
-            txt = (resp.text or "").replace("```json", "").replace("```", "").strip()
+            txt = txt.replace("```json", "").replace("```", "").strip()
             parsed = _extrair_json(txt)
             if parsed is not None:
                 return parsed
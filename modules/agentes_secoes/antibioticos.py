@@ -1,5 +1,5 @@
 from ._base import (
-    _chamar_ia, _REGRA_DATA, _extrair_json,
+    _chamar_ia, _REGRA_DATA, _extrair_json, agente,
     OpenAI, _genai_new, _genai_types,
 )
 
@@ -129,8 +129,9 @@ _TIPO_ATB = {"Empírico", "Guiado por Cultura"}
 _STATUS_ATB = {"Atual", "Prévio"}
 
 
-def preencher_antibioticos(texto, api_key, provider, modelo):
-    r = _chamar_ia(_PROMPT_ANTIBIOTICOS, texto, api_key, provider, modelo)
+@agente
+async def preencher_antibioticos(texto, api_key, provider, modelo):
+    r = await _chamar_ia(_PROMPT_ANTIBIOTICOS, texto, api_key, provider, modelo)
     if "_erro" in r:
         return r
 
@@ -1,5 +1,5 @@
 from ._base import (
-    _chamar_ia, _REGRA_DATA, _extrair_json,
+    _chamar_ia, _REGRA_DATA, _extrair_json, agente,
     OpenAI, _genai_new, _genai_types,
 )
 
@@ -149,8 +149,9 @@ Extraia exatamente as seguintes chaves JSON, gerando-as nesta exata ordem:
 - ctrl_ant5_balanco (string): Balanço hídrico.
 </VARIAVEIS>"""
 
-def preencher_controles(texto, api_key, provider, modelo):
-    r = _chamar_ia(_PROMPT_CONTROLES, texto, api_key, provider, modelo)
+@agente
+async def preencher_controles(texto, api_key, provider, modelo):
+    r = await _chamar_ia(_PROMPT_CONTROLES, texto, api_key, provider, modelo)
     r.pop("_erro", None)
     return r
 
@@ -1,5 +1,5 @@
 from ._base import (
-    _chamar_ia, _REGRA_DATA, _extrair_json,
+    _chamar_ia, _REGRA_DATA, _extrair_json, agente,
     OpenAI, _genai_new, _genai_types,
 )
 
@@ -186,8 +186,9 @@ _STATUS_CULTURAS = {
 }
 
 
-def preencher_culturas(texto, api_key, provider, modelo):
-    r = _chamar_ia(_PROMPT_CULTURAS, texto, api_key, provider, modelo)
+@agente
+async def preencher_culturas(texto, api_key, provider, modelo):
+    r = await _chamar_ia(_PROMPT_CULTURAS, texto, api_key, provider, modelo)
     if "_erro" in r:
         return r
 
@@ -1,6 +1,6 @@
 from ._base import (
-    _chamar_ia, _REGRA_DATA, _extrair_json,
-    OpenAI, _genai_new, _genai_types,
+    _chamar_ia, _REGRA_DATA, _extrair_json, agente,
+    OpenAI, _genai_new, _genai_types, motor,
 )
 
 # ==============================================================================
@@ -76,34 +76,25 @@ Entrada (bruta, colada):
 Saída (reescrita):
 Paciente do sexo feminino, 68 anos, diabética e hipertensa, com queixa de dispneia há três dias. Atendida em UPA há dois dias, onde realizou radiografia de tórax com laudo de pneumonia, iniciando amoxicilina — sem melhora clínica. No dia atual, apresenta piora da dispneia e febre de 38,8°C, sendo trazida ao PS. Acompanhante refere episódio de queda domiciliar com contusão não especificada."""
 
-def preencher_hmpa(texto, api_key, provider, modelo):
+@agente
+async def preencher_hmpa(texto, api_key, provider, modelo):
     if not texto or not texto.strip():
         return {}
 
     try:
+        entrada = f"Texto Original:\n\n{texto}"
         if "OpenAI" in provider or "GPT" in provider:
-            client = OpenAI(api_key=api_key)
-            resp = client.chat.completions.create(
-                model=modelo if modelo.startswith("gpt") else "gpt-4o",
-                messages=[
-                    {"role": "system", "content": _PROMPT_HMPA},
-                    {"role": "user",   "content": f"Texto Original:\n\n{texto}"}
-                ]
+            reescrito = await motor.gerar(
+                "openai", api_key, modelo if modelo.startswith("gpt") else "gpt-4o",
+                _PROMPT_HMPA, entrada,
             )
-            reescrito = resp.choices[0].message.content.strip()
         else:
             # Reescrita narrativa exige máxima qualidade — sempre Pro
-            client = _genai_new.Client(api_key=api_key)
-            resp = client.models.generate_content(
-                model="gemini-2.5-pro",
-                contents=f"Texto Original:\n\n{texto}",
-                config=_genai_types.GenerateContentConfig(
-                    system_instruction=_PROMPT_HMPA,
-                    temperature=0.0,
-                    thinking_config=_genai_types.ThinkingConfig(thinking_budget=0),
-                ),
+            reescrito = await motor.gerar(
+                "gemini", api_key, "gemini-2.5-pro", _PROMPT_HMPA, entrada,
+                {"temperature": 0.0, "thinking_budget": 0},
             )
-            reescrito = (resp.text or "").strip()
+        reescrito = reescrito.strip()
 
         return {"hmpa_reescrito": reescrito}
 
@@ -1,5 +1,5 @@
 from ._base import (
-    _chamar_ia, _REGRA_DATA, _extrair_json,
+    _chamar_ia, _REGRA_DATA, _extrair_json, agente,
     OpenAI, _genai_new, _genai_types,
 )
 
@@ -71,8 +71,9 @@ Extraia exatamente as seguintes chaves JSON:
 }
 </VARIAVEIS>"""
 
-def preencher_identificacao(texto, api_key, provider, modelo):
-    r = _chamar_ia(_PROMPT_IDENTIFICACAO, texto, api_key, provider, modelo)
+@agente
+async def preencher_identificacao(texto, api_key, provider, modelo):
+    r = await _chamar_ia(_PROMPT_IDENTIFICACAO, texto, api_key, provider, modelo)
     r.pop("_erro", None)
     # Campos numéricos inteiros: null/None → 0, converte string → int
     for k in ["sofa_adm", "sofa_atual"]:
@@ -1,5 +1,5 @@
 from ._base import (
-    _chamar_ia, _REGRA_DATA, _extrair_json,
+    _chamar_ia, _REGRA_DATA, _extrair_json, agente,
     OpenAI, _genai_new, _genai_types,
 )
 
@@ -534,10 +534,11 @@ Extraia exatamente as seguintes chaves JSON, gerando-as nesta exata ordem:
 </VARIAVEIS>"""
 
 
-def preencher_laboratoriais(texto, api_key, provider, modelo):
+@agente
+async def preencher_laboratoriais(texto, api_key, provider, modelo):
     if not texto or not str(texto).strip():
         return {"_erro": "Nenhum texto de exames fornecido. Cole os exames no campo de notas do Bloco 10."}
-    r = _chamar_ia(_PROMPT_LABORATORIAIS, texto, api_key, provider, modelo)
+    r = await _chamar_ia(_PROMPT_LABORATORIAIS, texto, api_key, provider, modelo)
     if "_erro" in r:
         return r
     r.pop("_erro", None)
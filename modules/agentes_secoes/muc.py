@@ -1,5 +1,5 @@
 from ._base import (
-    _chamar_ia, _REGRA_DATA, _extrair_json,
+    _chamar_ia, _REGRA_DATA, _extrair_json, agente,
     OpenAI, _genai_new, _genai_types,
 )
 
@@ -178,8 +178,9 @@ Extraia exatamente as seguintes chaves JSON, gerando-as nesta exata ordem:
 </VARIAVEIS>"""
 
 
-def preencher_muc(texto, api_key, provider, modelo):
-    r = _chamar_ia(_PROMPT_MUC, texto, api_key, provider, modelo)
+@agente
+async def preencher_muc(texto, api_key, provider, modelo):
+    r = await _chamar_ia(_PROMPT_MUC, texto, api_key, provider, modelo)
     if "_erro" in r:
         return r
 
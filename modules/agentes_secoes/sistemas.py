@@ -1,5 +1,5 @@
 from ._base import (
-    _chamar_ia, _REGRA_DATA, _extrair_json,
+    _chamar_ia, _REGRA_DATA, _extrair_json, agente,
     OpenAI, _genai_new, _genai_types,
 )
 
@@ -573,8 +573,9 @@ Retorne EXATAMENTE este JSON com todos os campos. Campos ausentes = "". Inteiros
   "sis_pele_pocus": "", "sis_pele_obs": "LPP sacral Grau II em cicatrização. Mudança de decúbito 2/2h. Colchão piramidal.", "sis_pele_conduta": ""
 }"""
 
-def preencher_sistemas(texto, api_key, provider, modelo):
-    r = _chamar_ia(_PROMPT_SISTEMAS, texto, api_key, provider, modelo)
+@agente
+async def preencher_sistemas(texto, api_key, provider, modelo):
+    r = await _chamar_ia(_PROMPT_SISTEMAS, texto, api_key, provider, modelo)
     r.pop("_erro", None)
 
     # Campos neurológicos numéricos: inteiros → string para text_input (como FC, PAM)
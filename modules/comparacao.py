@@ -0,0 +1,69 @@
+"""
+Diff campo a campo entre duas evoluções, agrupado por seção do formulário.
+
+Trabalha sobre o registro de campos (fichas): campo ausente do dict vale o seu
+padrão. Por isso dois dicts esparsos (fichas.compactar_campos — o formato
+salvo) são comparados só nas chaves presentes em algum deles: seções sem
+nenhum campo preenchido em nenhuma das versões nunca são percorridas nem
+expandidas. Dicts completos (legado, session_state) também funcionam —
+compacte antes para ficar no caminho rápido.
+"""
+from modules import fichas
+
+# Campos que não são conteúdo clínico (texto colado / gerado pelo modelo)
+_IGNORAR = frozenset({"texto_bruto_original", "texto_final_gerado"})
+
+
+def _vazio(valor) -> bool:
+    return valor is None or valor is False or valor == "" or valor == [] or valor == {}
+
+
+def _nova_secao(secao: str) -> dict:
+    return {
+        "rotulo": fichas.rotulo_secao(secao),
+        "alterados": [],     # (campo, antes, depois)
+        "adicionados": [],   # (campo, depois)
+        "removidos": [],     # (campo, antes)
+    }
+
+
+def comparar(anterior: dict, atual: dict, ignorar: frozenset = _IGNORAR) -> dict[str, dict]:
+    """
+    Diferenças de `anterior` para `atual`, por seção (id → dict com "rotulo",
+    "alterados", "adicionados", "removidos"), na ordem do formulário. Só
+    entram seções com alguma diferença. Preenchido → vazio é "removido";
+    vazio → preenchido é "adicionado". Chaves fora do registro e iniciadas
+    por "_" (ex.: _data_hora) são ignoradas.
+    """
+    difs = []
+    for campo in anterior.keys() | atual.keys():
+        if campo in ignorar or campo.startswith("_"):
+            continue
+        posicao = fichas.secao_do_campo(campo)
+        if posicao is None:
+            continue
+        padrao = fichas.valor_padrao(campo)
+        antes = anterior.get(campo, padrao)
+        depois = atual.get(campo, padrao)
+        if antes == depois or (_vazio(antes) and _vazio(depois)):
+            continue
+        difs.append((posicao, campo, antes, depois))
+
+    secoes: dict[str, dict] = {}
+    for (_, secao), campo, antes, depois in sorted(difs, key=lambda d: d[0][0]):
+        grupo = secoes.setdefault(secao, _nova_secao(secao))
+        if _vazio(antes):
+            grupo["adicionados"].append((campo, depois))
+        elif _vazio(depois):
+            grupo["removidos"].append((campo, antes))
+        else:
+            grupo["alterados"].append((campo, antes, depois))
+    return secoes
+
+
+def resumo(secoes: dict[str, dict]) -> dict[str, int]:
+    """Totais de alterados/adicionados/removidos de um resultado de comparar()."""
+    return {
+        tipo: sum(len(g[tipo]) for g in secoes.values())
+        for tipo in ("alterados", "adicionados", "removidos")
+    }
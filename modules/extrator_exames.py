@@ -1,59 +1,47 @@
 """
 Extração de exames e prescrições usando a mesma lógica multi-agente do PACER.
-- extrair_exames():      6 agentes paralelos (idêntico ao PACER — aba Exames)
+- extrair_exames():      6 agentes concorrentes (idêntico ao PACER — aba Exames)
 - extrair_prescricao():  3 agentes sequenciais (idêntico ao PACER — aba Prescrição)
 
 Qualidade: sempre usa gemini-2.5-pro para Gemini (exames, gasometria e prescrição
 exigem máxima precisão). Para OpenAI, usa gpt-4o.
+As chamadas rodam no motor assíncrono (modules/ia/motor.py).
 """
-from google import genai as _genai_new
-from google.genai import types as _genai_types
-from openai import OpenAI
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from modules.ia import motor
 
 # Modelo fixo de alta qualidade para exames e prescrição
 _MODELO_GEMINI_QUALIDADE = "gemini-2.5-pro"
+# Prazo da rodada de agentes de exames (os que não terminarem são descartados)
+_PRAZO_AGENTES_SEG = 60
 
 
 # ==============================================================================
 # HELPER: chamada única de IA (igual ao processar_texto do PACER)
 # ==============================================================================
 
-def _chamar_ia(provider: str, api_key: str, modelo: str,
-               prompt_system: str, input_text: str) -> str:
+async def _chamar_ia_async(provider: str, api_key: str, modelo: str,
+                           prompt_system: str, input_text: str) -> str:
     try:
         if "gemini" in provider.lower() or "google" in provider.lower():
-            client = _genai_new.Client(api_key=api_key)
-            response = client.models.generate_content(
-                model=_MODELO_GEMINI_QUALIDADE,  # sempre Pro para exames/prescrição
-                contents=input_text,
-                config=_genai_types.GenerateContentConfig(
-                    system_instruction=prompt_system,
-                    temperature=0.0,
-                    thinking_config=_genai_types.ThinkingConfig(thinking_budget=0),
-                ),
+            return await motor.gerar(
+                "gemini", api_key, _MODELO_GEMINI_QUALIDADE,  # sempre Pro para exames/prescrição
+                prompt_system, input_text, {"temperature": 0.0, "thinking_budget": 0},
             )
-            return response.text
         else:
-            client = OpenAI(api_key=api_key)
-            resp = client.chat.completions.create(
-                model=modelo,
-                messages=[
-                    {"role": "system", "content": prompt_system},
-                    {"role": "user",   "content": input_text},
-                ],
-                temperature=0.0,
-                top_p=0.1,
-                frequency_penalty=0.0,
-                presence_penalty=0.0,
-                max_tokens=2000,
-                seed=42,
+            return await motor.gerar(
+                "openai", api_key, modelo, prompt_system, input_text,
+                {"temperature": 0.0, "top_p": 0.1, "frequency_penalty": 0.0,
+                 "presence_penalty": 0.0, "max_tokens": 2000, "seed": 42},
             )
-            return resp.choices[0].message.content
     except Exception as e:
         return f"❌ Erro na API: {e}"
 
 
+def _chamar_ia(provider: str, api_key: str, modelo: str,
+               prompt_system: str, input_text: str) -> str:
+    return motor.executar_uma(_chamar_ia_async(provider, api_key, modelo, prompt_system, input_text))
+
+
 # ==============================================================================
 # PROMPTS — EXAMES (cópia fiel dos agentes do PACER)
 # ==============================================================================
@@ -522,21 +510,21 @@ def extrair_exames(texto: str, api_key: str, provider: str, modelo: str) -> str:
     # Passo 2: 6 agentes especializados em paralelo (5 de exames + nao_transcritos)
     resultados_dict: dict[str, str] = {}
 
-    def _worker(agente_id: str):
+    async def _worker(agente_id: str):
         prompt = _AGENTES_EXAMES_PROMPTS[agente_id]
-        r = _chamar_ia(provider, api_key, modelo, prompt, texto)
+        r = await _chamar_ia_async(provider, api_key, modelo, prompt, texto)
         if r and "❌" not in r and "⚠️" not in r:
             r_limpo = r.strip().rstrip(".,:;!? ")
             if r_limpo and r_limpo.upper() != "VAZIO":
-                return agente_id, r_limpo
-        return agente_id, None
-
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        futures = {executor.submit(_worker, aid): aid for aid in _AGENTES_EXAMES_ORDEM}
-        for future in as_completed(futures):
-            aid, resultado = future.result(timeout=60)
-            if resultado:
-                resultados_dict[aid] = resultado
+                return r_limpo
+        return None
+
+    resultados = motor.executar(
+        {aid: _worker(aid) for aid in _AGENTES_EXAMES_ORDEM}, prazo=_PRAZO_AGENTES_SEG,
+    )
+    for aid, resultado in resultados.items():
+        if isinstance(resultado, str):
+            resultados_dict[aid] = resultado
 
     # Passo 3: montar resultado na ordem fixa do PACER
     # Agrupamento igual ao pacer.py:
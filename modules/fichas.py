@@ -266,6 +266,130 @@ def get_todos_campos_keys() -> list:
     return _get_campos_keys_cached()
 
 
+# Seções do registro, na ordem do formulário: (id, rótulo, módulo). O id segue
+# o prefixo dos campos; a seção Sistemas se divide por sistema (sis_neuro, ...).
+_SECOES_REGISTRO = [
+    ("identificacao", "Identificação", identificacao),
+    ("hd", "Diagnósticos", hd),
+    ("cmd", "Comorbidades", comorbidades),
+    ("muc", "Medicações de uso contínuo", muc),
+    ("hmpa", "HMPA", hmpa),
+    ("disp", "Dispositivos", dispositivos),
+    ("cult", "Culturas", culturas),
+    ("atb", "Antibióticos", antibioticos),
+    ("comp", "Exames complementares", complementares),
+    ("lab", "Laboratoriais", laboratoriais),
+    ("evolucao", "Evolução clínica", evolucao_clinica),
+    ("sistemas", "Sistemas", sistemas),
+    ("ctrl", "Controles & balanço", controles),
+    ("prescricao", "Prescrição", prescricao),
+    ("conduta", "Condutas", condutas),
+]
+
+_ROTULOS_SISTEMAS = {
+    "neuro": "Neurológico", "resp": "Respiratório", "cardio": "Cardiovascular",
+    "renal": "Renal", "infec": "Infeccioso", "gastro": "Gastrointestinal",
+    "nutri": "Nutricional", "metab": "Metabólico", "hemato": "Hematológico",
+    "pele": "Pele",
+}
+
+_CAMPO_SECAO_CACHE: dict | None = None   # campo → (ordem no formulário, id da seção)
+_ROTULOS_SECAO_CACHE: dict | None = None  # id da seção → rótulo
+
+
+def _get_campo_secao_cached() -> dict:
+    global _CAMPO_SECAO_CACHE, _ROTULOS_SECAO_CACHE
+    if _CAMPO_SECAO_CACHE is None:
+        mapa, rotulos = {}, {}
+        for secao, rotulo, modulo in _SECOES_REGISTRO:
+            for campo in modulo.get_campos():
+                sid, rot = secao, rotulo
+                if secao == "sistemas" and campo.startswith("sis_"):
+                    sistema = campo.split("_")[1]
+                    sid = f"sis_{sistema}"
+                    rot = f"Sistemas · {_ROTULOS_SISTEMAS.get(sistema, sistema.capitalize())}"
+                rotulos.setdefault(sid, rot)
+                mapa.setdefault(campo, (len(mapa), sid))
+        _ROTULOS_SECAO_CACHE = rotulos
+        _CAMPO_SECAO_CACHE = mapa
+    return _CAMPO_SECAO_CACHE
+
+
+def secao_do_campo(campo: str) -> tuple[int, str] | None:
+    """(ordem no formulário, id da seção) do campo; None se fora do registro."""
+    return _get_campo_secao_cached().get(campo)
+
+
+def rotulo_secao(secao: str) -> str:
+    _get_campo_secao_cached()
+    return _ROTULOS_SECAO_CACHE.get(secao, secao)
+
+
+# Partes de chave que têm grafia própria no rótulo (siglas, acentos)
+_ABREVIACOES = {
+    "min": "mín", "max": "máx", "ult": "último", "antepen": "antepenúltimo", "ini": "início",
+    "atb": "ATB", "pcr": "PCR", "hb": "Hb", "cr": "Cr", "ur": "Ur", "tgo": "TGO", "tgp": "TGP",
+    "rass": "RASS", "ecg": "ECG", "cam": "CAM", "icu": "ICU", "fc": "FC", "pam": "PAM",
+    "inr": "INR", "plaq": "Plaq", "leuc": "Leuc", "peep": "PEEP", "fio2": "FiO2", "trs": "TRS",
+}
+
+
+def rotulo_campo(campo: str) -> str:
+    """
+    Nome legível do campo para listas (painel de mudanças). Usa o rótulo do
+    formulário quando o módulo da seção expõe rotulo_campo(); senão limpa a
+    chave: sem o prefixo da seção, índices como "#n" ("hd_2_nome" → "Nome #2").
+    """
+    for _, _, modulo in _SECOES_REGISTRO:
+        rotular = getattr(modulo, "rotulo_campo", None)
+        if rotular is not None:
+            rotulo = rotular(campo)
+            if rotulo:
+                return rotulo
+    partes = campo.split("_")
+    pos = secao_do_campo(campo)
+    if pos is not None:
+        prefixo = pos[1].split("_")   # "hd" ou "sis_neuro"
+        if partes[:len(prefixo)] == prefixo and len(partes) > len(prefixo):
+            partes = partes[len(prefixo):]
+    indices = [p for p in partes if p.isdigit()]
+    palavras = [_ABREVIACOES.get(p, p) for p in partes if not p.isdigit()]
+    texto = " ".join(palavras) or campo
+    texto = texto[:1].upper() + texto[1:]
+    return texto + "".join(f" #{i}" for i in indices)
+
+
+def valor_padrao(campo: str):
+    """Valor padrão do campo no registro (None se fora do registro)."""
+    return _get_campos_base_cached().get(campo)
+
+
+def compactar_campos(dados: dict) -> dict:
+    """
+    Serialização esparsa: remove os campos cujo valor é igual ao padrão de
+    _campos_base() (a maioria dos ~1700 campos fica em ""/None/False).
+    Comparação estrita de tipo — False não é elidido como 0, nem "" como None.
+    Chaves fora do registro são mantidas. Inverso: expandir_campos().
+    """
+    defaults = _get_campos_base_cached()
+    _faltando = object()
+    compacto = {}
+    for k, v in dados.items():
+        d = defaults.get(k, _faltando)
+        if d is not _faltando and type(v) is type(d) and v == d:
+            continue
+        compacto[k] = v
+    return compacto
+
+
+def expandir_campos(dados: dict) -> dict:
+    """
+    Reidrata um dict esparso: todos os campos do registro com seu padrão,
+    sobrescritos pelos valores salvos. Seguro para dicts completos (legado).
+    """
+    return {**_get_campos_base_cached(), **dados}
+
+
 def inicializar_estado():
     """Garante que todos os campos estão no session_state com seu valor padrão."""
     defaults = _get_campos_base_cached()
@@ -1,6 +1,6 @@
-import concurrent.futures
 import streamlit as st
-from modules import fichas
+from modules import fichas, roteador
+from modules.ia import motor
 from utils import verificar_rate_limit
 
 # ── Helpers de limpeza de valores (usados em completar_sistemas_de_outros_blocos) ──
@@ -92,16 +92,14 @@ def rodar_agentes_paralelo(
     provider: str,
     modelo: str,
     on_progress=None,
+    usar_cache: bool = True,
 ) -> tuple:
     """Executa os agentes das seções em paralelo e acumula resultados no staging.
 
     on_progress: callable(concluidos, total, nome_secao) — chamado a cada agente concluído.
+    usar_cache=False: refaz as chamadas em vez de repetir respostas guardadas.
     Retorna (n_preenchidos, lista_erros).
     """
-    permitido, msg = verificar_rate_limit()
-    if not permitido:
-        return 0, [f"🚫 Rate limit: {msg}"]
-
     from modules import agentes_secoes
 
     tarefas = [
@@ -112,34 +110,54 @@ def rodar_agentes_paralelo(
     if not tarefas:
         return 0, []
 
+    # Laboratoriais, Controles e Sistemas passam antes pelo parser do formato
+    # padrão: a IA só recebe o que ele não reconheceu (modules/roteador.py)
+    rotas = {s: roteador.rotear(s, t) for s, t in tarefas if s in roteador.ROTEADORES}
+    if any(s not in rotas or rotas[s][2] for s, _ in tarefas):
+        permitido, msg = verificar_rate_limit()
+        if not permitido:
+            return 0, [f"🚫 Rate limit: {msg}"]
+
     concluidos = 0
     erros = []
     resultados = {}
 
-    def _rodar(secao, texto):
-        fn = agentes_secoes._AGENTES[secao]
-        return secao, fn(texto, api_key, provider, modelo)
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(tarefas), 8)) as executor:
-        futures = {executor.submit(_rodar, s, t): s for s, t in tarefas}
-        for future in concurrent.futures.as_completed(futures):
-            concluidos += 1
-            try:
-                secao, dados = future.result()
-                nome = agentes_secoes.NOMES_SECOES[secao]
-                if "_erro" in dados:
-                    erros.append(f"{nome}: {dados['_erro']}")
-                else:
-                    resultados[secao] = dados
-            except Exception as exc:
-                sec = futures[future]
-                nome = agentes_secoes.NOMES_SECOES[sec]
-                erros.append(f"{nome}: {exc}")
-                nome = ""
-            else:
-                nome = agentes_secoes.NOMES_SECOES.get(secao, secao)
-            if on_progress:
-                on_progress(concluidos, len(tarefas), nome)
+    def _ao_concluir(secao, dados):
+        # Thread do Streamlit: on_progress pode atualizar a UI
+        nonlocal concluidos
+        concluidos += 1
+        nome = agentes_secoes.NOMES_SECOES.get(secao, secao)
+        if isinstance(dados, Exception):
+            erros.append(f"{nome}: {dados}")
+            nome = ""
+        elif "_erro" in dados:
+            erros.append(f"{nome}: {dados['_erro']}")
+        else:
+            if "_aviso" in dados:
+                dados = dict(dados)
+                erros.append(f"{nome}: {dados.pop('_aviso')}")
+            resultados[secao] = dados
+        if on_progress:
+            on_progress(concluidos, len(tarefas), nome)
+
+    # Todos os agentes como corrotinas no motor assíncrono (limite global de
+    # chamadas simultâneas em modules/ia/motor.py, não por clique). "Completar
+    # Campos" de uma seção passa à frente dos lotes "Completar Todos" na fila.
+    def _tarefa(secao, texto):
+        agente = agentes_secoes._AGENTES[secao].assincrono
+        if secao not in rotas:
+            return agente(texto, api_key, provider, modelo)
+        return roteador.completar(
+            secao, texto, rotas[secao],
+            lambda entrada: agente(entrada, api_key, provider, modelo),
+        )
+
+    motor.executar(
+        {s: _tarefa(s, t) for s, t in tarefas},
+        ao_concluir=_ao_concluir,
+        prioridade=motor.INTERATIVA if len(secoes) == 1 else motor.LOTE,
+        usar_cache=usar_cache,
+    )
 
     staging = st.session_state.get("_agent_staging", {})
     for dados in resultados.values():
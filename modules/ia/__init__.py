@@ -0,0 +1,5 @@
+"""
+Pacote ia — infraestrutura comum das chamadas de IA (Gemini / OpenAI) feitas
+pelos agentes de seção, pelo extrator de exames, pelo ia_extrator e pelo PACER.
+Os prompts e o tratamento das respostas continuam em cada chamador.
+"""
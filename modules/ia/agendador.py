@@ -0,0 +1,134 @@
+"""
+Agendador das chamadas de IA entre sessões (vários médicos no plantão).
+
+Cada provedor tem um número fixo de vagas de chamadas em voo (dimensionado
+pela cota da conta, ver motor.LIMITES). Quem não encontra vaga entra numa
+fila com:
+
+- Classes de prioridade: INTERATIVA (uma ação com o usuário olhando a tela —
+  "Completar Campos" de uma seção, Extrair Seções, PACER) passa à frente de
+  LOTE ("Completar Todos os Campos", até 13 chamadas de uma vez).
+- Justiça entre sessões: dentro de cada classe, as sessões são servidas em
+  rodízio (uma chamada de cada por vez), então um lote de 13 agentes não
+  trava o lote de outro médico que clicou um segundo depois.
+- Envelhecimento: uma chamada LOTE esperando mais que ENVELHECIMENTO_SEG é
+  servida antes das interativas (lote nunca espera para sempre).
+
+Usado só dentro do event loop do motor (uma thread): não há locks.
+"""
+import asyncio
+import contextlib
+import time
+from collections import OrderedDict, deque
+
+INTERATIVA = 0
+LOTE = 1
+_NOMES = {INTERATIVA: "interativa", LOTE: "lote"}
+
+ENVELHECIMENTO_SEG = 15
+# Esperas guardadas por classe para as estatísticas (p50/p95)
+_AMOSTRAS = 500
+
+
+def _percentil(valores, p: float) -> float | None:
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return round(ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))], 3)
+
+
+class Agendador:
+    """Vagas de chamadas em voo de um provedor, com filas por prioridade e sessão."""
+
+    def __init__(self, capacidade: int):
+        self.capacidade = max(1, int(capacidade))
+        self.em_voo = 0
+        # prioridade → sessão → fila de (futuro, instante de entrada)
+        self._filas: dict[int, OrderedDict] = {p: OrderedDict() for p in _NOMES}
+        self._esperas = {p: deque(maxlen=_AMOSTRAS) for p in _NOMES}
+
+    def _aguardando(self) -> int:
+        return sum(len(f) for filas in self._filas.values() for f in filas.values())
+
+    @contextlib.asynccontextmanager
+    async def vaga(self, sessao: str, prioridade: int = INTERATIVA):
+        """Espera a vez da chamada e ocupa uma vaga até o fim do bloco."""
+        await self._entrar(sessao, prioridade)
+        try:
+            yield
+        finally:
+            self._sair()
+
+    async def _entrar(self, sessao: str, prioridade: int) -> None:
+        desde = time.monotonic()
+        if self.em_voo < self.capacidade and not self._aguardando():
+            self.em_voo += 1
+            self._esperas[prioridade].append(0.0)
+            return
+        futuro = asyncio.get_running_loop().create_future()
+        item = (futuro, desde)
+        self._filas[prioridade].setdefault(sessao, deque()).append(item)
+        try:
+            await futuro
+        except asyncio.CancelledError:
+            if futuro.done() and not futuro.cancelled():
+                self._sair()  # a vaga chegou junto com o cancelamento: devolve
+            else:
+                self._remover(prioridade, sessao, item)
+            raise
+        self._esperas[prioridade].append(time.monotonic() - desde)
+
+    def _sair(self) -> None:
+        self.em_voo -= 1
+        self._despachar()
+
+    def _despachar(self) -> None:
+        while self.em_voo < self.capacidade:
+            item = self._proximo()
+            if item is None:
+                return
+            futuro, _ = item
+            if futuro.done():
+                continue  # cancelada enquanto esperava
+            futuro.set_result(None)
+            self.em_voo += 1
+
+    def _proximo(self):
+        agora = time.monotonic()
+        for p in sorted(self._filas)[1:]:
+            for sessao, fila in self._filas[p].items():
+                if agora - fila[0][1] > ENVELHECIMENTO_SEG:
+                    return self._retirar(p, sessao)
+        for p in sorted(self._filas):
+            if self._filas[p]:
+                return self._retirar(p, next(iter(self._filas[p])))
+        return None
+
+    def _retirar(self, prioridade: int, sessao: str):
+        filas = self._filas[prioridade]
+        fila = filas[sessao]
+        item = fila.popleft()
+        if fila:
+            filas.move_to_end(sessao)  # rodízio: a sessão volta para o fim da vez
+        else:
+            del filas[sessao]
+        return item
+
+    def _remover(self, prioridade: int, sessao: str, item) -> None:
+        filas = self._filas[prioridade]
+        fila = filas.get(sessao)
+        if fila is not None and item in fila:
+            fila.remove(item)
+            if not fila:
+                del filas[sessao]
+
+    def estatisticas(self) -> dict:
+        return {
+            "capacidade": self.capacidade,
+            "em_voo": self.em_voo,
+            "aguardando": {
+                _NOMES[p]: sum(len(f) for f in filas.values()) for p, filas in self._filas.items()
+            },
+            "espera_p50_seg": {_NOMES[p]: _percentil(v, 0.50) for p, v in self._esperas.items()},
+            "espera_p95_seg": {_NOMES[p]: _percentil(v, 0.95) for p, v in self._esperas.items()},
+        }
@@ -0,0 +1,161 @@
+"""
+Cache em disco das respostas de IA, endereçado pelo conteúdo da chamada.
+
+A chave é o hash de (provedor, modelo, hash do prompt de sistema, hash do
+texto de entrada, parâmetros de geração): a mesma seção colada de novo, ou
+"Completar Campos" apertado duas vezes, devolve a resposta gravada em
+milissegundos em vez de pagar de novo latência e tokens. Qualquer mudança de
+prompt, modelo ou parâmetro gera outra chave — não há invalidação manual.
+
+Fica num SQLite (WAL) em .dados_locais/, compartilhado por todas as sessões
+e processos e preservado entre reinícios. Entradas expiram após TTL_SEG; a
+faxina periódica descarta as menos usadas recentemente acima de CAPACIDADE
+(LRU pela coluna usado_em). Os contadores de acertos/faltas ficam em
+estatisticas(). Consultado e alimentado por motor.gerar(), só em chamadas
+determinísticas (temperature 0 ou seed fixa) — com amostragem, repetir a
+chamada é justamente o jeito de obter outra resposta. Só respostas válidas
+entram (exceções do provedor sobem sem gravar nada).
+
+INTENSIVA_CACHE_IA=0 desliga o cache (toda chamada vai ao provedor).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from modules.persistencia.espelho import diretorio_dados
+
+# Respostas mantidas em disco
+CAPACIDADE = 5000
+# Validade de uma resposta (modelos "latest"/preview mudam por baixo do nome)
+TTL_SEG = 7 * 24 * 3600
+# Faxina (expiradas + excesso do LRU) a cada tantas gravações
+_FAXINA_CADA = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS respostas (
+    chave     TEXT PRIMARY KEY,
+    provedor  TEXT NOT NULL,
+    modelo    TEXT NOT NULL,
+    resposta  TEXT NOT NULL,
+    criado_em REAL NOT NULL,
+    usado_em  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_respostas_usado_em ON respostas(usado_em);
+"""
+
+_LOCAL = threading.local()
+_LOCK = threading.Lock()
+_CAMINHO: Path | None = None
+_ESTATS = {"acertos": 0, "faltas": 0, "expiradas": 0, "gravadas": 0, "descartadas": 0}
+
+
+def ativo() -> bool:
+    return os.getenv("INTENSIVA_CACHE_IA", "1") != "0"
+
+
+def _caminho() -> Path:
+    global _CAMINHO
+    if _CAMINHO is None:
+        pasta = diretorio_dados()
+        pasta.mkdir(parents=True, exist_ok=True)
+        _CAMINHO = pasta / "cache_ia.sqlite3"
+    return _CAMINHO
+
+
+def _conexao() -> sqlite3.Connection:
+    """Uma conexão por thread (os agentes chamam a IA em paralelo)."""
+    conn = getattr(_LOCAL, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(_caminho(), timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # perder a última resposta num crash é aceitável
+        conn.executescript(_SCHEMA)
+        _LOCAL.conn = conn
+    return conn
+
+
+def _hash(texto: str) -> str:
+    return hashlib.sha256(str(texto).encode("utf-8")).hexdigest()
+
+
+def chave(provedor: str, modelo: str, prompt_system: str, entrada: str, params: dict | None = None) -> str:
+    """Endereço da chamada: qualquer diferença de prompt, entrada, modelo ou parâmetro muda a chave."""
+    partes = [
+        str(provedor), str(modelo), _hash(prompt_system), _hash(entrada),
+        json.dumps(params or {}, sort_keys=True, default=str),
+    ]
+    return _hash("\x1f".join(partes))
+
+
+def obter(chave_: str) -> str | None:
+    """Resposta gravada para a chave, ou None (ausente ou expirada)."""
+    agora = time.time()
+    try:
+        row = _conexao().execute(
+            "SELECT resposta, criado_em FROM respostas WHERE chave = ?", (chave_,)
+        ).fetchone()
+        if row is not None and agora - row[1] > TTL_SEG:
+            with _LOCK:
+                _conexao().execute("DELETE FROM respostas WHERE chave = ?", (chave_,))
+                _ESTATS["expiradas"] += 1
+            row = None
+        if row is not None:
+            with _LOCK:
+                _conexao().execute("UPDATE respostas SET usado_em = ? WHERE chave = ?", (agora, chave_))
+    except sqlite3.Error:
+        row = None
+    with _LOCK:
+        _ESTATS["acertos" if row is not None else "faltas"] += 1
+    return row[0] if row is not None else None
+
+
+def guardar(chave_: str, provedor: str, modelo: str, resposta: str) -> None:
+    agora = time.time()
+    try:
+        with _LOCK:
+            _conexao().execute(
+                "INSERT INTO respostas(chave, provedor, modelo, resposta, criado_em, usado_em) "
+                "VALUES(?, ?, ?, ?, ?, ?) ON CONFLICT(chave) DO UPDATE SET "
+                "resposta = excluded.resposta, criado_em = excluded.criado_em, usado_em = excluded.usado_em",
+                (chave_, str(provedor), str(modelo), resposta, agora, agora),
+            )
+            _ESTATS["gravadas"] += 1
+            if _ESTATS["gravadas"] % _FAXINA_CADA == 0:
+                _faxina(agora)
+    except sqlite3.Error:
+        pass  # cache é opcional: disco cheio/travado não derruba a chamada
+
+
+def _faxina(agora: float) -> None:
+    """Remove expiradas e, acima da capacidade, as menos usadas. Chamado com _LOCK."""
+    conn = _conexao()
+    n = conn.execute("DELETE FROM respostas WHERE criado_em < ?", (agora - TTL_SEG,)).rowcount
+    excesso = conn.execute("SELECT COUNT(*) FROM respostas").fetchone()[0] - CAPACIDADE
+    if excesso > 0:
+        n += conn.execute(
+            "DELETE FROM respostas WHERE chave IN "
+            "(SELECT chave FROM respostas ORDER BY usado_em LIMIT ?)", (excesso,)
+        ).rowcount
+    _ESTATS["descartadas"] += max(0, n)
+
+
+def estatisticas() -> dict:
+    """Contadores do processo (acertos, faltas, expiradas, gravadas, descartadas) + ocupação em disco."""
+    with _LOCK:
+        estats = dict(_ESTATS)
+    try:
+        estats["tamanho"] = _conexao().execute("SELECT COUNT(*) FROM respostas").fetchone()[0]
+    except sqlite3.Error:
+        estats["tamanho"] = None
+    estats["capacidade"] = CAPACIDADE
+    return estats
+
+
+def limpar() -> None:
+    """Apaga todas as respostas gravadas."""
+    with _LOCK:
+        _conexao().execute("DELETE FROM respostas")
@@ -0,0 +1,109 @@
+"""
+Registro de clientes de IA reaproveitados entre chamadas e sessões.
+
+Criar OpenAI(api_key=...) ou genai.Client(api_key=...) a cada chamada joga
+fora o pool de conexões HTTP: cada agente paga DNS + TCP + TLS de novo, e os
+agentes de uma extração saem todos juntos. Aqui há um cliente por
+(provedor, chave de API), compartilhado por todas as threads e sessões do
+processo (os dois SDKs são thread-safe), com conexões keep-alive e pool
+limitado. HTTP/2 é usado quando o pacote h2 está instalado (pip install h2):
+as chamadas paralelas passam a multiplexar poucas conexões.
+
+Os clientes assíncronos (AsyncOpenAI, genai.Client.aio) prendem o pool ao
+event loop em que são usados pela primeira vez: só motor.py os usa, sempre no
+seu loop único do processo.
+
+A chave de API não fica no registro em texto puro: o índice usa o hash dela.
+"""
+import hashlib
+import importlib.util
+import inspect
+import threading
+from collections import OrderedDict
+
+import httpx
+from google import genai as _genai_new
+from google.genai import types as _genai_types
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+# Conexões simultâneas por cliente (acima disso as chamadas esperam uma livre)
+MAX_CONEXOES = 16
+# Conexões ociosas mantidas abertas para a próxima chamada
+MAX_OCIOSAS = 8
+KEEPALIVE_SEG = 60
+# Clientes mantidos (chaves diferentes: usuários com chave própria)
+MAX_CLIENTES = 8
+
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+_LOCK = threading.Lock()
+_CLIENTES: OrderedDict = OrderedDict()   # (provedor, hash da chave) → cliente
+_ESTATS = {"criados": 0, "reusos": 0}
+
+
+def _limites() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=MAX_CONEXOES,
+        max_keepalive_connections=MAX_OCIOSAS,
+        keepalive_expiry=KEEPALIVE_SEG,
+    )
+
+
+def _obter(provedor: str, api_key: str, criar):
+    chave = (provedor, hashlib.sha256(str(api_key).encode("utf-8")).hexdigest())
+    with _LOCK:
+        cliente = _CLIENTES.get(chave)
+        if cliente is not None:
+            _CLIENTES.move_to_end(chave)
+            _ESTATS["reusos"] += 1
+            return cliente
+        cliente = criar()
+        _CLIENTES[chave] = cliente
+        _ESTATS["criados"] += 1
+        while len(_CLIENTES) > MAX_CLIENTES:
+            # Sem close(): outra thread pode estar no meio de uma chamada com ele;
+            # as conexões fecham quando o cliente é coletado
+            _CLIENTES.popitem(last=False)
+        return cliente
+
+
+def cliente_openai(api_key: str) -> OpenAI:
+    return _obter("openai", api_key, lambda: OpenAI(
+        api_key=api_key,
+        http_client=DefaultHttpxClient(limits=_limites(), http2=HTTP2),
+    ))
+
+
+def cliente_openai_async(api_key: str) -> AsyncOpenAI:
+    return _obter("openai_async", api_key, lambda: AsyncOpenAI(
+        api_key=api_key,
+        http_client=DefaultAsyncHttpxClient(limits=_limites(), http2=HTTP2),
+    ))
+
+
+def cliente_gemini(api_key: str) -> _genai_new.Client:
+    """Cliente Gemini; a API assíncrona é o atributo .aio do mesmo cliente."""
+    args = {"limits": _limites(), "http2": HTTP2}
+    return _obter("gemini", api_key, lambda: _genai_new.Client(
+        api_key=api_key,
+        http_options=_genai_types.HttpOptions(client_args=args, async_client_args=dict(args)),
+    ))
+
+
+def estatisticas() -> dict:
+    with _LOCK:
+        return {**_ESTATS, "clientes": len(_CLIENTES), "http2": HTTP2}
+
+
+def fechar() -> None:
+    """Fecha as conexões de todos os clientes e esvazia o registro."""
+    with _LOCK:
+        clientes = list(_CLIENTES.values())
+        _CLIENTES.clear()
+    for cliente in clientes:
+        try:
+            fechamento = cliente.close()
+            if inspect.iscoroutine(fechamento):
+                fechamento.close()  # cliente assíncrono: as conexões fecham com o loop
+        except Exception:
+            pass
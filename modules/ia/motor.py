@@ -0,0 +1,256 @@
+"""
+Motor assíncrono das chamadas de IA.
+
+Um único event loop por processo, numa thread daemon, faz todas as chamadas
+aos provedores pelos clientes assíncronos (clientes.py). Uma extração com 13
+agentes não abre 13 threads: são 13 corrotinas esperando rede no mesmo loop,
+e dezenas de usuários simultâneos continuam usando uma thread só.
+
+- Limite por processo: no máximo LIMITES[provedor] chamadas em voo; as demais
+  esperam a vez no agendador (agendador.py: prioridade interativa > lote,
+  rodízio entre sessões), no loop, sem ocupar thread.
+- Prazo por chamada (PRAZO_CHAMADA_SEG) e prazo opcional da rodada inteira em
+  executar(); o que estoura é cancelado de fato (a requisição HTTP é abortada).
+- Cancelamento: se a thread do Streamlit é interrompida (usuário clicou em
+  Stop, rerun), as corrotinas da rodada são canceladas.
+- Cache (cache.py) consultado antes de cada chamada determinística
+  (temperature 0 ou seed fixa); usar_cache=False refaz a chamada (retry
+  pedido pelo usuário) e grava a resposta nova no lugar da antiga.
+
+Wrappers síncronos para o Streamlit: chamar() para uma chamada, executar()
+para um leque de tarefas (corrotinas), com callback de progresso na thread
+de quem chamou (onde st.* funciona). Eles registram a sessão do Streamlit e
+a prioridade da ação, que acompanham as corrotinas até o agendador.
+"""
+import asyncio
+import contextvars
+import os
+import queue
+import threading
+
+from google.genai import types as _genai_types
+
+from modules.ia import cache
+from modules.ia.agendador import INTERATIVA, LOTE, Agendador
+from modules.ia.clientes import cliente_gemini, cliente_openai_async
+
+# Chamadas em voo no processo inteiro (todas as sessões), por provedor —
+# ajustar à cota da conta (requisições simultâneas / por minuto)
+LIMITES = {
+    "gemini": int(os.getenv("INTENSIVA_IA_LIMITE_GEMINI", "16")),
+    "openai": int(os.getenv("INTENSIVA_IA_LIMITE_OPENAI", "16")),
+}
+# Prazo de uma chamada ao provedor (inclui a espera na fila do agendador)
+PRAZO_CHAMADA_SEG = 90
+
+_LOCK = threading.Lock()
+_LOOP: asyncio.AbstractEventLoop | None = None
+_AGENDADORES: dict[str, Agendador] = {}
+_ESTATS = {"chamadas": 0, "esgotadas": 0, "canceladas": 0}
+
+# (sessão, prioridade) da ação que originou a corrotina
+_CONTEXTO: contextvars.ContextVar = contextvars.ContextVar("motor_ia_contexto", default=("", INTERATIVA))
+# False: a ação pediu para refazer as chamadas sem consultar o cache
+_USAR_CACHE: contextvars.ContextVar = contextvars.ContextVar("motor_ia_usar_cache", default=True)
+
+
+def _loop() -> asyncio.AbstractEventLoop:
+    global _LOOP
+    with _LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="motor-ia", daemon=True).start()
+            _AGENDADORES.clear()
+            _LOOP = loop
+        return _LOOP
+
+
+def _agendador(provedor: str) -> Agendador:
+    """Chamado só no loop do motor."""
+    agendador = _AGENDADORES.get(provedor)
+    if agendador is None:
+        agendador = _AGENDADORES[provedor] = Agendador(LIMITES.get(provedor, 16))
+    return agendador
+
+
+def _sessao_atual() -> str:
+    """Sessão do Streamlit da thread que chamou (scripts: nome da thread)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+        if ctx is not None:
+            return ctx.session_id
+    except Exception:
+        pass
+    return threading.current_thread().name
+
+
+async def _no_contexto(corrotina, contexto: tuple, usar_cache: bool = True):
+    _CONTEXTO.set(contexto)
+    _USAR_CACHE.set(usar_cache)
+    return await corrotina
+
+
+def _deterministica(params: dict) -> bool:
+    """Só vale guardar a resposta se a mesma chamada tende a repeti-la."""
+    return params.get("temperature") == 0 or params.get("seed") is not None
+
+
+def _contar(chave: str, delta: int = 1) -> None:
+    with _LOCK:
+        _ESTATS[chave] += delta
+
+
+async def _requisitar(provedor: str, api_key: str, modelo: str, prompt_system: str,
+                      entrada: str, params: dict) -> str:
+    if provedor == "gemini":
+        config = _genai_types.GenerateContentConfig(
+            system_instruction=prompt_system,
+            temperature=params.get("temperature"),
+            thinking_config=(
+                _genai_types.ThinkingConfig(thinking_budget=params["thinking_budget"])
+                if "thinking_budget" in params else None
+            ),
+        )
+        resp = await cliente_gemini(api_key).aio.models.generate_content(
+            model=modelo, contents=entrada, config=config,
+        )
+        return resp.text or ""
+    resp = await cliente_openai_async(api_key).chat.completions.create(
+        model=modelo,
+        messages=[
+            {"role": "system", "content": prompt_system},
+            {"role": "user",   "content": entrada},
+        ],
+        **params,
+    )
+    return resp.choices[0].message.content or ""
+
+
+async def gerar(provedor: str, api_key: str, modelo: str, prompt_system: str, entrada: str,
+                params: dict | None = None, valida=None, prazo: float | None = None,
+                usar_cache: bool = True) -> str:
+    """
+    Texto da resposta do provedor ("gemini" ou "openai"). params: parâmetros
+    de geração — OpenAI: repassados a chat.completions.create; Gemini:
+    temperature e thinking_budget. Exceções do provedor e TimeoutError sobem.
+    O cache só entra em chamadas determinísticas (temperature 0 ou seed);
+    usar_cache=False (ou a ação inteira, via executar/chamar) pula a leitura
+    e grava a resposta nova. Só grava resposta não vazia e aceita por
+    valida(texto), quando dado (ex.: JSON que não parseia é refeito).
+    """
+    params = params or {}
+    chave = (
+        cache.chave(provedor, modelo, prompt_system, entrada, params)
+        if cache.ativo() and _deterministica(params) else None
+    )
+    if chave is not None and usar_cache and _USAR_CACHE.get():
+        resposta = cache.obter(chave)
+        if resposta is not None:
+            return resposta
+    prazo = prazo or PRAZO_CHAMADA_SEG
+
+    sessao, prioridade = _CONTEXTO.get()
+
+    async def _na_vez() -> str:
+        async with _agendador(provedor).vaga(sessao, prioridade):
+            return await _requisitar(provedor, api_key, modelo, prompt_system, entrada, params)
+
+    try:
+        resposta = await asyncio.wait_for(_na_vez(), prazo)
+    except asyncio.TimeoutError:
+        _contar("esgotadas")
+        raise TimeoutError(f"Tempo esgotado ({prazo:g}s) aguardando {provedor}/{modelo}") from None
+    except asyncio.CancelledError:
+        _contar("canceladas")
+        raise
+    _contar("chamadas")
+    if chave is not None and resposta.strip() and (valida is None or valida(resposta)):
+        cache.guardar(chave, provedor, modelo, resposta)
+    return resposta
+
+
+def executar_uma(corrotina, prazo: float | None = None, prioridade: int = INTERATIVA,
+                 usar_cache: bool = True):
+    """Roda uma corrotina no loop do motor e espera o resultado (exceções sobem)."""
+    futuro = asyncio.run_coroutine_threadsafe(
+        _no_contexto(corrotina, (_sessao_atual(), prioridade), usar_cache), _loop(),
+    )
+    try:
+        return futuro.result(timeout=prazo)
+    except BaseException:
+        futuro.cancel()  # prazo, Stop do Streamlit ou erro: não deixa a chamada órfã
+        raise
+
+
+def chamar(provedor: str, api_key: str, modelo: str, prompt_system: str, entrada: str,
+           params: dict | None = None, valida=None, prazo: float | None = None,
+           prioridade: int = INTERATIVA, usar_cache: bool = True) -> str:
+    """Versão síncrona de gerar()."""
+    return executar_uma(
+        gerar(provedor, api_key, modelo, prompt_system, entrada, params, valida, prazo),
+        prioridade=prioridade, usar_cache=usar_cache,
+    )
+
+
+def executar(tarefas: dict, prazo: float | None = None, ao_concluir=None,
+             prioridade: int = INTERATIVA, usar_cache: bool = True) -> dict:
+    """
+    Roda as corrotinas de `tarefas` (chave → corrotina) concorrentemente no
+    loop do motor. Retorna chave → resultado, na ordem de `tarefas`; uma
+    tarefa que falhou traz a exceção como valor (TimeoutError se o `prazo`
+    da rodada estourou antes dela terminar — as pendentes são canceladas).
+    ao_concluir(chave, resultado): chamado na thread de quem chamou, na ordem
+    de conclusão. prioridade: INTERATIVA ou LOTE (ver agendador.py).
+    usar_cache=False: as chamadas da rodada ignoram respostas guardadas.
+    """
+    if not tarefas:
+        return {}
+    fila: queue.SimpleQueue = queue.SimpleQueue()
+
+    async def _uma(chave, corrotina):
+        try:
+            resultado = await corrotina
+        except Exception as e:
+            resultado = e
+        fila.put((chave, resultado))
+
+    contexto = (_sessao_atual(), prioridade)
+
+    async def _todas():
+        _CONTEXTO.set(contexto)  # herdado pelas tarefas criadas abaixo
+        _USAR_CACHE.set(usar_cache)
+        pendentes = [asyncio.ensure_future(_uma(k, c)) for k, c in tarefas.items()]
+        try:
+            await asyncio.wait(pendentes, timeout=prazo)
+        finally:
+            for t in pendentes:
+                t.cancel()  # só afeta as que ainda não terminaram
+
+    futuro = asyncio.run_coroutine_threadsafe(_todas(), _loop())
+    resultados: dict = {}
+    try:
+        while len(resultados) < len(tarefas):
+            try:
+                chave, resultado = fila.get(timeout=0.1)
+            except queue.Empty:
+                if futuro.done() and fila.empty():
+                    break
+                continue
+            resultados[chave] = resultado
+            if ao_concluir:
+                ao_concluir(chave, resultado)
+    except BaseException:
+        futuro.cancel()
+        raise
+    esgotado = TimeoutError(f"Tempo esgotado ({prazo or 0:g}s)")
+    return {k: resultados.get(k, esgotado) for k in tarefas}
+
+
+def estatisticas() -> dict:
+    """Contadores do motor + vagas, filas e esperas (p50/p95) do agendador de cada provedor."""
+    with _LOCK:
+        estats = dict(_ESTATS)
+        agendadores = dict(_AGENDADORES)
+    estats["agendadores"] = {p: a.estatisticas() for p, a in agendadores.items()}
+    return estats
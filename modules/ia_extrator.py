@@ -1,7 +1,6 @@
 import json
-from openai import OpenAI
-from google import genai as _genai_new
-from google.genai import types as _genai_types
+
+from modules.ia import motor
 
 SYSTEM_PROMPT = """Você é um Auditor Médico de Terapia Intensiva focado em EXTRAÇÃO DE DADOS.
 Sua missão é receber um texto clínico despadronizado e "fatiá-lo" cirurgicamente em 14 campos JSON.
@@ -140,39 +139,37 @@ Retorne APENAS um objeto JSON válido. Se um campo não tiver correspondência,
 }"""
 
 
+def _json_valido(texto: str) -> bool:
+    try:
+        json.loads((texto or "").replace("```json", "").replace("```", "").strip())
+        return True
+    except json.JSONDecodeError:
+        return False
+
+
 def extrair_dados_prontuario(texto_bruto: str, api_key: str, provider: str = "OpenAI GPT", modelo: str = "gpt-4o") -> dict:
     """
     Envia o prontuário bruto para a IA e retorna um dicionário com os 14 campos extraídos.
-    Suporta OpenAI (padrão) e Google Gemini.
+    Suporta OpenAI (padrão) e Google Gemini. O mesmo prontuário colado de novo vem do cache.
     """
+    entrada = f"Extraia os dados do seguinte prontuário médico:\n\n{texto_bruto}"
     try:
         if "OpenAI" in provider or "GPT" in provider:
             modelo_openai = modelo if modelo.startswith("gpt") else "gpt-4o"
-            client = OpenAI(api_key=api_key)
-            response = client.chat.completions.create(
-                model=modelo_openai,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": f"Extraia os dados do seguinte prontuário médico:\n\n{texto_bruto}"}
-                ],
-                response_format={"type": "json_object"}
+            txt = motor.chamar(
+                "openai", api_key, modelo_openai, SYSTEM_PROMPT, entrada,
+                {"response_format": {"type": "json_object"}, "temperature": 0.0}, valida=_json_valido,
             )
-            return json.loads(response.choices[0].message.content)
+            return json.loads(txt)
 
         else:
             # Google Gemini
             _modelo = modelo if modelo.startswith("gemini") else "gemini-2.5-pro-preview-05-06"
-            client = _genai_new.Client(api_key=api_key)
-            response = client.models.generate_content(
-                model=_modelo,
-                contents=f"Extraia os dados do seguinte prontuário médico:\n\n{texto_bruto}",
-                config=_genai_types.GenerateContentConfig(
-                    system_instruction=SYSTEM_PROMPT,
-                    temperature=0.0,
-                    thinking_config=_genai_types.ThinkingConfig(thinking_budget=0),
-                ),
+            txt = motor.chamar(
+                "gemini", api_key, _modelo, SYSTEM_PROMPT, entrada,
+                {"temperature": 0.0, "thinking_budget": 0}, valida=_json_valido,
             )
-            txt = (response.text or "").replace("```json", "").replace("```", "").strip()
+            txt = txt.replace("```json", "").replace("```", "").strip()
             return json.loads(txt)
 
     except json.JSONDecodeError as e:
@@ -43,6 +43,13 @@ def _slot_por_data(data_exame: date, data_hoje: date) -> str:
     return None  # Ignorar datas fora do range
 
 
+_MAP_VITAIS = [
+    ("PAS", "pas"), ("PAD", "pad"), ("PAM", "pam"),
+    ("FC", "fc"), ("FR", "fr"), ("SatO2", "sato2"),
+    ("Temp", "temp"), ("Dextro", "glic"), ("Glic", "glic"),
+]
+
+
 def _extrair_min_max(token: str, sigla: str) -> tuple[str, str] | None:
     """Extrai min e max de 'PAS: 110 - 135 mmHg'. Retorna (min, max) ou None."""
     if not token.strip().lower().startswith(sigla.lower() + ":"):
@@ -112,14 +119,9 @@ def parse_controles_deterministico(
                 vitais_linha = ln
 
         # Parse vitais: PAS: 110 - 135 mmHg | PAD: 70 - 85 mmHg | ...
-        MAP_VITAIS = [
-            ("PAS", "pas"), ("PAD", "pad"), ("PAM", "pam"),
-            ("FC", "fc"), ("FR", "fr"), ("SatO2", "sato2"),
-            ("Temp", "temp"), ("Dextro", "glic"), ("Glic", "glic"),
-        ]
         tokens = [t.strip() for t in vitais_linha.split("|") if t.strip()]
         for tok in tokens:
-            for sigla, campo in MAP_VITAIS:
+            for sigla, campo in _MAP_VITAIS:
                 r = _extrair_min_max(tok, sigla)
                 if r:
                     resultado[f"ctrl_{dia}_{campo}_min"] = r[0]
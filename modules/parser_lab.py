@@ -91,6 +91,10 @@ def _parse_urn(resto: str) -> dict[str, str]:
     return out
 
 
+# PREFIX – resto (PREFIX = data ou palavra-chave)
+_RE_LINHA_EXAME = re.compile(r"^([^\s–\-]+(?:\s+[^\s–\-]+)?)\s*[–\-]\s*(.*)$", re.DOTALL)
+
+
 def _parse_linha_exame(linha: str) -> tuple[str, dict[str, str], int | None] | None:
     """
     Parseia uma linha no formato: DD/MM/YYYY – Hb 8,8 | ... ou externo – Hb 8,8 | ...
@@ -101,8 +105,7 @@ def _parse_linha_exame(linha: str) -> tuple[str, dict[str, str], int | None] | N
     if not linha:
         return None
 
-    # Formato: PREFIX – resto (PREFIX = data ou palavra-chave)
-    m = re.match(r"^([^\s–\-]+(?:\s+[^\s–\-]+)?)\s*[–\-]\s*(.*)$", linha, re.DOTALL)
+    m = _RE_LINHA_EXAME.match(linha)
     if not m:
         return None
 
@@ -348,6 +348,19 @@ def _parse_pele(bloco: str) -> dict:
     return r
 
 
+_SECOES_PARSER = [
+    ("Neurológico", _parse_neuro),
+    ("Respiratório", _parse_resp),
+    ("Cardiovascular", _parse_cardio),
+    ("Gastrointestinal", _parse_gastro),
+    ("Exame Abdominal", _parse_gastro),
+    ("Renal", _parse_renal),
+    ("Infeccioso", _parse_infec),
+    ("Hematológico", _parse_hemato),
+    ("Pele", _parse_pele),
+]
+
+
 def parse_sistemas_deterministico(texto: str) -> dict[str, str | None]:
     """
     Parseia texto de evolução por sistemas no formato padronizado.
@@ -366,19 +379,7 @@ def parse_sistemas_deterministico(texto: str) -> dict[str, str | None]:
     resultado = {}
 
     # Extrai cada seção e aplica o parser correspondente
-    secao_parser = [
-        ("Neurológico", _parse_neuro),
-        ("Respiratório", _parse_resp),
-        ("Cardiovascular", _parse_cardio),
-        ("Gastrointestinal", _parse_gastro),
-        ("Exame Abdominal", _parse_gastro),
-        ("Renal", _parse_renal),
-        ("Infeccioso", _parse_infec),
-        ("Hematológico", _parse_hemato),
-        ("Pele", _parse_pele),
-    ]
-
-    for titulo, parser_fn in secao_parser:
+    for titulo, parser_fn in _SECOES_PARSER:
         bloco = _extrair_secao(texto, titulo)
         if not bloco:
             # Tenta com "- Titulo" no início
@@ -0,0 +1,5 @@
+"""
+Pacote persistencia — camada de acesso ao Google Sheets usada por utils.py.
+Cada responsabilidade em seu próprio módulo; utils.py continua sendo a
+interface pública para as views.
+"""
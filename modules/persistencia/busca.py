@@ -0,0 +1,194 @@
+"""
+Índice de trigramas em memória para buscar pacientes por nome, prontuário e
+leito, tolerante a erros de digitação e a termos incompletos.
+
+Cada paciente vira um documento (nome e leito da evolução mais recente +
+prontuário); cada palavra é quebrada em trigramas com preenchimento à
+esquerda ("  m", " ma", "mar", ...), então o começo de uma palavra já casa
+(busca por prefixo) e uma letra trocada ainda deixa a maioria dos trigramas
+em comum. A pontuação é a fração dos trigramas da consulta presentes no
+documento.
+
+O índice é incremental: acrescentar() recebe só as linhas novas. O leito
+está dentro do dados_json — de cada paciente só o último keyframe do lote é
+descomprimido, e os deltas seguintes são lidos apenas para ver se mexeram
+no campo leito (delta.ler), sem reconstruir versões.
+"""
+import heapq
+import threading
+import unicodedata
+from collections import Counter
+from datetime import datetime
+
+from modules.persistencia import codec, delta
+from modules.persistencia.historico import FORMATO_DATA_HORA
+from modules.persistencia.indice import normalizar_prontuario
+
+# Fração mínima dos trigramas da consulta presentes no documento
+LIMIAR = 0.45
+
+
+def normalizar(texto) -> str:
+    """Minúsculas, sem acentos, só letras/dígitos separados por espaço."""
+    texto = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode("ascii")
+    return " ".join("".join(c if c.isalnum() else " " for c in texto.lower()).split())
+
+
+def trigramas(texto, completo: bool = True) -> set[str]:
+    """
+    Trigramas das palavras do texto. completo=False (consulta) não fecha a
+    última letra com espaço, para que "mar" case com "maria".
+    """
+    gramas: set[str] = set()
+    for palavra in normalizar(texto).split():
+        p = "  " + palavra + (" " if completo else "")
+        gramas.update(p[i:i + 3] for i in range(len(p) - 2))
+    return gramas
+
+
+class _Paciente:
+    __slots__ = ("prontuario", "nome", "leito", "data_hora", "instante", "gramas", "palavras")
+
+    def __init__(self, prontuario: str):
+        self.prontuario = prontuario
+        self.nome = ""
+        self.leito = ""
+        self.data_hora = ""
+        self.instante = datetime.min
+        self.gramas: set[str] = set()
+        self.palavras: set[str] = set()
+
+
+def _leito_keyframe(payload) -> str | None:
+    try:
+        return str(codec.descomprimir_celula(payload).get("leito") or "").strip()
+    except Exception:
+        return None  # célula corrompida: mantém o leito conhecido
+
+
+def _leito_delta(payload: str, anterior: str) -> str:
+    try:
+        d = delta.ler(payload)
+    except Exception:
+        return anterior
+    if "leito" in d.get("s", {}):
+        return str(d["s"]["leito"] or "").strip()
+    if "leito" in d.get("d", []):
+        return ""
+    return anterior
+
+
+class IndiceBusca:
+    """Documentos por prontuário + listas invertidas trigrama → prontuários."""
+
+    def __init__(self):
+        self._pacientes: dict[str, _Paciente] = {}
+        self._invertido: dict[str, set[str]] = {}
+        self._lock = threading.RLock()
+        self.fonte = ""                      # de onde vieram as linhas (mantido pelo alimentador)
+        self.cursores: dict[str, int] = {}   # posição já indexada por origem (idem)
+
+    def __len__(self) -> int:
+        return len(self._pacientes)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._pacientes.clear()
+            self._invertido.clear()
+            self.fonte = ""
+            self.cursores.clear()
+
+    def _reindexar(self, pac: _Paciente) -> None:
+        pac.palavras = set(normalizar(f"{pac.nome} {pac.leito} {pac.prontuario}").split())
+        novos = trigramas(pac.nome) | trigramas(pac.leito) | trigramas(pac.prontuario)
+        for g in pac.gramas - novos:
+            dono = self._invertido.get(g)
+            if dono is not None:
+                dono.discard(pac.prontuario)
+                if not dono:
+                    del self._invertido[g]
+        for g in novos - pac.gramas:
+            self._invertido.setdefault(g, set()).add(pac.prontuario)
+        pac.gramas = novos
+
+    def acrescentar(self, linhas) -> int:
+        """
+        Incorpora linhas (prontuario, nome, data_hora, dados_json). As linhas
+        de cada paciente são ordenadas por data_hora (abas e pendentes locais
+        podem chegar fora de ordem); as anteriores à evolução já indexada
+        são ignoradas. Retorna quantos pacientes foram atualizados.
+        """
+        por_paciente: dict[str, list] = {}
+        for pront, nome, data_hora, payload in linhas:
+            pront = normalizar_prontuario(pront)
+            if pront:
+                por_paciente.setdefault(pront, []).append(
+                    (_instante(data_hora), str(nome or "").strip(), str(data_hora), payload)
+                )
+
+        atualizados = 0
+        with self._lock:
+            for pront, datadas in por_paciente.items():
+                pac = self._pacientes.get(pront) or _Paciente(pront)
+                self._pacientes[pront] = pac
+                datadas = sorted((d for d in datadas if d[0] >= pac.instante), key=lambda d: d[0])
+                if not datadas:
+                    continue
+                novas = [d[1:] for d in datadas]
+                # Só o último keyframe importa; antes dele, só o nome
+                inicio = next((i for i in range(len(novas) - 1, -1, -1) if not delta.e_delta(novas[i][2])), None)
+                leito = pac.leito
+                if inicio is not None:
+                    lido = _leito_keyframe(novas[inicio][2])
+                    leito = leito if lido is None else lido
+                for _, _, payload in novas[(inicio + 1 if inicio is not None else 0):]:
+                    leito = _leito_delta(payload, leito)
+                pac.leito = leito
+                pac.nome = next((n for n, _, _ in reversed(novas) if n), pac.nome)
+                pac.data_hora = novas[-1][1]
+                pac.instante = datadas[-1][0]
+                self._reindexar(pac)
+                atualizados += 1
+        return atualizados
+
+    def buscar(self, consulta: str, limite: int = 10) -> list[dict]:
+        """
+        Pacientes mais parecidos com a consulta (nome, prontuário ou leito,
+        inteiros ou começados), do melhor para o pior. Empate: mais palavras
+        da consulta idênticas a palavras do paciente ("leito 7" prefere o
+        Leito 7 a um prontuário começado em 7), depois a evolução mais
+        recente. Prontuário idêntico vem sempre primeiro.
+        [{"prontuario", "nome", "leito", "data_hora", "pontuacao"}, ...]
+        """
+        q = trigramas(consulta, completo=False)
+        if not q:
+            return []
+        palavras = set(normalizar(consulta).split())
+        exato = normalizar_prontuario(consulta)
+        with self._lock:
+            contagem: Counter = Counter()
+            for g in q:
+                contagem.update(self._invertido.get(g, ()))
+            minimo = LIMIAR * len(q)
+            achados = heapq.nlargest(
+                limite,
+                (
+                    (2.0 if pront == exato else n / len(q), len(palavras & pac.palavras), pac.instante, pac)
+                    for pront, n in contagem.items()
+                    if n >= minimo or pront == exato
+                    for pac in (self._pacientes[pront],)
+                ),
+                key=lambda a: a[:3],
+            )
+        return [
+            {"prontuario": p.prontuario, "nome": p.nome, "leito": p.leito,
+             "data_hora": p.data_hora, "pontuacao": min(pontuacao, 1.0)}
+            for pontuacao, _, _, p in achados
+        ]
+
+
+def _instante(data_hora: str) -> datetime:
+    try:
+        return datetime.strptime(str(data_hora).strip(), FORMATO_DATA_HORA)
+    except ValueError:
+        return datetime.min
@@ -0,0 +1,129 @@
+"""
+Cache incremental de abas inteiras (leitura por cauda).
+
+Antes, cada expiração do TTL de load_data (ou cada invalidação) relia a
+aba inteira com get_all_records. Aqui cada aba guarda as linhas já vistas; a
+atualização é um único batch_get com o cabeçalho + a partir da última linha
+conhecida:
+- cabeçalho diferente → leitura completa;
+- a última linha conhecida mudou/sumiu (linhas apagadas, aba regravada) →
+  leitura completa;
+- caso contrário, só as linhas novas trafegam.
+O custo de leitura passa a acompanhar o volume de dados novos, não o total.
+Uma leitura completa de segurança a cada _REVALIDACAO_COMPLETA_SEG cobre
+edições manuais no meio da aba.
+"""
+import threading
+import time
+
+from gspread.utils import numericise_all, rowcol_to_a1
+
+from modules.persistencia import conexao
+
+_REVALIDACAO_COMPLETA_SEG = 60 * 60
+
+
+class _CacheAba:
+    def __init__(self):
+        self.cabecalho: list[str] = []
+        self.linhas: list[list[str]] = []
+        self.carregado = False
+        self.completo_em = 0.0
+        self.lock = threading.RLock()
+
+    def resetar(self) -> None:
+        self.cabecalho = []
+        self.linhas = []
+        self.carregado = False
+        self.completo_em = 0.0
+
+
+_LOCK = threading.Lock()
+_CACHES: dict[tuple[str, str], _CacheAba] = {}
+
+
+def _obter(url: str, aba: str) -> _CacheAba:
+    with _LOCK:
+        cache = _CACHES.get((url, aba))
+        if cache is None:
+            cache = _CacheAba()
+            _CACHES[(url, aba)] = cache
+        return cache
+
+
+def _aparar(linha: list) -> list[str]:
+    """Remove células vazias do fim (a API omite, get_all_values preenche)."""
+    linha = [str(v) for v in linha]
+    while linha and linha[-1] == "":
+        linha.pop()
+    return linha
+
+
+def _ler_completo(ws, cache: _CacheAba) -> None:
+    valores = ws.get_all_values()
+    cache.cabecalho = _aparar(valores[0]) if valores else []
+    cache.linhas = [list(l) for l in valores[1:]]
+    cache.carregado = True
+    cache.completo_em = time.time()
+
+
+def _ler_incremental(ws, cache: _CacheAba) -> bool:
+    """Acrescenta as linhas novas. False se for preciso reler a aba inteira."""
+    largura = len(cache.cabecalho)
+    ultima = len(cache.linhas) + 1            # última linha conhecida (1 = cabeçalho)
+    inicio = ultima if ultima > 1 else 2
+    coluna = rowcol_to_a1(1, max(largura, 1)).rstrip("0123456789")
+    cabecalho, cauda = ws.batch_get(["1:1", f"A{inicio}:{coluna}"])
+    if _aparar(cabecalho[0] if cabecalho else []) != cache.cabecalho:
+        return False
+    cauda = [list(l) for l in cauda]
+    if ultima > 1:
+        # A primeira linha relida é a última já conhecida: se mudou, a aba encolheu
+        if not cauda or _aparar(cauda[0]) != _aparar(cache.linhas[-1][:largura]):
+            return False
+        cauda = cauda[1:]
+    cache.linhas.extend(cauda)
+    return True
+
+
+def _atualizar(ws, cache: _CacheAba) -> tuple[list[str], list[list[str]]]:
+    with cache.lock:
+        if not cache.carregado or time.time() - cache.completo_em > _REVALIDACAO_COMPLETA_SEG:
+            _ler_completo(ws, cache)
+        elif not _ler_incremental(ws, cache):
+            _ler_completo(ws, cache)
+        return list(cache.cabecalho), list(cache.linhas)
+
+
+def ler_valores(url: str, aba: str) -> tuple[list[str], list[list[str]]] | None:
+    """
+    (cabeçalho, linhas de dados) da aba, como strings, atualizados por leitura
+    de cauda. None sem service account.
+    """
+    cache = _obter(url, aba)
+    return conexao.executar(url, aba, lambda ws: _atualizar(ws, cache))
+
+
+def ler_registros(url: str, aba: str) -> list[dict] | None:
+    """
+    Equivalente a ws.get_all_records() (números convertidos, células vazias
+    como ""), servido pelo cache incremental. None sem service account.
+    """
+    valores = ler_valores(url, aba)
+    if valores is None:
+        return None
+    cabecalho, linhas = valores
+    largura = len(cabecalho)
+    return [
+        dict(zip(cabecalho, numericise_all((l + [""] * largura)[:largura], default_blank="")))
+        for l in linhas
+    ]
+
+
+def invalidar(url: str | None = None, aba: str | None = None) -> None:
+    """Descarta o cache da aba (ou todos). Use após regravar a aba inteira."""
+    with _LOCK:
+        for chave, cache in _CACHES.items():
+            if (url is None or chave[0] == url) and (aba is None or chave[1] == aba):
+                with cache.lock:
+                    cache.resetar()
@@ -0,0 +1,114 @@
+"""
+Censo da unidade: a última evolução de todos os pacientes numa passada só.
+
+O chamador entrega todas as linhas de evolução em ordem cronológica (espelho
+local ou uma leitura de cada aba). Elas são agrupadas por prontuário e, de
+cada paciente, só se guarda a cadeia necessária para a versão mais recente:
+do último keyframe até a última linha (no máximo delta.KEYFRAME_CADA linhas).
+As cadeias são decodificadas em paralelo num pool de processos — a
+descompressão é CPU pura e, em censos grandes (todos os pacientes do
+histórico), o GIL vira o gargalo. Censos pequenos decodificam aqui mesmo.
+Versões já presentes no LRU de historico.py não são decodificadas de novo.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.persistencia import codec, delta, historico
+from modules.persistencia.historico import LinhaEvolucao
+from modules.persistencia.indice import normalizar_prontuario
+
+# Abaixo disso, despachar para o pool custa mais que decodificar aqui mesmo
+# (~1 ms por paciente inline; ida e volta de pickle + spawn na 1ª chamada)
+MIN_PARALELO = 64
+MAX_PROCESSOS = 4
+
+_LOCK = threading.Lock()
+_POOL: ProcessPoolExecutor | None = None
+
+
+def agrupar(linhas) -> dict[str, list[LinhaEvolucao]]:
+    """
+    linhas: iterável de (prontuario, nome, data_hora, dados_json) em ordem
+    cronológica. Retorna prontuário → cadeia do último keyframe até a linha
+    mais recente (uma cadeia que começa em delta tem a base fora das linhas
+    recebidas e não é decodificável aqui).
+    """
+    cadeias: dict[str, list[LinhaEvolucao]] = {}
+    for pront, nome, data_hora, payload in linhas:
+        pront = normalizar_prontuario(pront)
+        if not pront:
+            continue
+        linha = LinhaEvolucao(pront, str(nome), str(data_hora), payload)
+        if delta.e_delta(payload) and pront in cadeias:
+            cadeias[pront].append(linha)
+        else:
+            cadeias[pront] = [linha]
+    return cadeias
+
+
+def _ultima_versao(payloads: list[str]) -> dict | None:
+    """Executado nos processos do pool: versão mais recente da cadeia, ou None."""
+    try:
+        return delta.reconstruir_versao(payloads, -1, codec.descomprimir_celula)
+    except Exception:
+        return None
+
+
+def _processos() -> int:
+    return max(1, min(MAX_PROCESSOS, os.cpu_count() or 1))
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _POOL
+    with _LOCK:
+        if _POOL is None:
+            # spawn: o processo do Streamlit tem threads (reconciliador, revalidação
+            # de referências) e um fork herdaria locks no meio do caminho
+            _POOL = ProcessPoolExecutor(
+                max_workers=_processos(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _POOL
+
+
+def _descartar_pool() -> None:
+    global _POOL
+    with _LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def decodificar(cadeias: dict[str, list[LinhaEvolucao]]) -> dict[str, dict | None]:
+    """
+    Última versão de cada cadeia (prontuário → dict; None se irrecuperável
+    com as linhas da cadeia). Consulta o LRU antes e guarda lá o resultado.
+    """
+    resultado: dict[str, dict | None] = {}
+    faltam: list[str] = []
+    for pront, cadeia in cadeias.items():
+        dados = historico.obter(cadeia[-1])
+        if dados is None:
+            faltam.append(pront)
+        else:
+            resultado[pront] = dados
+
+    payloads = [[l.payload for l in cadeias[p]] for p in faltam]
+    versoes = None
+    if len(faltam) >= MIN_PARALELO and _processos() > 1:
+        try:
+            chunk = max(1, len(payloads) // (_processos() * 4))
+            versoes = list(_pool().map(_ultima_versao, payloads, chunksize=chunk))
+        except Exception:
+            _descartar_pool()  # pool quebrado (processo morto, ambiente sem fork/spawn)
+            versoes = None
+    if versoes is None:
+        versoes = [_ultima_versao(p) for p in payloads]
+
+    for pront, dados in zip(faltam, versoes):
+        if dados is not None:
+            historico.guardar(cadeias[pront][-1], dados)
+        resultado[pront] = dados
+    return resultado
@@ -0,0 +1,129 @@
+"""
+Codecs versionados da célula dados_json (EVOLUCOES).
+
+    GZ1:<base64>                       gzip nível 9 (formato original)
+    GZ2:<dic>:<alfabeto>:<dados>       deflate cru com dicionário pré-definido
+    {...}                              JSON puro (legado)
+
+Os payloads são JSONs pequenos cujas chaves se repetem muito entre pacientes
+(lab_1_hb, sis_renal_cr_hoje, ...). O gzip comum começa cada célula "do zero";
+o GZ2 usa um dicionário zlib montado a partir do registro de campos
+(fichas._campos_base()), de modo que as chaves já são conhecidas pelo
+compressor antes do primeiro byte.
+
+O dicionário fica congelado em arquivo (dicionarios/gz2_v<N>.txt): mudar o
+registro de campos NÃO pode alterar o dicionário de células já gravadas. Quando
+o registro mudar bastante, gere uma nova versão com
+scripts/gerar_dicionario_gz2.py e atualize DICIONARIO_ATUAL — as versões
+antigas continuam sendo lidas.
+"""
+import base64
+import gzip
+import json
+import threading
+import zlib
+from pathlib import Path
+
+GZ1_PREFIX = "GZ1:"
+GZ2_PREFIX = "GZ2:"
+
+DICIONARIO_ATUAL = "1"
+# Nível 6: praticamente o mesmo tamanho do 9 e ~2x mais rápido (scripts/benchmark_codec.py)
+NIVEL_PADRAO = 6
+ALFABETO_PADRAO = "b64"
+
+# Limite do zlib para dicionário pré-definido (janela de 32 KB)
+_TAMANHO_MAX_DICIONARIO = 32 * 1024
+
+_DIR_DICIONARIOS = Path(__file__).with_name("dicionarios")
+
+_ALFABETOS = {
+    "b64": (base64.b64encode, base64.b64decode),
+    "b85": (base64.b85encode, base64.b85decode),   # ~6% menor que base64, decodifica mais devagar
+}
+
+_LOCK = threading.Lock()
+_DICIONARIOS: dict[str, bytes] = {}
+
+
+def _json(dados: dict) -> bytes:
+    return json.dumps(dados, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def construir_dicionario(campos: dict) -> bytes:
+    """
+    Monta o dicionário a partir do registro de campos {chave: padrão}.
+    Cada campo vira o fragmento JSON ', "chave": ' (seguido de aspas se o
+    padrão é texto) — exatamente como aparece num payload esparso. O zlib
+    alcança melhor o fim do dicionário, então a ordem é invertida para que
+    identificação/HD, presentes em quase toda evolução, fiquem no final.
+    Trunca pelo início para caber em 32 KB.
+    """
+    fragmentos = [
+        f', "{k}": ' + ('"' if isinstance(v, str) else "")
+        for k, v in reversed(list(campos.items()))
+    ]
+    texto = "".join(fragmentos).encode("utf-8")
+    return texto[-_TAMANHO_MAX_DICIONARIO:]
+
+
+def carregar_dicionario(versao: str) -> bytes:
+    """Dicionário congelado da versão (lido do disco uma vez por processo)."""
+    with _LOCK:
+        dic = _DICIONARIOS.get(versao)
+        if dic is None:
+            caminho = _DIR_DICIONARIOS / f"gz2_v{versao}.txt"
+            try:
+                dic = caminho.read_bytes()
+            except FileNotFoundError:
+                raise ValueError(f"Dicionário GZ2 desconhecido: v{versao}") from None
+            _DICIONARIOS[versao] = dic
+        return dic
+
+
+def comprimir_gz1(dados: dict) -> str:
+    """Formato GZ1 (gzip nível 9 + base64). Mantido para comparação e compatibilidade."""
+    compressed = gzip.compress(_json(dados), compresslevel=9)
+    return GZ1_PREFIX + base64.b64encode(compressed).decode("ascii")
+
+
+def comprimir(dados: dict, nivel: int = NIVEL_PADRAO, alfabeto: str = ALFABETO_PADRAO,
+              dicionario: str = DICIONARIO_ATUAL) -> str:
+    """
+    Formato GZ2: deflate cru (sem cabeçalho/CRC do gzip) com dicionário
+    pré-definido. nivel 1-9 (velocidade × tamanho); alfabeto "b64" ou "b85".
+    """
+    if alfabeto not in _ALFABETOS:
+        raise ValueError(f"Alfabeto inválido: {alfabeto}")
+    comp = zlib.compressobj(nivel, zlib.DEFLATED, -15, 9, zdict=carregar_dicionario(dicionario))
+    compressed = comp.compress(_json(dados)) + comp.flush()
+    codificar = _ALFABETOS[alfabeto][0]
+    return f"{GZ2_PREFIX}{dicionario}:{alfabeto}:{codificar(compressed).decode('ascii')}"
+
+
+def _descomprimir_gz2(texto: str) -> dict:
+    try:
+        dicionario, alfabeto, dados = texto[len(GZ2_PREFIX):].split(":", 2)
+        decodificar = _ALFABETOS[alfabeto][1]
+    except (ValueError, KeyError):
+        raise ValueError("Cabeçalho GZ2 inválido") from None
+    decomp = zlib.decompressobj(-15, zdict=carregar_dicionario(dicionario))
+    json_bytes = decomp.decompress(decodificar(dados.encode("ascii"))) + decomp.flush()
+    return json.loads(json_bytes.decode("utf-8"))
+
+
+def descomprimir(texto: str) -> dict:
+    """Decodifica qualquer versão: GZ2, GZ1 ou JSON puro (legado)."""
+    if texto.startswith(GZ2_PREFIX):
+        return _descomprimir_gz2(texto)
+    if texto.startswith(GZ1_PREFIX):
+        compressed = base64.b64decode(texto[len(GZ1_PREFIX):].encode("ascii"))
+        return json.loads(gzip.decompress(compressed).decode("utf-8"))
+    return json.loads(texto)
+
+
+def descomprimir_celula(texto) -> dict:
+    """Como descomprimir, para células da planilha: vazia ou não-texto → {}."""
+    if not texto or not isinstance(texto, str):
+        return {}
+    return descomprimir(texto)
@@ -0,0 +1,177 @@
+"""
+Pool de conexão gspread compartilhado por todo o processo.
+
+Antes, cada leitura/escrita refazia service_account_from_dict → open_by_url →
+worksheet(): troca de token OAuth + 2 chamadas de metadados antes de qualquer
+dado trafegar. Aqui o client, as planilhas e as abas ficam em cache de módulo
+(mesmo padrão dos caches de fichas.py), reaproveitados entre sessões do
+Streamlit e protegidos por lock.
+"""
+import threading
+import time
+
+from gspread import service_account_from_dict
+
+# Renova o client antes do token OAuth (validade de 60 min) expirar
+_IDADE_MAX_CLIENTE_SEG = 45 * 60
+
+_LOCK = threading.RLock()
+_CLIENTE = None
+_CLIENTE_CRIADO_EM = 0.0
+_PLANILHAS: dict[str, object] = {}             # url → Spreadsheet
+_ABAS: dict[tuple[str, str], object] = {}      # (url, aba) → Worksheet
+
+# Backend injetado (ex.: planilha_fake para testes/benchmarks offline)
+_CLIENTE_INJETADO = None
+_CONEXAO_ST_INJETADA = None
+
+
+def _credenciais() -> dict | None:
+    """Lê a service account de st.secrets. None se não configurada."""
+    try:
+        import streamlit as st
+        gs = st.secrets.get("connections", {}).get("gsheets", {})
+    except Exception:
+        return None
+    if not gs or gs.get("type") != "service_account":
+        return None
+    return {k: v for k, v in gs.items() if k not in ("spreadsheet", "worksheet")}
+
+
+def tem_service_account() -> bool:
+    """True se há service account configurada (escrita via gspread possível)."""
+    return _CLIENTE_INJETADO is not None or _credenciais() is not None
+
+
+def _renovar_token(gc) -> None:
+    """Renova o access token se expirado (gspread 5: gc.auth; gspread 6: gc.http_client.auth)."""
+    creds = getattr(getattr(gc, "http_client", gc), "auth", None)
+    if creds is None or getattr(creds, "valid", True):
+        return
+    from google.auth.transport.requests import Request
+    creds.refresh(Request())
+
+
+def obter_cliente():
+    """Retorna o client gspread do processo (criado sob demanda). None sem service account."""
+    global _CLIENTE, _CLIENTE_CRIADO_EM
+    with _LOCK:
+        if _CLIENTE_INJETADO is not None:
+            return _CLIENTE_INJETADO
+        if _CLIENTE is not None and time.time() - _CLIENTE_CRIADO_EM > _IDADE_MAX_CLIENTE_SEG:
+            _descartar_tudo()
+        if _CLIENTE is None:
+            creds = _credenciais()
+            if creds is None:
+                return None
+            _CLIENTE = service_account_from_dict(creds)
+            _CLIENTE_CRIADO_EM = time.time()
+        _renovar_token(_CLIENTE)
+        return _CLIENTE
+
+
+def obter_planilha(url: str):
+    """Retorna o Spreadsheet (open_by_url só na primeira vez). None sem service account."""
+    with _LOCK:
+        gc = obter_cliente()
+        if gc is None:
+            return None
+        sh = _PLANILHAS.get(url)
+        if sh is None:
+            sh = gc.open_by_url(url)
+            _PLANILHAS[url] = sh
+        return sh
+
+
+def obter_aba(url: str, nome: str):
+    """Retorna o Worksheet em cache (worksheet() só na primeira vez). None sem service account."""
+    with _LOCK:
+        ws = _ABAS.get((url, nome))
+        if ws is not None and _CLIENTE_INJETADO is not None:
+            return ws
+        if ws is not None and _CLIENTE is not None:
+            _renovar_token(_CLIENTE)
+            return ws
+        sh = obter_planilha(url)
+        if sh is None:
+            return None
+        ws = sh.worksheet(nome)
+        _ABAS[(url, nome)] = ws
+        return ws
+
+
+def conexao_streamlit():
+    """st.connection("gsheets") do app, ou a conexão injetada (backend local)."""
+    if _CONEXAO_ST_INJETADA is not None:
+        return _CONEXAO_ST_INJETADA
+    import streamlit as st
+    from streamlit_gsheets import GSheetsConnection
+    return st.connection("gsheets", type=GSheetsConnection)
+
+
+def injetar(cliente=None, conexao_st=None) -> None:
+    """
+    Substitui o client gspread e a conexão st.connection por um backend local
+    (ver planilha_fake). injetar() sem argumentos volta ao Google Sheets real.
+    """
+    global _CLIENTE_INJETADO, _CONEXAO_ST_INJETADA
+    with _LOCK:
+        _descartar_tudo()
+        _CLIENTE_INJETADO = cliente
+        _CONEXAO_ST_INJETADA = conexao_st
+
+
+def _status_http(exc: Exception) -> int | None:
+    """Status HTTP de um gspread.exceptions.APIError (None para outros erros)."""
+    return getattr(getattr(exc, "response", None), "status_code", None)
+
+
+def executar(url: str, nome: str, operacao):
+    """
+    Executa operacao(ws) sobre a aba em cache.
+    Se o handle estiver obsoleto (401 token revogado, 404/aba renomeada),
+    invalida e tenta uma segunda vez com handles novos. Outros erros (ex: 429)
+    sobem para o chamador. Retorna None sem service account.
+    """
+    ws = obter_aba(url, nome)
+    if ws is None:
+        return None
+    try:
+        return operacao(ws)
+    except Exception as e:
+        status = _status_http(e)
+        if status not in (401, 404) and type(e).__name__ != "WorksheetNotFound":
+            raise
+        invalidar(url, nome, cliente=(status == 401))
+        ws = obter_aba(url, nome)
+        if ws is None:
+            return None
+        return operacao(ws)
+
+
+def _descartar_tudo() -> None:
+    global _CLIENTE, _CLIENTE_CRIADO_EM
+    _CLIENTE = None
+    _CLIENTE_CRIADO_EM = 0.0
+    _PLANILHAS.clear()
+    _ABAS.clear()
+
+
+def invalidar(url: str | None = None, nome: str | None = None, cliente: bool = False) -> None:
+    """
+    Invalidação explícita do pool.
+    - invalidar()                    → descarta tudo (client, planilhas, abas)
+    - invalidar(url)                 → descarta a planilha e suas abas
+    - invalidar(url, nome)           → descarta só o handle da aba
+    - cliente=True                   → também recria o client (novo token)
+    """
+    with _LOCK:
+        if cliente or url is None:
+            _descartar_tudo()
+            return
+        if nome is None:
+            _PLANILHAS.pop(url, None)
+            for chave in [k for k in _ABAS if k[0] == url]:
+                _ABAS.pop(chave, None)
+        else:
+            _ABAS.pop((url, nome), None)
@@ -0,0 +1,171 @@
+"""
+Histórico de evoluções codificado em deltas com keyframes periódicos.
+
+De um dia para o outro só uma fração pequena dos ~1000 campos muda. Em vez de
+regravar o dict inteiro a cada save, grava-se apenas o delta campo a campo
+contra a evolução anterior do mesmo paciente, e um keyframe (dict completo,
+formato normal de _comprimir_dados) a cada KEYFRAME_CADA saves.
+
+Formato da célula dados_json de um delta:
+    DL2:<dic>:<alfabeto>:<dados>   corpo no codec GZ2 (codec.py: deflate com o
+                                   dicionário de campos — as chaves de "s" e
+                                   "d" são as mesmas dos keyframes)
+    DL1:<base64(gzip(json))>       legado, só leitura
+com o JSON {"b": assinatura da versão base,
+            "k": nº de deltas desde o keyframe,
+            "s": {campo: valor novo/alterado},
+            "d": [campos removidos]}
+
+A base é identificada pela assinatura (hash do conteúdo), não pela posição:
+se dois processos intercalarem saves do mesmo paciente, a reconstrução ainda
+encontra a versão correta.
+"""
+import base64
+import gzip
+import hashlib
+import json
+
+from modules.persistencia import codec
+
+DL_PREFIX = "DL2:"
+DL1_PREFIX = "DL1:"
+
+# Um keyframe completo a cada N saves do mesmo paciente
+KEYFRAME_CADA = 10
+
+
+def _canonico(dados: dict) -> str:
+    return json.dumps(dados, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def assinatura(dados: dict) -> str:
+    """Hash curto e estável do conteúdo de uma versão."""
+    return hashlib.sha1(_canonico(dados).encode("utf-8")).hexdigest()[:16]
+
+
+def normalizar(dados: dict) -> dict:
+    """Ida e volta por JSON: o dict fica igual ao que será lido da planilha."""
+    return json.loads(json.dumps(dados, ensure_ascii=False, default=str))
+
+
+def e_delta(texto) -> bool:
+    return isinstance(texto, str) and texto.startswith((DL_PREFIX, DL1_PREFIX))
+
+
+def calcular_delta(anterior: dict, atual: dict) -> dict:
+    """Campos alterados/novos ("s") e removidos ("d") de anterior → atual."""
+    alterados = {k: v for k, v in atual.items() if k not in anterior or anterior[k] != v}
+    removidos = [k for k in anterior if k not in atual]
+    return {"s": alterados, "d": removidos}
+
+
+def aplicar_delta(base: dict, delta: dict) -> dict:
+    """Nova versão = base + delta (a base não é alterada)."""
+    versao = dict(base)
+    for k in delta.get("d", []):
+        versao.pop(k, None)
+    versao.update(delta.get("s", {}))
+    return versao
+
+
+def _codificar_delta(delta: dict) -> str:
+    return DL_PREFIX + codec.comprimir(delta)[len(codec.GZ2_PREFIX):]
+
+
+def _decodificar_delta(texto: str) -> dict:
+    if texto.startswith(DL1_PREFIX):
+        compressed = base64.b64decode(texto[len(DL1_PREFIX):].encode("ascii"))
+        return json.loads(gzip.decompress(compressed).decode("utf-8"))
+    return codec.descomprimir(codec.GZ2_PREFIX + texto[len(DL_PREFIX):])
+
+
+def ler(texto: str) -> dict:
+    """Conteúdo de uma célula delta: {"b": assinatura da base, "s": alterados, "d": removidos}."""
+    return _decodificar_delta(texto)
+
+
+def _reconstruir_desde(payloads: list[str], inicio: int, ate: int, descomprimir) -> list[dict | None] | None:
+    """Reconstrói payloads[inicio..ate]. None se algum delta referenciar base anterior a `inicio`."""
+    versoes: list[dict | None] = [None] * len(payloads)
+    por_assinatura: dict[str, dict] = {}
+    for i in range(inicio, ate + 1):
+        texto = payloads[i]
+        if e_delta(texto):
+            delta = _decodificar_delta(texto)
+            base = por_assinatura.get(delta.get("b"))
+            if base is None:
+                if inicio > 0:
+                    return None
+                continue  # base perdida (linha apagada da planilha): versão irrecuperável
+            versao = aplicar_delta(base, delta)
+        else:
+            versao = descomprimir(texto)
+        versoes[i] = versao
+        por_assinatura[assinatura(versao)] = versao
+    return versoes
+
+
+def reconstruir(payloads: list[str], descomprimir, ate: int | None = None) -> list[dict | None]:
+    """
+    Reconstrói as versões de um paciente a partir das células dados_json em
+    ordem cronológica. Só decodifica a partir do último keyframe ≤ `ate`
+    (cai para o início do histórico se algum delta apontar para trás dele).
+    Posições não reconstruídas ficam None.
+    """
+    if not payloads:
+        return []
+    n = len(payloads)
+    ate = n - 1 if ate is None else ate % n
+    inicio = next((i for i in range(ate, -1, -1) if not e_delta(payloads[i])), 0)
+    versoes = _reconstruir_desde(payloads, inicio, ate, descomprimir)
+    if versoes is None:
+        versoes = _reconstruir_desde(payloads, 0, ate, descomprimir)
+    return versoes
+
+
+def reconstruir_historico(payloads: list[str], descomprimir) -> list[dict | None]:
+    """Reconstrói todas as versões, do início do histórico. Irrecuperáveis ficam None."""
+    if not payloads:
+        return []
+    return _reconstruir_desde(payloads, 0, len(payloads) - 1, descomprimir)
+
+
+def reconstruir_versao(payloads: list[str], indice: int, descomprimir) -> dict | None:
+    """Reconstrói uma única versão (índice Python: -1 = mais recente)."""
+    if not payloads:
+        return None
+    return reconstruir(payloads, descomprimir, ate=indice)[indice % len(payloads)]
+
+
+def codificar(dados: dict, payloads_anteriores: list[str] | None, comprimir, descomprimir,
+              keyframe_cada: int = KEYFRAME_CADA) -> str:
+    """
+    Codifica uma nova versão para a célula dados_json.
+    Grava keyframe (comprimir(dados)) quando não há histórico conhecido, quando
+    a cadência de keyframes vence ou quando o delta não fica menor.
+    """
+    atual = normalizar(dados)
+    completo = comprimir(atual)
+    if not payloads_anteriores:
+        return completo
+
+    desde_keyframe = 0
+    for texto in reversed(payloads_anteriores):
+        if not e_delta(texto):
+            break
+        desde_keyframe += 1
+    if desde_keyframe + 1 >= keyframe_cada:
+        return completo
+
+    try:
+        anterior = reconstruir_versao(payloads_anteriores, -1, descomprimir)
+    except Exception:
+        anterior = None
+    if anterior is None:
+        return completo
+
+    delta = calcular_delta(anterior, atual)
+    delta["b"] = assinatura(anterior)
+    delta["k"] = desde_keyframe + 1
+    texto = _codificar_delta(delta)
+    return texto if len(texto) < len(completo) else completo
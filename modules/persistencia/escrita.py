@@ -0,0 +1,131 @@
+"""
+Escrita append-only em abas do Google Sheets.
+
+Substitui o antigo ler-a-aba-inteira → concatenar → regravar (conn.update):
+as linhas novas vão direto por append_rows, sem tocar nos dados existentes
+e sem corrida com outros escritores. A contagem de colunas é validada contra
+o cabeçalho em cache do processo (row_values(1) só na primeira vez ou quando
+a validação falha — o cabeçalho pode ter mudado).
+
+Abas de cabeçalho fixo (evoluções) usam acrescentar_com_cabecalho: com o
+cabeçalho em cache correto, o save é um único append_rows; se o cabeçalho
+estiver ausente ou diferente, a correção e o append vão juntos numa única
+requisição batchUpdate.
+"""
+import threading
+
+from modules.persistencia import conexao
+
+_LOCK = threading.Lock()
+_CABECALHOS: dict[tuple[str, str], list[str]] = {}
+
+
+class ColunasIncompativeis(ValueError):
+    """Linha com número de colunas diferente do cabeçalho da aba."""
+
+
+def _ler_cabecalho(ws) -> list[str]:
+    cab = list(ws.row_values(1))
+    while cab and cab[-1] == "":
+        cab.pop()
+    return cab
+
+
+def cabecalho(url: str, aba: str, forcar: bool = False) -> list[str] | None:
+    """Cabeçalho da aba (em cache). None sem service account."""
+    with _LOCK:
+        cab = _CABECALHOS.get((url, aba))
+    if cab is not None and not forcar:
+        return list(cab)
+    cab = conexao.executar(url, aba, _ler_cabecalho)
+    if cab is not None:
+        with _LOCK:
+            _CABECALHOS[(url, aba)] = cab
+    return cab
+
+
+def lembrar_cabecalho(url: str, aba: str, cab: list[str]) -> None:
+    """Registra um cabeçalho recém-gravado (ex.: aba criada agora), sem reler a planilha."""
+    with _LOCK:
+        _CABECALHOS[(url, aba)] = list(cab)
+
+
+def acrescentar_linhas(url: str, aba: str, linhas: list[list]) -> dict | None:
+    """
+    Acrescenta as linhas ao fim da aba com um único append_rows.
+    Levanta ColunasIncompativeis se alguma linha não tiver o número de colunas
+    do cabeçalho (conferido de novo na planilha antes de recusar).
+    Retorna a resposta do append (updates.updatedRange) ou None sem service account.
+    """
+    if not linhas:
+        return {}
+    larguras = {len(l) for l in linhas}
+    cab = cabecalho(url, aba)
+    if cab is None:
+        return None
+    if larguras != {len(cab)}:
+        cab = cabecalho(url, aba, forcar=True)
+        if larguras != {len(cab)}:
+            raise ColunasIncompativeis(
+                f"A aba {aba} tem {len(cab)} colunas, mas a linha enviada tem "
+                f"{', '.join(str(n) for n in sorted(larguras))}."
+            )
+    valores = [["" if v is None else v for v in l] for l in linhas]
+    return conexao.executar(url, aba, lambda ws: ws.append_rows(valores, value_input_option="RAW"))
+
+
+def _celula(valor) -> dict:
+    if isinstance(valor, bool):
+        return {"userEnteredValue": {"boolValue": valor}}
+    if isinstance(valor, (int, float)):
+        return {"userEnteredValue": {"numberValue": valor}}
+    return {"userEnteredValue": {"stringValue": "" if valor is None else str(valor)}}
+
+
+def _linhas_celulas(linhas: list[list]) -> list[dict]:
+    return [{"values": [_celula(v) for v in l]} for l in linhas]
+
+
+def _corrigir_e_acrescentar(ws, cab: list[str], linhas: list[list]) -> dict:
+    """Cabeçalho (linha 1) + append numa só requisição spreadsheets.batchUpdate."""
+    ws.spreadsheet.batch_update({"requests": [
+        {"updateCells": {
+            "start": {"sheetId": ws.id, "rowIndex": 0, "columnIndex": 0},
+            "rows": _linhas_celulas([cab]),
+            "fields": "userEnteredValue",
+        }},
+        {"appendCells": {
+            "sheetId": ws.id,
+            "rows": _linhas_celulas(linhas),
+            "fields": "userEnteredValue",
+        }},
+    ]})
+    return {}  # appendCells não informa a faixa escrita
+
+
+def acrescentar_com_cabecalho(url: str, aba: str, cab: list[str], linhas: list[list]) -> dict | None:
+    """
+    Acrescenta as linhas numa aba cujo cabeçalho deve ser `cab`.
+    Cabeçalho em cache correto: um append_rows (resposta com
+    updates.updatedRange). Ausente ou diferente: corrige e acrescenta numa
+    única requisição; a resposta vem vazia (número das linhas desconhecido —
+    a próxima leitura de cauda as encontra). None sem service account.
+    """
+    if not linhas:
+        return {}
+    atual = cabecalho(url, aba)
+    if atual is None:
+        return None
+    if atual == list(cab):
+        valores = [["" if v is None else v for v in l] for l in linhas]
+        return conexao.executar(url, aba, lambda ws: ws.append_rows(valores, value_input_option="RAW"))
+    resp = conexao.executar(url, aba, lambda ws: _corrigir_e_acrescentar(ws, list(cab), linhas))
+    lembrar_cabecalho(url, aba, cab)
+    return resp
+
+
+def invalidar(url: str | None = None, aba: str | None = None) -> None:
+    """Descarta cabeçalhos em cache (todos, da planilha ou da aba)."""
+    with _LOCK:
+        for chave in [k for k in _CABECALHOS if (url is None or k[0] == url) and (aba is None or k[1] == aba)]:
+            _CABECALHOS.pop(chave, None)
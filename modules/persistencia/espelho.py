@@ -0,0 +1,463 @@
+"""
+Espelho local (SQLite em modo WAL) da aba EVOLUCOES.
+
+- save_evolucao grava aqui como pendente e retorna na hora (write-behind):
+  as linhas pendentes são o journal, durável a cada commit (synchronous=FULL),
+  então nada se perde se o processo cair antes do envio.
+- load_evolucao lê daqui (consulta indexada, sub-milissegundo).
+- Um reconciliador em background envia o journal em lotes, com retry e
+  backoff, e traz as linhas novas da planilha (leitura de cauda).
+- Garantia de entrega: cada linha do journal chega à planilha uma vez.
+  Depois de um envio com resultado incerto (exceção, timeout — o Google
+  pode ter aplicado o append mesmo assim — ou envio parcial), nada é
+  reenviado antes de uma leitura de cauda das abas recentes: as linhas que
+  já estão lá são reconhecidas por (prontuario, data_hora, dados_json) e
+  marcadas como sincronizadas; só as que faltam voltam a ser enviadas. Se a
+  leitura também falha, o reenvio espera o próximo ciclo. Limite: um append
+  aplicado pelo Google só depois dessa leitura ainda pode duplicar.
+- Cada linha é identificada por (particao, linha): a aba de origem
+  (EVOLUCOES ou uma partição mensal, ver particoes.py) e o número da linha.
+
+O módulo não conhece a planilha: o reconciliador recebe as funções de envio e
+de leitura de utils.py, o que evita import circular.
+"""
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from modules.persistencia.indice import normalizar_prontuario
+
+# Intervalo entre leituras de cauda da planilha
+_INTERVALO_RECONCILIACAO_SEG = 30
+# Máximo de linhas por requisição de envio (append_rows)
+_LOTE_MAX = 50
+# Teto do backoff exponencial entre tentativas de envio
+_BACKOFF_MAX_SEG = 300
+# Espera após um save acordar o envio: saves em rajada (vários leitos salvos
+# juntos) saem num único append_rows em vez de um por save
+_JANELA_COALESCENCIA_SEG = 0.25
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evolucoes (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    prontuario TEXT    NOT NULL,
+    nome       TEXT    NOT NULL DEFAULT '',
+    data_hora  TEXT    NOT NULL DEFAULT '',
+    dados_json TEXT    NOT NULL DEFAULT '',
+    linha      INTEGER,                       -- linha na planilha (NULL = desconhecida)
+    pendente   INTEGER NOT NULL DEFAULT 0,    -- 1 = ainda não confirmada no Sheets
+    particao   TEXT    NOT NULL DEFAULT 'EVOLUCOES'   -- aba onde está a linha
+);
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+_INDICES = """
+DROP INDEX IF EXISTS idx_evolucoes_linha;
+CREATE INDEX IF NOT EXISTS idx_evolucoes_prontuario ON evolucoes(prontuario, id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_evolucoes_particao_linha
+    ON evolucoes(particao, linha) WHERE linha IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_evolucoes_pendente ON evolucoes(pendente) WHERE pendente = 1;
+"""
+
+ABA_LEGADA = "EVOLUCOES"
+
+# Ordem cronológica: linhas já na planilha pela ordem das abas (EVOLUCOES <
+# EVOLUCOES_aaaa_mm, ordem alfabética = cronológica) e das linhas; pendentes por último
+_ORDEM = "ORDER BY (linha IS NULL), particao, linha, id"
+
+
+def diretorio_dados() -> Path:
+    """Diretório dos arquivos locais (INTENSIVA_DADOS_DIR ou .dados_locais/ na raiz do projeto)."""
+    base = os.getenv("INTENSIVA_DADOS_DIR")
+    if base:
+        return Path(base)
+    return Path(__file__).resolve().parent.parent.parent / ".dados_locais"
+
+
+_LOCAL = threading.local()
+_LOCK_ESCRITA = threading.RLock()  # _conexao() → _migrar() pode ocorrer dentro de _escrever()
+_CAMINHO: Path | None = None
+
+
+def _caminho() -> Path:
+    global _CAMINHO
+    if _CAMINHO is None:
+        pasta = diretorio_dados()
+        pasta.mkdir(parents=True, exist_ok=True)
+        _CAMINHO = pasta / "evolucoes.sqlite3"
+    return _CAMINHO
+
+
+def _conexao() -> sqlite3.Connection:
+    """Uma conexão por thread (WAL permite leitores concorrentes com um escritor)."""
+    conn = getattr(_LOCAL, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(_caminho(), timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")  # journal do write-behind: durável a cada commit
+        conn.executescript(_SCHEMA)
+        _migrar(conn)
+        _LOCAL.conn = conn
+    return conn
+
+
+def _migrar(conn: sqlite3.Connection) -> None:
+    """Espelhos criados antes das partições: acrescenta a coluna particao."""
+    with _LOCK_ESCRITA:
+        colunas = {r["name"] for r in conn.execute("PRAGMA table_info(evolucoes)")}
+        if "particao" not in colunas:
+            conn.execute(
+                "ALTER TABLE evolucoes ADD COLUMN particao TEXT NOT NULL DEFAULT 'EVOLUCOES'"
+            )
+    conn.executescript(_INDICES)
+
+
+def _escrever(sql: str, params: tuple = ()) -> sqlite3.Cursor:
+    with _LOCK_ESCRITA:
+        return _conexao().execute(sql, params)
+
+
+# ── Metadados ──────────────────────────────────────────────────────────────────
+
+def _meta(chave: str, padrao: str = "") -> str:
+    row = _conexao().execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+    return row["valor"] if row else padrao
+
+
+def _set_meta(chave: str, valor) -> None:
+    _escrever(
+        "INSERT INTO meta(chave, valor) VALUES(?, ?) "
+        "ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor",
+        (chave, str(valor)),
+    )
+
+
+def pronto() -> bool:
+    """True depois que a carga inicial da planilha terminou (espelho completo)."""
+    return _meta("carga_inicial") == "1"
+
+
+def _chave_ultima_linha(particao: str) -> str:
+    return "ultima_linha" if particao == ABA_LEGADA else f"ultima_linha:{particao}"
+
+
+def ultima_linha_sincronizada(particao: str = ABA_LEGADA) -> int:
+    return int(_meta(_chave_ultima_linha(particao), "1"))
+
+
+def particao_conhecida(particao: str) -> bool:
+    """True se a aba já foi lida ao menos uma vez pelo reconciliador."""
+    return _meta(_chave_ultima_linha(particao)) != ""
+
+
+# ── Escrita ───────────────────────────────────────────────────────────────────
+
+def inserir(prontuario: str, nome: str, data_hora: str, dados_json: str) -> int:
+    """Grava uma evolução local como pendente. Retorna o id local."""
+    cur = _escrever(
+        "INSERT INTO evolucoes(prontuario, nome, data_hora, dados_json, pendente) "
+        "VALUES(?, ?, ?, ?, 1)",
+        (prontuario, nome, data_hora, dados_json),
+    )
+    return cur.lastrowid
+
+
+def marcar_sincronizada(id_local: int, linha: int | None, particao: str = ABA_LEGADA) -> None:
+    """Confirma que a linha chegou ao Sheets (linha=None se o número não é conhecido)."""
+    with _LOCK_ESCRITA:
+        conn = _conexao()
+        if linha is not None and conn.execute(
+            "SELECT 1 FROM evolucoes WHERE particao = ? AND linha = ? AND id != ?",
+            (particao, linha, id_local),
+        ).fetchone():
+            linha = None  # já trazida pela reconciliação; evita violar o índice único
+        conn.execute(
+            "UPDATE evolucoes SET pendente = 0, linha = ?, particao = ? WHERE id = ?",
+            (linha, particao, id_local),
+        )
+
+
+def aplicar_linhas_planilha(inicio: int, linhas: list[list[str]], particao: str = ABA_LEGADA) -> int:
+    """
+    Incorpora linhas lidas da aba `particao` a partir da linha `inicio`.
+    Linhas já conhecidas (mesmo número, ou gravadas por este processo e ainda
+    sem número) não são duplicadas. Retorna quantas linhas novas entraram.
+    """
+    novas = 0
+    with _LOCK_ESCRITA:
+        conn = _conexao()
+        conn.execute("BEGIN")
+        try:
+            for i, linha in enumerate(linhas):
+                num = inicio + i
+                cel = (list(linha) + ["", "", "", ""])[:4]
+                pront, nome, data_hora, dados_json = (str(c) for c in cel)
+                pront = normalizar_prontuario(pront)
+                if not pront:
+                    continue
+                if conn.execute(
+                    "SELECT 1 FROM evolucoes WHERE particao = ? AND linha = ?", (particao, num)
+                ).fetchone():
+                    continue
+                local = conn.execute(
+                    "SELECT id FROM evolucoes WHERE linha IS NULL AND prontuario = ? "
+                    "AND data_hora = ? AND dados_json = ? ORDER BY id LIMIT 1",
+                    (pront, data_hora, dados_json),
+                ).fetchone()
+                if local:
+                    conn.execute(
+                        "UPDATE evolucoes SET linha = ?, particao = ?, pendente = 0 WHERE id = ?",
+                        (num, particao, local["id"]),
+                    )
+                    continue
+                conn.execute(
+                    "INSERT INTO evolucoes(prontuario, nome, data_hora, dados_json, linha, particao) "
+                    "VALUES(?, ?, ?, ?, ?, ?)",
+                    (pront, nome, data_hora, dados_json, num, particao),
+                )
+                novas += 1
+            chave = _chave_ultima_linha(particao)
+            ultima = max(int(_meta(chave, "1")), inicio + len(linhas) - 1)
+            conn.execute(
+                "INSERT INTO meta(chave, valor) VALUES(?, ?) "
+                "ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor",
+                (chave, str(ultima)),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return novas
+
+
+# ── Leitura ───────────────────────────────────────────────────────────────────
+
+def ultima(prontuario: str) -> sqlite3.Row | None:
+    """Evolução mais recente do prontuário (já normalizado)."""
+    return _conexao().execute(
+        "SELECT * FROM evolucoes WHERE prontuario = ? "
+        "ORDER BY (linha IS NULL) DESC, particao DESC, linha DESC, id DESC LIMIT 1",
+        (prontuario,),
+    ).fetchone()
+
+
+def listar(prontuario: str) -> list[sqlite3.Row]:
+    """Todas as evoluções do prontuário em ordem cronológica."""
+    return _conexao().execute(
+        f"SELECT * FROM evolucoes WHERE prontuario = ? {_ORDEM}", (prontuario,)
+    ).fetchall()
+
+
+def percorrer():
+    """Cursor sobre (prontuario, nome, data_hora, dados_json) de todas as evoluções, em ordem cronológica."""
+    return _conexao().execute(
+        f"SELECT prontuario, nome, data_hora, dados_json FROM evolucoes {_ORDEM}"
+    )
+
+
+def novas_desde(id_local: int) -> list[sqlite3.Row]:
+    """Evoluções com id > id_local (entraram no espelho depois), em ordem cronológica; trazem o id."""
+    return _conexao().execute(
+        f"SELECT id, prontuario, nome, data_hora, dados_json FROM evolucoes WHERE id > ? {_ORDEM}",
+        (id_local,),
+    ).fetchall()
+
+
+def por_particao():
+    """
+    Gera (particao, linhas) para cada aba, em ordem cronológica, com
+    linhas = [(linha, prontuario, nome, data_hora, dados_json)] — uma aba por
+    vez em memória (exportação).
+    """
+    conn = _conexao()
+    abas = [r[0] for r in conn.execute("SELECT DISTINCT particao FROM evolucoes ORDER BY particao")]
+    for aba in abas:
+        linhas = conn.execute(
+            "SELECT linha, prontuario, nome, data_hora, dados_json FROM evolucoes "
+            "WHERE particao = ? ORDER BY (linha IS NULL), linha, id",
+            (aba,),
+        ).fetchall()
+        yield aba, [tuple(r) for r in linhas]
+
+
+def existe(prontuario: str) -> bool:
+    return _conexao().execute(
+        "SELECT 1 FROM evolucoes WHERE prontuario = ? LIMIT 1", (prontuario,)
+    ).fetchone() is not None
+
+
+def pendentes(limite: int = 100) -> list[sqlite3.Row]:
+    """Linhas gravadas localmente e ainda não confirmadas no Sheets (mais antigas primeiro)."""
+    return _conexao().execute(
+        "SELECT * FROM evolucoes WHERE pendente = 1 ORDER BY id LIMIT ?", (limite,)
+    ).fetchall()
+
+
+def contar_pendentes() -> int:
+    return _conexao().execute("SELECT COUNT(*) FROM evolucoes WHERE pendente = 1").fetchone()[0]
+
+
+# ── Reconciliador (write-behind) ──────────────────────────────────────────────
+
+class Reconciliador:
+    """
+    Thread daemon que sincroniza o espelho com a planilha.
+
+    As linhas pendentes formam o journal do write-behind: são enviadas em lotes
+    (uma requisição por lote; saves que chegam juntos são agrupados por uma
+    breve janela de coalescência), com backoff exponencial em caso de falha. As
+    linhas novas da planilha são trazidas a cada `intervalo` segundos.
+
+    enviar_lote(linhas) -> list[tuple[str, int | None] | None]
+        linhas = [(prontuario, nome, data_hora, dados_json), ...]; acrescenta
+        no Sheets e devolve (aba, número da linha) de cada linha criada
+        (número None se desconhecido), ou None para as linhas que não
+        chegaram (falha parcial: só elas continuam pendentes); levanta
+        exceção se nada foi enviado.
+    ler_cauda(particao, inicio) -> list[list[str]] | None
+        linhas da aba a partir de `inicio` (None se indisponível).
+    listar_particoes() -> list[str] | None
+        opcional; abas de evolução em ordem cronológica (padrão: só
+        EVOLUCOES). A cada ciclo são lidas as duas mais recentes e as que o
+        espelho ainda não conhece; partições antigas não recebem linhas.
+    apos_envio() -> None
+        opcional; chamado após cada lote confirmado (ex.: invalidar caches).
+    """
+
+    def __init__(self, enviar_lote, ler_cauda, apos_envio=None, listar_particoes=None,
+                 intervalo: float = _INTERVALO_RECONCILIACAO_SEG):
+        self._enviar_lote = enviar_lote
+        self._ler_cauda = ler_cauda
+        self._listar_particoes = listar_particoes or (lambda: [ABA_LEGADA])
+        self._apos_envio = apos_envio
+        self._intervalo = intervalo
+        self._acordar = threading.Event()
+        self._lock_ciclo = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._backoff = 0.0
+        # Último envio falhou sem saber se o Google aplicou: confere antes de reenviar
+        self._envio_incerto = False
+        self.ultimo_erro: str = ""
+        self.ultimo_envio: float = 0.0
+        self.ultima_leitura: float = 0.0
+        self.ultima_leitura_ok: float = 0.0   # última vez que a planilha respondeu a uma leitura
+
+    def iniciar(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._loop, name="espelho-evolucoes", daemon=True)
+        self._thread.start()
+
+    def acordar(self) -> None:
+        """Antecipa o próximo envio (chamado a cada save enfileirado)."""
+        self._acordar.set()
+
+    def _loop(self) -> None:
+        while True:
+            self.enviar_pendentes()
+            if time.time() - self.ultima_leitura >= self._intervalo:
+                self.ler_planilha()
+            if self._backoff and contar_pendentes():
+                espera = self._backoff
+            else:
+                espera = max(0.0, self._intervalo - (time.time() - self.ultima_leitura))
+            if self._acordar.wait(espera):
+                time.sleep(_JANELA_COALESCENCIA_SEG)
+            self._acordar.clear()
+
+    def enviar_pendentes(self) -> bool:
+        """Envia o journal em lotes. Retorna False se algum lote falhou."""
+        with self._lock_ciclo:
+            while True:
+                lote = pendentes(_LOTE_MAX)
+                if not lote:
+                    self._backoff = 0.0
+                    return True
+                if self._envio_incerto:
+                    # Leitura de cauda: marca como sincronizadas as linhas que
+                    # já chegaram; sem a leitura, não reenvia (evita duplicar)
+                    if not self._ler_planilha():
+                        self._backoff = min(_BACKOFF_MAX_SEG, (self._backoff or 1.0) * 2)
+                        return False
+                    self._envio_incerto = False
+                    continue
+                try:
+                    linhas = self._enviar_lote([
+                        (r["prontuario"], r["nome"], r["data_hora"], r["dados_json"]) for r in lote
+                    ])
+                except Exception as e:
+                    self.ultimo_erro = str(e)
+                    self._envio_incerto = True
+                    self._backoff = min(_BACKOFF_MAX_SEG, (self._backoff or 1.0) * 2)
+                    return False
+                enviadas = 0
+                for row, destino in zip(lote, linhas):
+                    if destino is not None:
+                        marcar_sincronizada(row["id"], destino[1], destino[0])
+                        enviadas += 1
+                if enviadas:
+                    self.ultimo_envio = time.time()
+                    if self._apos_envio:
+                        try:
+                            self._apos_envio()
+                        except Exception:
+                            pass
+                if enviadas < len(lote):
+                    self.ultimo_erro = f"Envio parcial: {len(lote) - enviadas} linha(s) não chegaram ao Sheets"
+                    self._envio_incerto = True
+                    self._backoff = min(_BACKOFF_MAX_SEG, (self._backoff or 1.0) * 2)
+                    return False
+                self.ultimo_erro = ""
+                self._backoff = 0.0
+
+    def ler_planilha(self) -> None:
+        """Traz as linhas acrescentadas na planilha desde a última leitura."""
+        with self._lock_ciclo:
+            self._ler_planilha()
+
+    def _ler_planilha(self) -> bool:
+        """ler_planilha() sem o lock; True se todas as abas lidas responderam."""
+        completo = False
+        try:
+            particoes = self._listar_particoes()
+            if particoes is not None:
+                completo = True
+                for particao in particoes:
+                    if particao in particoes[-2:] or not particao_conhecida(particao):
+                        inicio = ultima_linha_sincronizada(particao) + 1
+                        linhas = self._ler_cauda(particao, inicio)
+                        if linhas is None:
+                            completo = False
+                            continue
+                        aplicar_linhas_planilha(inicio, linhas, particao)
+                        self.ultima_leitura_ok = time.time()
+                if completo and not pronto():
+                    _set_meta("carga_inicial", "1")
+                if completo and not contar_pendentes():
+                    self.ultimo_erro = ""  # planilha voltou e não há nada a reenviar
+        except Exception as e:
+            self.ultimo_erro = str(e)
+        self.ultima_leitura = time.time()
+        return completo
+
+    def ciclo(self) -> None:
+        """Um ciclo completo, síncrono: envia pendentes e traz linhas novas."""
+        self.enviar_pendentes()
+        self.ler_planilha()
+
+    def status(self) -> dict:
+        """Resumo para o indicador de sincronização da UI."""
+        return {
+            "pendentes": contar_pendentes(),
+            "ultimo_erro": self.ultimo_erro,
+            "ultimo_envio": self.ultimo_envio,
+            "proxima_tentativa_seg": self._backoff,
+            # a planilha já respondeu (envio ou leitura) e não há falha em aberto
+            "conectado": bool(max(self.ultimo_envio, self.ultima_leitura_ok)) and not self.ultimo_erro,
+        }
@@ -0,0 +1,213 @@
+"""
+Exportação do arquivo completo de evoluções para análise (Parquet ou Arrow IPC).
+
+Usado por scripts/exportar_evolucoes.py. As abas (EVOLUCOES + partições
+mensais) chegam uma de cada vez, em ordem cronológica; cada aba é dividida
+por paciente em lotes que um pool de processos decodifica (GZ2/GZ1/JSON +
+cadeias de deltas), achata pelo registro de campos (uma coluna por campo,
+padrão do registro quando o campo não foi salvo) e grava direto em disco —
+as tabelas largas nunca voltam ao processo principal. Só a última versão de
+cada paciente volta, para servir de base aos deltas da aba seguinte.
+
+Saída particionada no estilo Hive, legível por pandas/pyarrow/DuckDB:
+    <destino>/particao=EVOLUCOES_2026_10/parte-00000.parquet
+"""
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+from modules.persistencia import codec, delta
+from modules.persistencia.indice import normalizar_prontuario
+
+FORMATOS = {"parquet": ".parquet", "ipc": ".arrow"}
+# Linhas por arquivo/tarefa (pacientes inteiros: um lote pode passar um pouco)
+LINHAS_POR_LOTE = 5000
+
+_FORMATO_DATA_HORA = "%d/%m/%Y %H:%M"
+# A partição não vai dentro dos arquivos: vem do diretório (particao=...)
+_COLUNAS_META = [
+    ("linha", pa.int64()),
+    ("prontuario", pa.string()),
+    ("nome", pa.string()),
+    ("data_hora", pa.timestamp("s")),
+    ("recuperada", pa.bool_()),   # False: delta cuja base não existe mais
+]
+
+# Registro de campos do processo (definido pelo initializer do pool)
+_CAMPOS: dict = {}
+
+
+def _iniciar_processo(campos: dict) -> None:
+    global _CAMPOS
+    _CAMPOS = campos
+
+
+def esquema(campos: dict) -> pa.Schema:
+    """Metadados + um campo por entrada do registro (bool se o padrão é bool, senão texto)."""
+    colunas = list(_COLUNAS_META)
+    nomes = {n for n, _ in colunas}
+    for campo, padrao in campos.items():
+        if campo not in nomes:
+            colunas.append((campo, pa.bool_() if isinstance(padrao, bool) else pa.string()))
+    return pa.schema(colunas)
+
+
+def _texto(valor) -> str | None:
+    if valor is None:
+        return None
+    if isinstance(valor, (list, dict)):
+        return json.dumps(valor, ensure_ascii=False, default=str)
+    return str(valor)
+
+
+def _booleano(valor) -> bool | None:
+    if valor is None or isinstance(valor, bool):
+        return valor
+    return str(valor).strip().lower() in ("true", "1", "sim", "s")
+
+
+def _data_hora(texto) -> datetime | None:
+    try:
+        return datetime.strptime(str(texto).strip(), _FORMATO_DATA_HORA)
+    except ValueError:
+        return None
+
+
+def _versoes(base: dict | None, payloads: list) -> list[dict | None]:
+    """Cadeia de um paciente; `base` = última versão da aba anterior (alvo dos primeiros deltas)."""
+    por_assinatura = {delta.assinatura(base): base} if base is not None else {}
+    versoes = []
+    for texto in payloads:
+        try:
+            if delta.e_delta(texto):
+                d = delta.ler(texto)
+                anterior = por_assinatura.get(d.get("b"))
+                versao = delta.aplicar_delta(anterior, d) if anterior is not None else None
+            else:
+                versao = codec.descomprimir_celula(texto)
+        except Exception:
+            versao = None
+        versoes.append(versao)
+        if versao is not None:
+            por_assinatura[delta.assinatura(versao)] = versao
+    return versoes
+
+
+def _escrever(tabela: pa.Table, caminho: Path, formato: str) -> None:
+    tmp = caminho.with_suffix(caminho.suffix + ".tmp")
+    if formato == "parquet":
+        pq.write_table(tabela, tmp, compression="zstd")
+    else:
+        with pa.OSFile(str(tmp), "wb") as f, pa.ipc.new_file(f, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+    os.replace(tmp, caminho)
+
+
+def _exportar_lote(caminho: str, formato: str, grupos: list) -> tuple[int, int, dict]:
+    """
+    Executado nos processos do pool. grupos = [(prontuario, base, linhas)],
+    linhas = [(linha, nome, data_hora, dados_json)]. Grava o arquivo e
+    retorna (linhas gravadas, irrecuperáveis, prontuário → última versão).
+    """
+    esq = esquema(_CAMPOS)
+    colunas: dict[str, list] = {c: [] for c in esq.names}
+    ultimas: dict[str, dict] = {}
+    irrecuperaveis = 0
+    for pront, base, linhas in grupos:
+        versoes = _versoes(base, [l[3] for l in linhas])
+        for (num, nome, data_hora, _), versao in zip(linhas, versoes):
+            colunas["linha"].append(num)
+            colunas["prontuario"].append(pront)
+            colunas["nome"].append(str(nome or ""))
+            colunas["data_hora"].append(_data_hora(data_hora))
+            colunas["recuperada"].append(versao is not None)
+            if versao is None:
+                irrecuperaveis += 1
+        validas = [v for v in versoes if v is not None]
+        if validas:
+            ultimas[pront] = validas[-1]
+        for campo in esq.names[len(_COLUNAS_META):]:
+            padrao = _CAMPOS.get(campo)
+            converter = _booleano if isinstance(padrao, bool) else _texto
+            colunas[campo].extend(
+                converter(v.get(campo, padrao)) if v is not None else None for v in versoes
+            )
+    tabela = pa.Table.from_pydict(colunas, schema=esq)
+    _escrever(tabela, Path(caminho), formato)
+    return tabela.num_rows, irrecuperaveis, ultimas
+
+
+def _lotes(linhas: list, bases: dict) -> list[list]:
+    """Agrupa as linhas da aba por paciente (ordem preservada) e fatia em lotes de pacientes inteiros."""
+    por_paciente: dict[str, list] = {}
+    for num, pront, nome, data_hora, payload in linhas:
+        pront = normalizar_prontuario(pront)
+        if pront:
+            por_paciente.setdefault(pront, []).append((num, nome, data_hora, payload))
+    lotes, atual, tamanho = [], [], 0
+    for pront, linhas_pac in por_paciente.items():
+        atual.append((pront, bases.get(pront), linhas_pac))
+        tamanho += len(linhas_pac)
+        if tamanho >= LINHAS_POR_LOTE:
+            lotes.append(atual)
+            atual, tamanho = [], 0
+    if atual:
+        lotes.append(atual)
+    return lotes
+
+
+def _limpar_particao(pasta: Path) -> None:
+    """Reexportação idempotente: remove as partes de uma exportação anterior."""
+    pasta.mkdir(parents=True, exist_ok=True)
+    for arquivo in pasta.glob("parte-*"):
+        arquivo.unlink()
+
+
+def exportar(abas, destino, campos: dict, formato: str = "parquet",
+             processos: int | None = None, progresso=None) -> dict:
+    """
+    abas: iterável de (particao, linhas) em ordem cronológica, com
+    linhas = [(número da linha, prontuario, nome, data_hora, dados_json)].
+    campos: registro de campos com padrões (fichas._campos_base()).
+    progresso(particao, linhas, arquivos): opcional, chamado ao fim de cada aba.
+    Retorna {"linhas", "irrecuperaveis", "arquivos", "particoes"}.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido: {formato} (use {', '.join(FORMATOS)})")
+    destino = Path(destino)
+    processos = max(1, processos or min(8, os.cpu_count() or 1))
+    resumo = {"linhas": 0, "irrecuperaveis": 0, "arquivos": 0, "particoes": 0}
+    bases: dict[str, dict] = {}
+
+    with ProcessPoolExecutor(
+        max_workers=processos,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_iniciar_processo,
+        initargs=(campos,),
+    ) as pool:
+        for particao, linhas in abas:
+            pasta = destino / f"particao={particao}"
+            _limpar_particao(pasta)
+            futuros = [
+                pool.submit(_exportar_lote, str(pasta / f"parte-{i:05d}{FORMATOS[formato]}"), formato, lote)
+                for i, lote in enumerate(_lotes(linhas, bases))
+            ]
+            n_aba = 0
+            for futuro in futuros:
+                n, irrecuperaveis, ultimas = futuro.result()
+                n_aba += n
+                resumo["irrecuperaveis"] += irrecuperaveis
+                bases.update(ultimas)
+            resumo["linhas"] += n_aba
+            resumo["arquivos"] += len(futuros)
+            resumo["particoes"] += 1
+            if progresso:
+                progresso(particao, n_aba, len(futuros))
+    return resumo
@@ -0,0 +1,177 @@
+"""
+Modelo de linha preguiçoso + LRU de evoluções decodificadas.
+
+Só as colunas de cabeçalho (prontuario, nome, data_hora) são lidas de
+imediato; o dados_json fica como texto até alguém pedir a versão. As versões
+reconstruídas (keyframe + deltas, ver delta.py) vão para um LRU limitado,
+chaveado por (prontuário, data_hora) + assinatura do payload — data_hora tem
+resolução de minuto, a assinatura desambigua dois saves no mesmo minuto.
+Reabrir o mesmo paciente (ou navegar pelo histórico) não descomprime de novo.
+
+Para consultas por data, cada paciente tem um índice temporal (data_hora das
+linhas, ordenado) resolvido por busca binária: achar a evolução vigente num
+instante não decodifica nenhum payload além da versão pedida.
+"""
+import bisect
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from modules.persistencia import delta
+
+# Versões decodificadas mantidas em memória (todas as sessões do processo)
+CAPACIDADE_LRU = 512
+# Pacientes com índice temporal em memória
+CAPACIDADE_TEMPOS = 256
+
+FORMATO_DATA_HORA = "%d/%m/%Y %H:%M"
+
+
+class LinhaEvolucao:
+    """Uma linha de EVOLUCOES; o payload só é decodificado sob demanda."""
+
+    __slots__ = ("prontuario", "nome", "data_hora", "payload", "_chave")
+
+    def __init__(self, prontuario: str, nome: str, data_hora: str, payload: str):
+        self.prontuario = prontuario
+        self.nome = nome
+        self.data_hora = data_hora
+        self.payload = payload
+        self._chave = None
+
+    @property
+    def chave(self) -> tuple[str, str, str]:
+        if self._chave is None:
+            assinatura = hashlib.sha1(str(self.payload).encode("utf-8")).hexdigest()[:12]
+            self._chave = (self.prontuario, self.data_hora, assinatura)
+        return self._chave
+
+
+_LOCK = threading.Lock()
+_LRU: OrderedDict = OrderedDict()
+_ESTATS = {"acertos": 0, "faltas": 0}
+
+
+def _lru_obter(chave):
+    with _LOCK:
+        dados = _LRU.get(chave)
+        if dados is None:
+            _ESTATS["faltas"] += 1
+            return None
+        _LRU.move_to_end(chave)
+        _ESTATS["acertos"] += 1
+        return dados
+
+
+def _lru_guardar(chave, dados: dict) -> None:
+    with _LOCK:
+        _LRU[chave] = dados
+        _LRU.move_to_end(chave)
+        while len(_LRU) > CAPACIDADE_LRU:
+            _LRU.popitem(last=False)
+
+
+def obter(linha: LinhaEvolucao) -> dict | None:
+    """Versão da linha se já estiver no LRU (cópia), sem decodificar nada."""
+    dados = _lru_obter(linha.chave)
+    return copy.deepcopy(dados) if dados is not None else None
+
+
+def guardar(linha: LinhaEvolucao, dados: dict) -> None:
+    """Registra no LRU uma versão decodificada fora daqui (ex.: censo.py)."""
+    _lru_guardar(linha.chave, copy.deepcopy(dados))
+
+
+def versao(linhas: list[LinhaEvolucao], indice: int, descomprimir) -> dict | None:
+    """
+    Versão decodificada de linhas[indice] (-1 = mais recente), via LRU.
+    Numa falta, reconstrói a partir do último keyframe e guarda no LRU todas
+    as versões decodificadas no caminho. Retorna uma cópia (o chamador pode
+    alterar o dict). None se irrecuperável.
+    """
+    if not linhas:
+        return None
+    indice %= len(linhas)
+    dados = _lru_obter(linhas[indice].chave)
+    if dados is None:
+        versoes = delta.reconstruir([l.payload for l in linhas], descomprimir, ate=indice)
+        for linha, v in zip(linhas, versoes):
+            if v is not None:
+                _lru_guardar(linha.chave, v)
+        dados = versoes[indice]
+        if dados is None:
+            return None
+    return copy.deepcopy(dados)
+
+
+def versoes(linhas: list[LinhaEvolucao], descomprimir) -> list[dict | None]:
+    """Todas as versões, do início do histórico (cópias; irrecuperáveis = None)."""
+    em_cache = [_lru_obter(l.chave) for l in linhas]
+    if any(v is None for v in em_cache):
+        em_cache = delta.reconstruir_historico([l.payload for l in linhas], descomprimir)
+        for linha, v in zip(linhas, em_cache):
+            if v is not None:
+                _lru_guardar(linha.chave, v)
+    return [copy.deepcopy(v) if v is not None else None for v in em_cache]
+
+
+_TEMPOS: OrderedDict = OrderedDict()   # prontuário → (assinatura das linhas, instantes, posições)
+
+
+def _instante(data_hora: str) -> float | None:
+    try:
+        return datetime.strptime(str(data_hora).strip(), FORMATO_DATA_HORA).timestamp()
+    except ValueError:
+        return None
+
+
+def _indice_temporal(linhas: list[LinhaEvolucao]) -> tuple[list[float], list[int]]:
+    """
+    (instantes, posições) ordenados por (data_hora, posição na planilha).
+    Linhas com data_hora inválida ficam de fora. Reaproveitado enquanto o
+    paciente não ganhar linhas novas.
+    """
+    pront = linhas[0].prontuario
+    assinatura = (len(linhas), linhas[-1].chave)
+    with _LOCK:
+        cache = _TEMPOS.get(pront)
+        if cache is not None and cache[0] == assinatura:
+            _TEMPOS.move_to_end(pront)
+            return cache[1], cache[2]
+    pares = sorted(
+        (t, i) for i, t in ((i, _instante(l.data_hora)) for i, l in enumerate(linhas)) if t is not None
+    )
+    instantes = [t for t, _ in pares]
+    posicoes = [i for _, i in pares]
+    with _LOCK:
+        _TEMPOS[pront] = (assinatura, instantes, posicoes)
+        _TEMPOS.move_to_end(pront)
+        while len(_TEMPOS) > CAPACIDADE_TEMPOS:
+            _TEMPOS.popitem(last=False)
+    return instantes, posicoes
+
+
+def localizar(linhas: list[LinhaEvolucao], quando: datetime) -> int | None:
+    """
+    Posição em `linhas` da evolução vigente em `quando`: a de maior data_hora
+    ≤ quando (empate: a gravada por último). None se todas forem posteriores.
+    """
+    if not linhas:
+        return None
+    instantes, posicoes = _indice_temporal(linhas)
+    k = bisect.bisect_right(instantes, quando.timestamp())
+    return posicoes[k - 1] if k else None
+
+
+def estatisticas() -> dict:
+    """Acertos/faltas do LRU e ocupação atual."""
+    with _LOCK:
+        return {**_ESTATS, "tamanho": len(_LRU), "capacidade": CAPACIDADE_LRU}
+
+
+def limpar() -> None:
+    with _LOCK:
+        _LRU.clear()
+        _TEMPOS.clear()
@@ -0,0 +1,155 @@
+"""
+Índice prontuário → números de linha de uma aba (ex.: EVOLUCOES).
+
+Construído lendo apenas a coluna A (uma vez) e mantido de forma incremental:
+- cada append bem-sucedido registra a nova linha (sem tocar a rede);
+- linhas acrescentadas por outros processos entram por leitura de cauda
+  (só a coluna A a partir da última linha conhecida).
+Uma busca custa então 1 requisição: as linhas do paciente via batch_get.
+"""
+import re
+import threading
+import time
+
+from modules.persistencia import conexao
+
+# Intervalo mínimo entre leituras de cauda da coluna A
+_TTL_CAUDA_SEG = 60
+
+_PAT_LINHA_RANGE = re.compile(r"![A-Z]+(\d+)")
+
+
+def normalizar_prontuario(valor) -> str:
+    """Mesma normalização aplicada à coluna prontuario nas leituras via pandas."""
+    return re.sub(r"\.0$", "", str(valor if valor is not None else "").strip())
+
+
+class _Indice:
+    def __init__(self):
+        self.linhas: dict[str, list[int]] = {}
+        self.ultima_linha = 1            # 1 = cabeçalho; dados começam na linha 2
+        self.carregado = False
+        self.verificado_em = 0.0
+        self.lock = threading.RLock()
+
+    def resetar(self) -> None:
+        self.linhas = {}
+        self.ultima_linha = 1
+        self.carregado = False
+        self.verificado_em = 0.0
+
+
+_LOCK = threading.Lock()
+_INDICES: dict[tuple[str, str], _Indice] = {}
+
+
+def _obter(url: str, aba: str) -> _Indice:
+    with _LOCK:
+        ind = _INDICES.get((url, aba))
+        if ind is None:
+            ind = _Indice()
+            _INDICES[(url, aba)] = ind
+        return ind
+
+
+def _ler_cauda(ws, ind: _Indice) -> None:
+    """Lê a coluna A a partir da primeira linha ainda não indexada."""
+    inicio = ind.ultima_linha + 1
+    valores = ws.get(f"A{inicio}:A")
+    for i, linha in enumerate(valores):
+        pront = normalizar_prontuario(linha[0] if linha else "")
+        if pront:
+            ind.linhas.setdefault(pront, []).append(inicio + i)
+    ind.ultima_linha += len(valores)
+    ind.carregado = True
+    ind.verificado_em = time.time()
+
+
+def _garantir_atualizado(ws, ind: _Indice, forcar: bool = False) -> None:
+    if forcar or not ind.carregado or time.time() - ind.verificado_em > _TTL_CAUDA_SEG:
+        _ler_cauda(ws, ind)
+
+
+def _linhas_atuais(ws, ind: _Indice, prontuario: str) -> list[int]:
+    """Linhas indexadas do prontuário; relê a cauda se ele ainda não aparece no índice."""
+    with ind.lock:
+        _garantir_atualizado(ws, ind)
+        if prontuario not in ind.linhas and time.time() - ind.verificado_em > 1:
+            _ler_cauda(ws, ind)
+        return list(ind.linhas.get(prontuario, []))
+
+
+def linhas_do_prontuario(url: str, aba: str, prontuario: str) -> list[int] | None:
+    """
+    Números de linha (ordem crescente) do prontuário já normalizado.
+    Faz leitura de cauda se o índice estiver velho ou se o prontuário não for
+    encontrado. None sem service account.
+    """
+    ind = _obter(url, aba)
+    return conexao.executar(url, aba, lambda ws: _linhas_atuais(ws, ind, prontuario))
+
+
+def buscar_linhas(url: str, aba: str, prontuario: str, ultimas: int | None = None) -> list[list[str]] | None:
+    """
+    Retorna as linhas (listas de células) do prontuário, na ordem da planilha.
+    ultimas=N limita às N mais recentes. Uma única requisição (batch_get).
+    Se a planilha foi editada manualmente e as linhas deslocaram, reconstrói
+    o índice e tenta de novo. None sem service account.
+    """
+    ind = _obter(url, aba)
+
+    def _op(ws):
+        for _ in range(2):
+            nums = _linhas_atuais(ws, ind, prontuario)
+            if ultimas:
+                nums = nums[-ultimas:]
+            if not nums:
+                return []
+            ranges = ws.batch_get([f"{n}:{n}" for n in nums])
+            linhas = [list(r[0]) if r else [] for r in ranges]
+            if all(l and normalizar_prontuario(l[0]) == prontuario for l in linhas):
+                return linhas
+            with ind.lock:
+                ind.resetar()
+        raise RuntimeError("Índice de prontuários inconsistente com a planilha.")
+
+    return conexao.executar(url, aba, _op)
+
+
+def linha_da_resposta(resposta) -> int | None:
+    """Primeira linha escrita segundo a resposta de append_row/append_rows."""
+    try:
+        faixa = resposta.get("updates", {}).get("updatedRange", "")
+    except AttributeError:
+        return None
+    m = _PAT_LINHA_RANGE.search(faixa or "")
+    return int(m.group(1)) if m else None
+
+
+def registrar_append(url: str, aba: str, prontuarios: str | list[str], resposta) -> None:
+    """
+    Registra no índice as linhas recém-acrescentadas, a partir da resposta do
+    append_row/append_rows (updates.updatedRange) e dos prontuários na ordem
+    enviada. Se houver lacuna (outro processo escreveu antes), deixa para a
+    próxima leitura de cauda.
+    """
+    if isinstance(prontuarios, str):
+        prontuarios = [prontuarios]
+    ind = _obter(url, aba)
+    primeira = linha_da_resposta(resposta)
+    if primeira is None:
+        return
+    with ind.lock:
+        if ind.carregado and primeira == ind.ultima_linha + 1:
+            for i, pront in enumerate(prontuarios):
+                ind.linhas.setdefault(normalizar_prontuario(pront), []).append(primeira + i)
+            ind.ultima_linha = primeira + len(prontuarios) - 1
+
+
+def invalidar(url: str | None = None, aba: str | None = None) -> None:
+    """Descarta o índice da aba (ou todos). O próximo acesso reconstrói a partir da coluna A."""
+    with _LOCK:
+        for chave, ind in _INDICES.items():
+            if (url is None or chave[0] == url) and (aba is None or chave[1] == aba):
+                with ind.lock:
+                    ind.resetar()
@@ -0,0 +1,236 @@
+"""
+Partições mensais da aba de evoluções + manifesto prontuário → partições.
+
+Com o particionamento ativo, cada evolução vai para a aba do mês do seu
+data_hora (EVOLUCOES_2026_10, ...), criada automaticamente no primeiro save
+do mês. A aba EVOLUCOES_MANIFESTO guarda um par (prontuario, particao) por
+partição em que o paciente tem linhas; os leitores consultam só essas abas
+(mais a do mês corrente, que cobre um registro de manifesto ainda não gravado).
+
+A aba EVOLUCOES original vira a "partição zero": congelada, continua sendo
+lida, e o backfill apenas registra os seus prontuários no manifesto — não há
+cópia de linhas, então a ordem cronológica (legado < partições, e dentro de
+cada aba pela linha) se mantém e as cadeias de deltas (delta.py) continuam
+íntegras.
+
+O particionamento é ligado pelo job de manutenção
+(scripts/manutencao_particoes.py), que cria o manifesto, faz o backfill,
+cria as partições do mês corrente/seguinte e repara entradas faltantes.
+Sem manifesto, tudo continua na aba EVOLUCOES.
+"""
+import re
+import threading
+import time
+from datetime import datetime
+
+from modules.persistencia import cauda, conexao, escrita
+from modules.persistencia.indice import normalizar_prontuario
+
+ABA_LEGADA = "EVOLUCOES"
+ABA_MANIFESTO = "EVOLUCOES_MANIFESTO"
+CABECALHO = ["prontuario", "nome", "data_hora", "dados_json"]
+CABECALHO_MANIFESTO = ["prontuario", "particao"]
+
+# Validade da lista de abas e do manifesto em memória
+_TTL_SEG = 60
+
+_PAT_PARTICAO = re.compile(r"^EVOLUCOES_(\d{4})_(\d{2})$")
+
+_LOCK = threading.RLock()
+_ABAS: dict[str, tuple[float, list[str]]] = {}                 # url → (lido_em, abas)
+_MANIFESTO: dict[str, tuple[float, dict[str, set[str]]]] = {}  # url → (lido_em, pront → partições)
+
+
+def nome_particao(quando: datetime) -> str:
+    return f"{ABA_LEGADA}_{quando.year:04d}_{quando.month:02d}"
+
+
+def e_particao(nome: str) -> bool:
+    return nome == ABA_LEGADA or bool(_PAT_PARTICAO.match(nome))
+
+
+def particao_da_data_hora(data_hora: str) -> str:
+    """Partição de uma linha pelo seu data_hora ("dd/mm/aaaa HH:MM"); mês corrente se inválido."""
+    try:
+        return nome_particao(datetime.strptime(str(data_hora).strip(), "%d/%m/%Y %H:%M"))
+    except ValueError:
+        return nome_particao(datetime.now())
+
+
+# ── Abas existentes ────────────────────────────────────────────────────────────
+
+def _todas_abas(url: str, forcar: bool = False) -> list[str] | None:
+    with _LOCK:
+        cache = _ABAS.get(url)
+        if cache and not forcar and time.time() - cache[0] < _TTL_SEG:
+            return cache[1]
+    sh = conexao.obter_planilha(url)
+    if sh is None:
+        return None
+    nomes = [ws.title for ws in sh.worksheets()]
+    with _LOCK:
+        _ABAS[url] = (time.time(), nomes)
+    return nomes
+
+
+def ativo(url: str) -> bool:
+    """True se o manifesto existe (particionamento ligado pelo job de manutenção)."""
+    abas = _todas_abas(url)
+    return bool(abas) and ABA_MANIFESTO in abas
+
+
+def listar(url: str, forcar: bool = False) -> list[str] | None:
+    """
+    Abas de evolução existentes em ordem cronológica (EVOLUCOES primeiro,
+    depois EVOLUCOES_aaaa_mm). None sem service account.
+    """
+    abas = _todas_abas(url, forcar)
+    if abas is None:
+        return None
+    return sorted(a for a in abas if e_particao(a))
+
+
+def particao_para_escrita(url: str, data_hora: str) -> str:
+    """Aba que deve receber uma linha com este data_hora (EVOLUCOES se inativo)."""
+    return particao_da_data_hora(data_hora) if ativo(url) else ABA_LEGADA
+
+
+def garantir_aba(url: str, nome: str, cabecalho: list[str] | None = None) -> None:
+    """Cria a aba (com cabeçalho) se ainda não existe."""
+    abas = _todas_abas(url) or []
+    if nome in abas:
+        return
+    abas = _todas_abas(url, forcar=True) or []
+    if nome in abas:
+        return
+    sh = conexao.obter_planilha(url)
+    if sh is None:
+        return
+    cab = cabecalho or CABECALHO
+    try:
+        ws = sh.add_worksheet(title=nome, rows=1000, cols=len(cab))
+    except Exception:
+        # Outro processo criou a aba ao mesmo tempo
+        if nome not in (_todas_abas(url, forcar=True) or []):
+            raise
+        return
+    ws.update("A1", [cab])
+    escrita.lembrar_cabecalho(url, nome, cab)
+    _todas_abas(url, forcar=True)
+
+
+# ── Manifesto ─────────────────────────────────────────────────────────────────
+
+def _manifesto(url: str, forcar: bool = False) -> dict[str, set[str]]:
+    with _LOCK:
+        cache = _MANIFESTO.get(url)
+        if cache and not forcar and time.time() - cache[0] < _TTL_SEG:
+            return cache[1]
+    valores = cauda.ler_valores(url, ABA_MANIFESTO)
+    mapa: dict[str, set[str]] = {}
+    if valores is not None:
+        for linha in valores[1]:
+            if len(linha) >= 2 and linha[0] and linha[1]:
+                mapa.setdefault(normalizar_prontuario(linha[0]), set()).add(str(linha[1]))
+    with _LOCK:
+        _MANIFESTO[url] = (time.time(), mapa)
+    return mapa
+
+
+def do_prontuario(url: str, prontuario: str) -> list[str] | None:
+    """
+    Abas a consultar para o prontuário (já normalizado), em ordem cronológica.
+    Inativo: [EVOLUCOES]. Ativo: partições do manifesto + a do mês corrente
+    (se existir). None sem service account.
+    """
+    abas = listar(url)
+    if abas is None:
+        return None
+    if not ativo(url):
+        return [ABA_LEGADA] if ABA_LEGADA in abas else []
+    mapa = _manifesto(url)
+    if prontuario not in mapa:
+        mapa = _manifesto(url, forcar=True)
+    candidatas = set(mapa.get(prontuario, set())) | {nome_particao(datetime.now())}
+    return sorted(a for a in candidatas if a in abas)
+
+
+def registrado(url: str, prontuario: str) -> bool:
+    """True se o manifesto já tem alguma partição para o prontuário."""
+    if prontuario in _manifesto(url):
+        return True
+    return prontuario in _manifesto(url, forcar=True)
+
+
+def registrar(url: str, pares: list[tuple[str, str]]) -> int:
+    """Acrescenta ao manifesto os pares (prontuario, particao) ainda ausentes. Retorna quantos."""
+    if not ativo(url):
+        return 0
+    mapa = _manifesto(url)
+    novos, vistos = [], set()
+    for pront, particao in pares:
+        pront = normalizar_prontuario(pront)
+        if not pront or particao in mapa.get(pront, ()) or (pront, particao) in vistos:
+            continue
+        vistos.add((pront, particao))
+        novos.append([pront, particao])
+    if not novos:
+        return 0
+    conexao.executar(url, ABA_MANIFESTO, lambda ws: ws.append_rows(novos, value_input_option="RAW"))
+    with _LOCK:
+        for pront, particao in novos:
+            mapa.setdefault(pront, set()).add(particao)
+    return len(novos)
+
+
+# ── Manutenção (scripts/manutencao_particoes.py) ───────────────────────────────
+
+def _prontuarios_da_aba(url: str, aba: str) -> set[str]:
+    valores = conexao.executar(url, aba, lambda ws: ws.get("A2:A")) or []
+    return {normalizar_prontuario(l[0]) for l in valores if l and normalizar_prontuario(l[0])}
+
+
+def indexar_aba(url: str, aba: str) -> int:
+    """Backfill/reparo: registra no manifesto todos os prontuários presentes na aba."""
+    return registrar(url, [(p, aba) for p in sorted(_prontuarios_da_aba(url, aba))])
+
+
+def rotacionar(url: str, quando: datetime | None = None) -> list[str]:
+    """Cria as partições do mês corrente e do seguinte (o primeiro save do mês não espera)."""
+    quando = quando or datetime.now()
+    seguinte = datetime(quando.year + quando.month // 12, quando.month % 12 + 1, 1)
+    criadas = []
+    for nome in (nome_particao(quando), nome_particao(seguinte)):
+        if nome not in (listar(url) or []):
+            garantir_aba(url, nome)
+            criadas.append(nome)
+    return criadas
+
+
+def manutencao(url: str, quando: datetime | None = None) -> dict:
+    """
+    Job idempotente:
+    1. cria o manifesto se não existe (liga o particionamento);
+    2. backfill: registra os prontuários da aba EVOLUCOES legada;
+    3. rotação: cria as partições do mês corrente e do seguinte;
+    4. reparo: registra pares faltantes das duas partições mais recentes
+       (append de dados feito, append no manifesto perdido).
+    """
+    if conexao.obter_planilha(url) is None:
+        raise RuntimeError("Manutenção de partições requer service account configurada.")
+    garantir_aba(url, ABA_MANIFESTO, CABECALHO_MANIFESTO)
+    resumo = {"backfill": 0, "criadas": [], "reparadas": 0}
+    if ABA_LEGADA in (listar(url, forcar=True) or []):
+        resumo["backfill"] = indexar_aba(url, ABA_LEGADA)
+    resumo["criadas"] = rotacionar(url, quando)
+    for aba in [a for a in (listar(url) or []) if a != ABA_LEGADA][-2:]:
+        resumo["reparadas"] += indexar_aba(url, aba)
+    return resumo
+
+
+def invalidar(url: str | None = None) -> None:
+    """Descarta a lista de abas e o manifesto em memória."""
+    with _LOCK:
+        for cache in (_ABAS, _MANIFESTO):
+            for chave in [k for k in cache if url is None or k == url]:
+                cache.pop(chave, None)
@@ -0,0 +1,366 @@
+"""
+Google Sheets em memória, para testes e benchmarks offline.
+
+Imita a superfície do gspread usada pelo app (open_by_url, worksheet,
+worksheets, add_worksheet, batch_update, get_all_records, get_all_values, get, batch_get, row_values, append_row,
+append_rows, update) e do GSheetsConnection (read/update), com latência e
+erros de quota (HTTP 429) injetáveis.
+
+Uso:
+    from modules.persistencia import planilha_fake
+    backend = planilha_fake.instalar(latencia_seg=0.2, taxa_erro_quota=0.05)
+    backend.criar_aba(SHEET_URL, "EVOLUCOES", ["prontuario", "nome", "data_hora", "dados_json"])
+    ...                       # utils.save_evolucao / load_evolucao / load_data
+    backend.chamadas          # Counter de requisições por operação
+    planilha_fake.desinstalar()
+"""
+import random
+import re
+import threading
+import time
+from collections import Counter
+
+from gspread.exceptions import APIError, WorksheetNotFound
+from gspread.utils import numericise_all
+
+from modules.persistencia import conexao
+
+_PAT_A1 = re.compile(r"^([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+
+def _coluna_indice(letras: str) -> int:
+    n = 0
+    for c in letras:
+        n = n * 26 + (ord(c) - 64)
+    return n
+
+
+def _coluna_letras(n: int) -> str:
+    letras = ""
+    while n:
+        n, r = divmod(n - 1, 26)
+        letras = chr(65 + r) + letras
+    return letras
+
+
+def _aparar(linhas: list[list[str]]) -> list[list[str]]:
+    """Como a API: sem células vazias no fim das linhas nem linhas vazias no fim."""
+    saida = []
+    for l in linhas:
+        l = list(l)
+        while l and l[-1] == "":
+            l.pop()
+        saida.append(l)
+    while saida and not saida[-1]:
+        saida.pop()
+    return saida
+
+
+def _valor_celula(celula: dict) -> str:
+    valor = next(iter(celula.get("userEnteredValue", {}).values()), "")
+    if isinstance(valor, bool):
+        return "TRUE" if valor else "FALSE"
+    return str(valor)
+
+
+class _RespostaErro:
+    """Resposta HTTP mínima para construir um gspread APIError."""
+
+    def __init__(self, status: int, mensagem: str):
+        self.status_code = status
+        self.text = mensagem
+        self._corpo = {"error": {"code": status, "message": mensagem, "status": "RESOURCE_EXHAUSTED"}}
+
+    def json(self):
+        return self._corpo
+
+
+class BackendFake:
+    """
+    Estado compartilhado (planilhas → abas → linhas) e injeção de falhas.
+    latencia_seg + uniforme(0, jitter_seg) de espera por requisição;
+    taxa_erro_quota = probabilidade de cada requisição falhar com 429;
+    falhar_proximas(n) força as n próximas requisições a falhar.
+    """
+
+    def __init__(self, latencia_seg: float = 0.0, jitter_seg: float = 0.0,
+                 taxa_erro_quota: float = 0.0, semente: int | None = None):
+        self.latencia_seg = latencia_seg
+        self.jitter_seg = jitter_seg
+        self.taxa_erro_quota = taxa_erro_quota
+        self.chamadas: Counter = Counter()
+        self._falhas_forcadas = 0
+        self._rng = random.Random(semente)
+        self._planilhas: dict[str, dict[str, list[list[str]]]] = {}
+        self.lock = threading.RLock()
+
+    # ── Dados ────────────────────────────────────────────────────────────────
+    def criar_aba(self, url: str, nome: str, cabecalho: list[str] | None = None,
+                  linhas: list[list] | None = None) -> None:
+        with self.lock:
+            dados = [list(cabecalho)] if cabecalho else []
+            dados += [[str(v) for v in l] for l in (linhas or [])]
+            self._planilhas.setdefault(url, {})[nome] = dados
+
+    def linhas(self, url: str, nome: str) -> list[list[str]]:
+        """Cópia das linhas da aba (cabeçalho incluído), para asserções."""
+        with self.lock:
+            return [list(l) for l in self._planilhas[url][nome]]
+
+    # ── Falhas / latência ────────────────────────────────────────────────────
+    def falhar_proximas(self, n: int) -> None:
+        with self.lock:
+            self._falhas_forcadas = n
+
+    def _requisicao(self, operacao: str) -> None:
+        self.chamadas[operacao] += 1
+        espera = self.latencia_seg + (self._rng.uniform(0, self.jitter_seg) if self.jitter_seg else 0)
+        if espera:
+            time.sleep(espera)
+        with self.lock:
+            forcada = self._falhas_forcadas > 0
+            if forcada:
+                self._falhas_forcadas -= 1
+        if forcada or (self.taxa_erro_quota and self._rng.random() < self.taxa_erro_quota):
+            self.chamadas["erro_429"] += 1
+            raise APIError(_RespostaErro(429, "Quota exceeded for quota metric 'Read requests'"))
+
+    # ── Fachadas ─────────────────────────────────────────────────────────────
+    def cliente(self) -> "ClienteFake":
+        return ClienteFake(self)
+
+    def conexao_st(self) -> "ConexaoFake":
+        return ConexaoFake(self)
+
+
+class ClienteFake:
+    """Equivalente ao gspread.Client."""
+
+    def __init__(self, backend: BackendFake):
+        self.backend = backend
+
+    def open_by_url(self, url: str) -> "PlanilhaFake":
+        self.backend._requisicao("open_by_url")
+        with self.backend.lock:
+            self.backend._planilhas.setdefault(url, {})
+        return PlanilhaFake(self.backend, url)
+
+
+class PlanilhaFake:
+    """Equivalente ao gspread.Spreadsheet."""
+
+    def __init__(self, backend: BackendFake, url: str):
+        self.backend = backend
+        self.url = url
+
+    def worksheet(self, nome: str) -> "AbaFake":
+        self.backend._requisicao("worksheet")
+        with self.backend.lock:
+            if nome not in self.backend._planilhas[self.url]:
+                raise WorksheetNotFound(nome)
+        return AbaFake(self.backend, self.url, nome)
+
+    def worksheets(self) -> list["AbaFake"]:
+        self.backend._requisicao("worksheets")
+        with self.backend.lock:
+            return [AbaFake(self.backend, self.url, n) for n in self.backend._planilhas[self.url]]
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **_) -> "AbaFake":
+        self.backend._requisicao("add_worksheet")
+        with self.backend.lock:
+            abas = self.backend._planilhas[self.url]
+            if title in abas:
+                raise APIError(_RespostaErro(400, f'A sheet with the name "{title}" already exists.'))
+            abas[title] = []
+        return AbaFake(self.backend, self.url, title)
+
+    def batch_update(self, corpo: dict) -> dict:
+        """spreadsheets.batchUpdate: só updateCells e appendCells (valores), numa requisição."""
+        self.backend._requisicao("batch_update")
+        with self.backend.lock:
+            abas = self.backend._planilhas[self.url]
+            nomes = list(abas)
+            for req in corpo.get("requests", []):
+                if "updateCells" in req:
+                    r = req["updateCells"]
+                    linhas = abas[nomes[r["start"]["sheetId"]]]
+                    i0, j0 = r["start"].get("rowIndex", 0), r["start"].get("columnIndex", 0)
+                    for di, row in enumerate(r["rows"]):
+                        while len(linhas) <= i0 + di:
+                            linhas.append([])
+                        linha = linhas[i0 + di]
+                        valores = [_valor_celula(c) for c in row.get("values", [])]
+                        linha.extend([""] * (j0 + len(valores) - len(linha)))
+                        linha[j0:j0 + len(valores)] = valores
+                elif "appendCells" in req:
+                    r = req["appendCells"]
+                    linhas = abas[nomes[r["sheetId"]]]
+                    while linhas and not any(str(v) for v in linhas[-1]):
+                        linhas.pop()
+                    for row in r["rows"]:
+                        linhas.append([_valor_celula(c) for c in row.get("values", [])])
+                else:
+                    raise ValueError(f"Requisição não suportada: {list(req)}")
+        return {"spreadsheetId": self.url, "replies": [{} for _ in corpo.get("requests", [])]}
+
+
+class AbaFake:
+    """Equivalente ao gspread.Worksheet (subconjunto usado pelo app)."""
+
+    def __init__(self, backend: BackendFake, url: str, nome: str):
+        self.backend = backend
+        self.url = url
+        self.title = nome
+
+    @property
+    def id(self) -> int:
+        """sheetId: posição da aba na planilha (estável — o fake não apaga abas)."""
+        with self.backend.lock:
+            return list(self.backend._planilhas[self.url]).index(self.title)
+
+    @property
+    def spreadsheet(self) -> PlanilhaFake:
+        return PlanilhaFake(self.backend, self.url)
+
+    @property
+    def _linhas(self) -> list[list[str]]:
+        try:
+            return self.backend._planilhas[self.url][self.title]
+        except KeyError:
+            raise WorksheetNotFound(self.title) from None
+
+    def _faixa(self, a1: str) -> list[list[str]]:
+        a1 = a1.split("!")[-1]
+        m = _PAT_A1.match(a1)
+        if not m:
+            raise ValueError(f"Faixa A1 não suportada: {a1}")
+        c1, l1, c2, l2 = m.groups()
+        if m.group(3) is None and m.group(4) is None:
+            c2, l2 = c1, l1                       # célula única ("B3")
+        linhas = self._linhas
+        i0 = int(l1) - 1 if l1 else 0
+        i1 = int(l2) if l2 else len(linhas)
+        j0 = _coluna_indice(c1) - 1 if c1 else 0
+        j1 = _coluna_indice(c2) if c2 else None
+        return _aparar([l[j0:j1] for l in linhas[i0:i1]])
+
+    def get_all_values(self) -> list[list[str]]:
+        self.backend._requisicao("get_all_values")
+        with self.backend.lock:
+            linhas = [list(l) for l in self._linhas]
+        largura = max((len(l) for l in linhas), default=0)
+        return [l + [""] * (largura - len(l)) for l in linhas]
+
+    def get_all_records(self) -> list[dict]:
+        self.backend._requisicao("get_all_records")
+        with self.backend.lock:
+            linhas = [list(l) for l in self._linhas]
+        if len(linhas) < 2:
+            return []
+        cabecalho = linhas[0]
+        largura = len(cabecalho)
+        return [
+            dict(zip(cabecalho, numericise_all((l + [""] * largura)[:largura], default_blank="")))
+            for l in linhas[1:]
+        ]
+
+    def get(self, faixa: str) -> list[list[str]]:
+        self.backend._requisicao("get")
+        with self.backend.lock:
+            return self._faixa(faixa)
+
+    def batch_get(self, faixas: list[str]) -> list[list[list[str]]]:
+        self.backend._requisicao("batch_get")
+        with self.backend.lock:
+            return [self._faixa(f) for f in faixas]
+
+    def row_values(self, linha: int) -> list[str]:
+        self.backend._requisicao("row_values")
+        with self.backend.lock:
+            linhas = self._linhas
+            return _aparar([linhas[linha - 1]])[0] if len(linhas) >= linha else []
+
+    def _resposta_append(self, primeira: int, n: int, largura: int) -> dict:
+        faixa = f"'{self.title}'!A{primeira}:{_coluna_letras(max(largura, 1))}{primeira + n - 1}"
+        return {"updates": {"updatedRange": faixa, "updatedRows": n}}
+
+    def append_rows(self, valores: list[list], value_input_option: str = "RAW", **_) -> dict:
+        self.backend._requisicao("append_rows")
+        with self.backend.lock:
+            linhas = self._linhas
+            while linhas and not any(str(v) for v in linhas[-1]):
+                linhas.pop()
+            primeira = len(linhas) + 1
+            for v in valores:
+                linhas.append(["" if c is None else str(c) for c in v])
+            largura = max((len(v) for v in valores), default=1)
+            return self._resposta_append(primeira, len(valores), largura)
+
+    def append_row(self, valores: list, value_input_option: str = "RAW", **_) -> dict:
+        return self.append_rows([valores], value_input_option=value_input_option)
+
+    def update(self, faixa: str, valores: list[list] | None = None, **_) -> dict:
+        self.backend._requisicao("update")
+        m = _PAT_A1.match(faixa.split("!")[-1])
+        i0 = int(m.group(2)) - 1 if m and m.group(2) else 0
+        j0 = _coluna_indice(m.group(1)) - 1 if m and m.group(1) else 0
+        with self.backend.lock:
+            linhas = self._linhas
+            for di, v in enumerate(valores or []):
+                while len(linhas) <= i0 + di:
+                    linhas.append([])
+                linha = linhas[i0 + di]
+                linha.extend([""] * (j0 + len(v) - len(linha)))
+                linha[j0:j0 + len(v)] = ["" if c is None else str(c) for c in v]
+        return {"updatedRange": faixa}
+
+
+class ConexaoFake:
+    """Equivalente ao st.connection("gsheets", type=GSheetsConnection)."""
+
+    def __init__(self, backend: BackendFake):
+        self.backend = backend
+
+    def read(self, *, spreadsheet: str | None = None, worksheet: str | None = None, ttl=None, **_):
+        import pandas as pd
+        self.backend._requisicao("conn.read")
+        with self.backend.lock:
+            linhas = [list(l) for l in self.backend._planilhas.get(spreadsheet, {}).get(worksheet, [])]
+        if not linhas:
+            return pd.DataFrame()
+        cabecalho = linhas[0]
+        largura = len(cabecalho)
+        return pd.DataFrame([(l + [""] * largura)[:largura] for l in linhas[1:]], columns=cabecalho)
+
+    def update(self, *, spreadsheet: str | None = None, worksheet: str | None = None, data=None, **_):
+        """Regrava a aba inteira com o DataFrame (mesma semântica do GSheetsConnection)."""
+        self.backend._requisicao("conn.update")
+        cabecalho = [str(c) for c in data.columns]
+        valores = data.astype(object).where(data.notna(), "")
+        linhas = [[str(v) for v in l] for l in valores.values.tolist()]
+        self.backend.criar_aba(spreadsheet, worksheet, cabecalho, linhas)
+        return data
+
+
+def instalar(backend: BackendFake | None = None, **opcoes) -> BackendFake:
+    """
+    Passa o app a usar o backend em memória (client gspread e st.connection).
+    Sem backend, cria um com as opções (latencia_seg, jitter_seg,
+    taxa_erro_quota, semente). Retorna o backend instalado.
+    """
+    from modules.persistencia import cauda, indice, particoes
+    backend = backend or BackendFake(**opcoes)
+    conexao.injetar(backend.cliente(), backend.conexao_st())
+    indice.invalidar()
+    cauda.invalidar()
+    particoes.invalidar()
+    return backend
+
+
+def desinstalar() -> None:
+    """Volta ao Google Sheets real."""
+    from modules.persistencia import cauda, indice, particoes
+    conexao.injetar()
+    indice.invalidar()
+    cauda.invalidar()
+    particoes.invalidar()
@@ -0,0 +1,134 @@
+"""
+Snapshots das abas de referência (DB_INFUSAO, DB_IOT) com stale-while-revalidate.
+
+As calculadoras de beira-leito não podem esperar a rede: a página sempre
+renderiza com o snapshot que já está em memória — ou, na primeira vez do
+processo, com o snapshot salvo em disco ou com os dados embutidos no código
+(ex.: utils._DADOS_INFUSAO_PADRAO). Quando o snapshot passa de IDADE_MAX_SEG,
+uma thread em background relê a aba e troca a referência de uma vez (a página
+nunca vê uma tabela pela metade); a versão nova também é gravada em disco.
+Só bloqueia na primeira leitura de uma aba sem snapshot nenhum.
+"""
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from modules.persistencia.espelho import diretorio_dados
+
+IDADE_MAX_SEG = 600
+
+
+class _Snapshot:
+    """Versão imutável de uma aba: trocada por inteiro, nunca alterada no lugar."""
+
+    def __init__(self, df: pd.DataFrame, atualizado_em: float, origem: str):
+        self.df = df
+        self.atualizado_em = atualizado_em   # 0.0 = ainda não veio da planilha neste processo
+        self.origem = origem                 # "planilha" | "disco" | "embutido"
+
+
+_LOCK = threading.Lock()
+_SNAPSHOTS: dict[str, _Snapshot] = {}
+_ATUALIZANDO: set[str] = set()
+
+
+def _arquivo(aba: str):
+    return diretorio_dados() / "referencia" / f"{aba}.json"
+
+
+def _ler_disco(aba: str) -> _Snapshot | None:
+    try:
+        with open(_arquivo(aba), encoding="utf-8") as f:
+            registros = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not registros:
+        return None
+    return _Snapshot(pd.DataFrame(registros), 0.0, "disco")
+
+
+def _gravar_disco(aba: str, df: pd.DataFrame) -> None:
+    """Escrita atômica (arquivo temporário + os.replace)."""
+    try:
+        caminho = _arquivo(aba)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        tmp = caminho.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(df.to_dict(orient="records"), f, ensure_ascii=False, default=str)
+        os.replace(tmp, caminho)
+    except OSError:
+        pass  # ex.: sistema de arquivos somente leitura — fica só em memória
+
+
+def _publicar(aba: str, df: pd.DataFrame) -> _Snapshot:
+    snap = _Snapshot(df, time.time(), "planilha")
+    with _LOCK:
+        _SNAPSHOTS[aba] = snap
+    _gravar_disco(aba, df)
+    return snap
+
+
+def _revalidar(aba: str, ler) -> None:
+    try:
+        df = ler()
+        if df is not None and not df.empty:
+            _publicar(aba, df)
+    except Exception:
+        pass  # mantém o snapshot atual; tenta de novo no próximo acesso
+    finally:
+        with _LOCK:
+            _ATUALIZANDO.discard(aba)
+
+
+def _revalidar_em_background(aba: str, ler) -> None:
+    with _LOCK:
+        if aba in _ATUALIZANDO:
+            return
+        _ATUALIZANDO.add(aba)
+    threading.Thread(target=_revalidar, args=(aba, ler), daemon=True, name=f"ref-{aba}").start()
+
+
+def obter(aba: str, ler, embutido: list[dict] | None = None, idade_max: float = IDADE_MAX_SEG) -> pd.DataFrame:
+    """
+    DataFrame da aba de referência, sem esperar a rede se houver snapshot.
+    ler() → DataFrame | None lê a planilha (chamado em background).
+    embutido: registros usados se não houver snapshot em memória nem em disco.
+    """
+    with _LOCK:
+        snap = _SNAPSHOTS.get(aba)
+    if snap is None:
+        snap = _ler_disco(aba)
+        if snap is None and embutido:
+            snap = _Snapshot(pd.DataFrame(embutido), 0.0, "embutido")
+        if snap is not None:
+            with _LOCK:
+                snap = _SNAPSHOTS.setdefault(aba, snap)
+
+    if snap is None:
+        # Nenhum snapshot: única situação em que a página espera a planilha
+        df = ler()
+        if df is None or df.empty:
+            return pd.DataFrame()
+        return _publicar(aba, df).df
+
+    if time.time() - snap.atualizado_em > idade_max:
+        _revalidar_em_background(aba, ler)
+    return snap.df
+
+
+def marcar_velho(aba: str) -> None:
+    """Força revalidação no próximo acesso (após escrita na aba)."""
+    with _LOCK:
+        snap = _SNAPSHOTS.get(aba)
+        if snap is not None:
+            _SNAPSHOTS[aba] = _Snapshot(snap.df, 0.0, snap.origem)
+
+
+def origem(aba: str) -> str | None:
+    """De onde veio o snapshot atual ("planilha", "disco", "embutido") ou None."""
+    with _LOCK:
+        snap = _SNAPSHOTS.get(aba)
+    return snap.origem if snap else None
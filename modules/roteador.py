@@ -0,0 +1,285 @@
+"""
+Roteamento determinístico-primeiro das seções estruturadas (Laboratoriais,
+Controles & Balanço, Sistemas).
+
+Quando o texto vem no formato padronizado (o que o próprio app gera), os
+parsers determinísticos (parser_lab, parser_controles, parser_sistemas) já
+preenchem tudo em milissegundos e a IA não é chamada. rotear() roda o parser
+da seção e separa o texto em tokens (itens entre "|" ou linhas):
+
+- cobertura: fração dos tokens que o parser reconheceu (0 a 1);
+- resto: só o que o parser não reconheceu, com o cabeçalho que dá contexto
+  (data da linha de exames, "> DD/MM/YYYY" do bloco, "- Sistema").
+
+completar() chama o agente apenas com o resto (ou com o texto inteiro, se a
+cobertura ficar abaixo de LIMIAR_COBERTURA: texto livre, o parser não ajuda)
+e junta as respostas; os valores do parser prevalecem sobre os da IA.
+"""
+import re
+import threading
+from datetime import date
+
+from modules import parser_controles, parser_lab, parser_sistemas
+
+# Abaixo disso o agente recebe o texto inteiro em vez do resto
+LIMIAR_COBERTURA = 0.5
+
+_LOCK = threading.Lock()
+_ESTATS = {"secoes": 0, "sem_ia": 0, "resto_ia": 0, "texto_ia": 0}
+
+
+def _tokens(linha: str) -> list[str]:
+    return [t.strip() for t in linha.split("|") if t.strip()]
+
+
+def _cobertura(reconhecidos: int, total: int) -> float:
+    return reconhecidos / total if total else 0.0
+
+
+# ── Laboratoriais ──────────────────────────────────────────────────────────────
+
+def _token_lab(tok: str) -> bool:
+    if tok.startswith("Urn:"):
+        return bool(parser_lab._parse_urn(tok[4:].strip()))
+    return bool(parser_lab._extrair_par_sigla_valor(tok))
+
+
+def _rotear_lab(texto: str, data_hoje: date) -> tuple[dict, float, str]:
+    reconhecidos = total = 0
+    resto = []
+    for ln in (ln.strip() for ln in texto.splitlines()):
+        if not ln:
+            continue
+        m = parser_lab._RE_LINHA_EXAME.match(ln)
+        parsed = parser_lab._parse_linha_exame(ln)
+        prefixo = parsed[0] if parsed else ""
+        data_ok = parsed is not None and (parsed[2] is not None or parser_lab._parse_data_br(prefixo))
+        if not m or not data_ok:
+            # Linha fora do formato (ou data ilegível): vai inteira para a IA
+            total += max(1, len(_tokens(ln)))
+            resto.append(ln)
+            continue
+        faltam = []
+        for tok in _tokens(m.group(2)):
+            total += 1
+            if _token_lab(tok):
+                reconhecidos += 1
+            else:
+                faltam.append(tok)
+        if faltam:
+            resto.append(f"{prefixo} – {' | '.join(faltam)}")
+    dados = parser_lab.parse_lab_deterministico(texto, data_hoje=data_hoje)
+    return dados, _cobertura(reconhecidos, total), "\n".join(resto)
+
+
+# ── Controles & Balanço ────────────────────────────────────────────────────────
+
+_RE_PERIODO = re.compile(r"^#\s*Controles\s*[-–]\s*\d+\s*horas", re.IGNORECASE)
+_RE_BLOCO = re.compile(r"^>\s*(\d{1,2}/\d{1,2}/\d{2,4})\s*$")
+
+
+def _token_vitais(tok: str) -> bool:
+    return any(parser_controles._extrair_min_max(tok, sigla) for sigla, _ in parser_controles._MAP_VITAIS)
+
+
+def _token_balanco(tok: str) -> bool:
+    return bool(re.match(r"^(Balanço Hídrico Total|Diurese):\s*\S", tok, re.IGNORECASE))
+
+
+def _rotear_controles(texto: str, data_hoje: date) -> tuple[dict, float, str]:
+    reconhecidos = total = 0
+    resto = []
+    # (cabeçalho "> data" ou None, data válida, linhas do bloco)
+    blocos = [(None, False, [])]
+    for ln in (ln.strip() for ln in texto.splitlines()):
+        if not ln:
+            continue
+        m = _RE_BLOCO.match(ln)
+        if m:
+            blocos.append((ln, parser_controles._parse_data_br(m.group(1)) is not None, []))
+        elif _RE_PERIODO.match(ln):
+            total += 1
+            reconhecidos += 1
+        else:
+            blocos[-1][2].append(ln)
+
+    for cabecalho, data_ok, linhas in blocos:
+        if cabecalho is not None and data_ok:
+            total += 1
+            reconhecidos += 1
+        # Como o parser: a última linha com PAS:/PAD: é a de vitais, a última
+        # com "Balanço Hídrico Total" a de balanço; as demais ele ignora
+        i_vitais = i_balanco = -1
+        if data_ok:
+            for i, ln in enumerate(linhas):
+                if "Balanço Hídrico Total" in ln:
+                    i_balanco = i
+                elif "PAS:" in ln or "PAD:" in ln:
+                    i_vitais = i
+        faltam = []
+        for i, ln in enumerate(linhas):
+            tokens = _tokens(ln)
+            if i == i_vitais or i == i_balanco:
+                eh_valido = _token_vitais if i == i_vitais else _token_balanco
+                nao = [t for t in tokens if not eh_valido(t)]
+            else:
+                nao = tokens
+            total += len(tokens)
+            reconhecidos += len(tokens) - len(nao)
+            if nao:
+                faltam.append(" | ".join(nao))
+        if cabecalho is not None and not data_ok:
+            total += 1
+            faltam.insert(0, cabecalho)
+        elif cabecalho is not None and faltam:
+            faltam.insert(0, cabecalho)
+        resto.extend(faltam)
+    dados = parser_controles.parse_controles_deterministico(texto, data_hoje=data_hoje)
+    return dados, _cobertura(reconhecidos, total), "\n".join(resto)
+
+
+# ── Sistemas ───────────────────────────────────────────────────────────────────
+
+_RE_EVOLUCAO = re.compile(r"^#\s*Evolu[çc][ãa]o\s+por\s+sistemas?", re.IGNORECASE)
+_PARSERS_SISTEMAS = {titulo.lower(): fn for titulo, fn in parser_sistemas._SECOES_PARSER}
+
+
+def _rotear_sistemas(texto: str, data_hoje: date) -> tuple[dict, float, str]:
+    reconhecidos = total = 0
+    resto = []
+    blocos = [(None, [])]   # (linha "- Sistema" ou None, linhas do bloco)
+    for ln in (ln.strip() for ln in texto.splitlines()):
+        if not ln:
+            continue
+        if _RE_EVOLUCAO.match(ln):
+            total += 1
+            reconhecidos += 1
+        elif re.match(r"^-\s*\w", ln):
+            blocos.append((ln, []))
+        else:
+            blocos[-1][1].append(ln)
+
+    for cabecalho, linhas in blocos:
+        titulo = cabecalho.lstrip("-").strip().lower() if cabecalho else ""
+        parser_fn = _PARSERS_SISTEMAS.get(titulo)
+        if cabecalho is not None:
+            total += 1
+            reconhecidos += parser_fn is not None
+        faltam = []
+        for ln in linhas:
+            tokens = _tokens(ln)
+            nao = [t for t in tokens if parser_fn is None or not parser_fn(t)]
+            total += len(tokens)
+            reconhecidos += len(tokens) - len(nao)
+            if nao:
+                faltam.append(" | ".join(nao))
+        if cabecalho is not None and (faltam or parser_fn is None):
+            faltam.insert(0, cabecalho)
+        resto.extend(faltam)
+    dados = {
+        k: v for k, v in parser_sistemas.parse_sistemas_deterministico(texto).items()
+        if v is not None and str(v).strip() != ""
+    }
+    return dados, _cobertura(reconhecidos, total), "\n".join(resto)
+
+
+ROTEADORES = {
+    "laboratoriais": _rotear_lab,
+    "controles":     _rotear_controles,
+    "sistemas":      _rotear_sistemas,
+}
+
+
+def rotear(secao: str, texto: str, data_hoje: date | None = None) -> tuple[dict, float, str]:
+    """
+    (dados do parser, cobertura 0-1, resto para a IA) de uma seção de
+    ROTEADORES. resto vazio: o parser deu conta de tudo.
+    """
+    return ROTEADORES[secao](texto, data_hoje or date.today())
+
+
+# ── Junção com a resposta do agente ────────────────────────────────────────────
+
+def _realinhar(secao: str, dados_ia: dict, data_hoje: date) -> dict:
+    """
+    O agente numera os conjuntos pelo que recebeu (o resto pode ter só o
+    exame de ontem, que ele põe em lab_1): renomeia cada slot da resposta
+    para o slot que o parser daria à data dele.
+    """
+    if secao == "laboratoriais":
+        padrao, prefixo = re.compile(r"^lab_(\d+)_data$"), "lab_{}_"
+
+        def _destino(data_str):
+            if data_str.split()[0].lower() in parser_lab._LAB_EXTERNO_KEYWORDS:
+                return "4"
+            d = parser_lab._parse_data_br(data_str)
+            return str(parser_lab._slot_por_data(d, data_hoje)) if d else ""
+    elif secao == "controles":
+        padrao, prefixo = re.compile(r"^ctrl_([a-z0-9]+)_data$"), "ctrl_{}_"
+
+        def _destino(data_str):
+            d = parser_controles._parse_data_br(data_str)
+            return parser_controles._slot_por_data(d, data_hoje) if d else ""
+    else:
+        return dados_ia
+
+    destinos = {}
+    for k, v in dados_ia.items():
+        m = padrao.match(k)
+        if m and isinstance(v, str) and v.strip():
+            destinos[m.group(1)] = _destino(v.strip())
+    if not destinos:
+        return dados_ia
+    saida = {}
+    for k, v in dados_ia.items():
+        slot = next((s for s in destinos if k.startswith(prefixo.format(s))), None)
+        if slot is None or destinos[slot] == "":
+            saida.setdefault(k, v)     # sem data legível: fica onde o agente pôs
+        elif destinos[slot] is not None:
+            saida[prefixo.format(destinos[slot]) + k[len(prefixo.format(slot)):]] = v
+        # destino None: data fora da janela de controles, descartada como no parser
+    return saida
+
+
+def _contar(chave: str) -> None:
+    with _LOCK:
+        _ESTATS[chave] += 1
+
+
+async def completar(secao: str, texto: str, rota: tuple, chamar_agente,
+                    data_hoje: date | None = None) -> dict:
+    """
+    Dados da seção a partir da rota de rotear(): só do parser, se não sobrou
+    resto; senão junta a resposta de `chamar_agente(texto)` (corrotina do
+    agente) com os do parser, que prevalecem. Se o agente falhar e o parser
+    tiver dados, eles voltam com "_aviso" (o erro do agente).
+    """
+    dados, cobertura, resto = rota
+    _contar("secoes")
+    if not resto:
+        _contar("sem_ia")
+        return dict(dados)
+    if cobertura >= LIMIAR_COBERTURA:
+        _contar("resto_ia")
+        entrada = resto
+    else:
+        _contar("texto_ia")
+        entrada = texto
+    try:
+        dados_ia = await chamar_agente(entrada)
+    except Exception as e:
+        if not dados:
+            raise
+        return {**dados, "_aviso": f"IA não respondeu ({e}); usados só os dados do formato padrão"}
+    if "_erro" in dados_ia:
+        if not dados:
+            return dados_ia
+        return {**dados, "_aviso": dados_ia["_erro"]}
+    dados_ia = _realinhar(secao, dados_ia, data_hoje or date.today())
+    return {**dados_ia, **dados}
+
+
+def estatisticas() -> dict:
+    """Seções roteadas: resolvidas sem IA, com IA só no resto, com IA no texto inteiro."""
+    with _LOCK:
+        return dict(_ESTATS)
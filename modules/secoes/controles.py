@@ -28,6 +28,28 @@ _LABEL_DIA = {
 }
 
 
+def rotulo_campo(campo: str) -> str | None:
+    """Rótulo legível de ctrl_{dia}_{parâmetro}[_min|_max]: "Frequência Cardíaca (bpm) — máx (Hoje)"."""
+    if campo == "ctrl_periodo":
+        return "Período dos controles"
+    if campo == "ctrl_conduta":
+        return "Conduta"
+    for dia in _DIAS:
+        prefixo = f"ctrl_{dia}_"
+        if not campo.startswith(prefixo):
+            continue
+        resto = campo[len(prefixo):]
+        if resto == "data":
+            return f"Data ({_LABEL_DIA[dia]})"
+        for chave, label, min_max in _PARAMS:
+            if resto == chave:
+                return f"{label} ({_LABEL_DIA[dia]})"
+            if min_max and resto in (f"{chave}_min", f"{chave}_max"):
+                extremo = "mín" if resto.endswith("_min") else "máx"
+                return f"{label} — {extremo} ({_LABEL_DIA[dia]})"
+    return None
+
+
 def _deslocar_dias():
     """
     Desloca 5 slots: ant5 some | ant4→ant5 | anteontem→ant4 | ontem→anteontem | hoje→ontem | hoje vazio.
@@ -132,6 +132,87 @@ _SLOT_TITULOS = {
     4: "Admissão / Externo",
 }
 
+# Rótulos das linhas do formulário por sufixo (painel de mudanças); iguais aos de _render_labs_table
+_ROTULOS = {
+    "data":      "Data",
+    "hb":        "Hb",
+    "ht":        "Ht",
+    "vcm":       "VCM",
+    "hcm":       "HCM",
+    "rdw":       "RDW",
+    "leuco":     "Leuco (Dif)",
+    "plaq":      "Plaq",
+    "cr":        "Cr",
+    "ur":        "Ur",
+    "na":        "Na",
+    "k":         "K",
+    "mg":        "Mg",
+    "pi":        "Pi",
+    "cat":       "CaT",
+    "cai":       "CaI",
+    "tgp":       "TGP",
+    "tgo":       "TGO",
+    "fal":       "FAL",
+    "ggt":       "GGT",
+    "bt":        "BT",
+    "bd":        "BD",
+    "prot_tot":  "Prot Tot",
+    "alb":       "Alb",
+    "amil":      "Amil",
+    "lipas":     "Lipas",
+    "cpk":       "CPK",
+    "cpk_mb":    "CPK-MB",
+    "bnp":       "BNP",
+    "trop":      "Trop",
+    "pcr":       "PCR",
+    "vhs":       "VHS",
+    "tp":        "TP",
+    "ttpa":      "TTPa",
+    "gas_hora":  "Hora",
+    "gas_ph":    "pH",
+    "gas_pco2":  "pCO2",
+    "gas_po2":   "pO2",
+    "gas_hco3":  "HCO3",
+    "gas_be":    "BE",
+    "gas_sat":   "SatO2",
+    "gas_lac":   "Lac",
+    "gas_ag":    "AG",
+    "gas_cl":    "Cl",
+    "gas_na":    "Na (g)",
+    "gas_k":     "K (g)",
+    "gas_cai":   "CaI (g)",
+    "gasv_pco2": "pCO2(v)",
+    "svo2":      "SvO2",
+    "ur_dens":   "Dens",
+    "ur_le":     "L.Est",
+    "ur_nit":    "Nit",
+    "ur_leu":    "Leuco (U)",
+    "ur_hm":     "Hm",
+    "ur_prot":   "Prot",
+    "ur_cet":    "Cet",
+    "ur_glic":   "Glic",
+    "outros":    "Não Transcritos",
+    "conduta":   "Conduta",
+}
+
+
+def rotulo_campo(campo: str) -> str | None:
+    """Rótulo legível de lab_{slot}_{sufixo}: "Hb (Ontem)", "pH · Gas 2 (Hoje)"."""
+    partes = campo.split("_", 2)
+    if len(partes) < 3 or partes[0] != "lab" or not partes[1].isdigit():
+        return None
+    slot, suf = int(partes[1]), partes[2]
+    gas = ""
+    if suf.startswith(("gas2", "gas3")):
+        # Gasometrias 2/3 repetem os sufixos da 1 (gas2_ph, gas2v_pco2, gas2_svo2)
+        gas = f" · Gas {suf[3]}"
+        suf = "gas" + suf[4:]
+        suf = "svo2" if suf == "gas_svo2" else suf
+    rotulo = "Tipo" if suf == "gas_tipo" else _ROTULOS.get(suf)
+    if rotulo is None:
+        return None
+    return f"{rotulo}{gas} ({_SLOT_TITULOS.get(slot, f'Exame #{slot}')})"
+
 _SEC_STYLE = (
     'font-size:0.73rem;font-weight:700;color:#1565c0;'
     'text-transform:uppercase;letter-spacing:.06em;'
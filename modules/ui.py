@@ -1,10 +1,14 @@
 """
 Módulo de componentes de UI reutilizáveis para o Intensiva Calculator.
 """
+import re
 from datetime import datetime
 import streamlit as st
 import streamlit.components.v1 as components
 
+# fichas importa ui: usar só fichas.<nome> dentro de funções (import circular)
+from modules import fichas
+
 # Cores padrão para cabeçalhos de seção
 COLOR_BLUE = "#2563eb"
 COLOR_GREEN = "#16a34a"
@@ -257,3 +261,107 @@ def render_guia_navegacao():
         """,
         unsafe_allow_html=True,
     )
+
+
+def render_status_sincronizacao(status: dict | None):
+    """
+    Indicador discreto da fila de escrita (write-behind) das evoluções.
+    status: dict de utils.status_sincronizacao() — None oculta o indicador.
+    """
+    if not status:
+        return
+    pendentes = status.get("pendentes", 0)
+    if not status.get("service_account", True):
+        if pendentes:
+            plural = "evolução salva" if pendentes == 1 else "evoluções salvas"
+            st.caption(f"💾 Somente local: {pendentes} {plural} neste servidor — Google Sheets não configurado.")
+        else:
+            st.caption("💾 Somente local: Google Sheets não configurado; as evoluções ficam salvas neste servidor.")
+        return
+    if not pendentes:
+        if status.get("conectado"):
+            ultimo = status.get("ultimo_envio") or 0
+            hora = f" às {datetime.fromtimestamp(ultimo).strftime('%H:%M')}" if ultimo else ""
+            st.caption(f"☁️ Evoluções sincronizadas com o Google Sheets{hora}.")
+        elif status.get("ultimo_erro"):
+            st.caption("📴 Sem conexão com o Google Sheets — novas evoluções ficam salvas localmente até a conexão voltar.")
+        else:
+            st.caption("🔄 Conectando ao Google Sheets...")
+        return
+    plural = "evolução aguardando" if pendentes == 1 else "evoluções aguardando"
+    if status.get("ultimo_erro"):
+        espera = int(status.get("proxima_tentativa_seg") or 0)
+        st.caption(
+            f"⏳ {pendentes} {plural} envio — Google Sheets indisponível, "
+            f"nova tentativa em {espera}s. Os dados estão salvos localmente."
+        )
+    else:
+        st.caption(f"🔄 Sincronizando {pendentes} {plural} envio ao Google Sheets...")
+
+
+def render_censo(df):
+    """
+    Tabela única da passagem de plantão (um paciente por linha).
+    df: DataFrame de utils.carregar_censo().
+    """
+    if df is None or df.empty:
+        st.info("Nenhum paciente com evolução registrada no período.")
+        return
+    tabela = df.copy()
+    tabela["dias_uti"] = tabela["di_uti"].map(_dias_internados_valor)
+    tabela["paliativo"] = tabela["paliativo"].map(lambda v: "🕊️" if v else "")
+    st.dataframe(
+        tabela[[
+            "leito", "nome", "prontuario", "idade", "dias_uti",
+            "diagnosticos", "paliativo", "conduta", "ultima_evolucao",
+        ]],
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "leito": st.column_config.TextColumn("Leito", width="small"),
+            "nome": st.column_config.TextColumn("Paciente"),
+            "prontuario": st.column_config.TextColumn("Prontuário", width="small"),
+            "idade": st.column_config.TextColumn("Idade", width="small"),
+            "dias_uti": st.column_config.TextColumn("UTI", width="small"),
+            "diagnosticos": st.column_config.TextColumn("Diagnósticos atuais", width="large"),
+            "paliativo": st.column_config.TextColumn("Paliativo", width="small"),
+            "conduta": st.column_config.TextColumn("Plano / Condutas", width="large"),
+            "ultima_evolucao": st.column_config.TextColumn("Última evolução", width="small"),
+        },
+    )
+
+
+_PAT_MARKDOWN = re.compile(r"([\\`*_~$\[\]<>#|])")
+
+
+def _escapar_markdown(texto: str) -> str:
+    """Texto livre literal no st.markdown: sem LaTeX ($), ênfase (* _ ~), links etc."""
+    return _PAT_MARKDOWN.sub(r"\\\1", texto)
+
+
+def _valor_curto(valor, limite: int = 60) -> str:
+    texto = " ".join(str(valor).split())
+    texto = texto if len(texto) <= limite else texto[: limite - 1] + "…"
+    return _escapar_markdown(texto)
+
+
+def _rotulo_campo(campo: str) -> str:
+    return _escapar_markdown(fichas.rotulo_campo(campo))
+
+
+def render_mudancas(secoes: dict, desde: str):
+    """
+    Painel compacto "mudanças desde a última evolução".
+    secoes: resultado de comparacao.comparar(); desde: data/hora da evolução de referência.
+    """
+    total = sum(len(g["alterados"]) + len(g["adicionados"]) + len(g["removidos"]) for g in secoes.values())
+    titulo = f"🔎 Mudanças desde a evolução de {desde}" if desde else "🔎 Mudanças desde a última evolução"
+    with st.expander(f"{titulo} — {total} campo(s)" if total else f"{titulo} — sem mudanças"):
+        if not total:
+            st.caption("Nenhum campo difere da evolução de referência.")
+            return
+        for grupo in secoes.values():
+            itens = [f"~ {_rotulo_campo(c)}: {_valor_curto(a)} → **{_valor_curto(d)}**" for c, a, d in grupo["alterados"]]
+            itens += [f"+ {_rotulo_campo(c)}: **{_valor_curto(d)}**" for c, d in grupo["adicionados"]]
+            itens += [f"− {_rotulo_campo(c)}: ~~{_valor_curto(a)}~~" for c, a in grupo["removidos"]]
+            st.markdown(f"**{grupo['rotulo']}**  \n" + "  \n".join(itens))
@@ -0,0 +1,81 @@
+"""
+Compara tamanho e tempo de codificação/decodificação dos codecs de dados_json.
+Execute da raiz: python scripts/benchmark_codec.py [n_payloads]
+
+Payloads sintéticos a partir do registro de campos: uma fração dos campos
+preenchida com valores típicos (números de exame, datas, frases curtas), nas
+formas completa (todos os campos, como antes da serialização esparsa) e
+esparsa (fichas.compactar_campos).
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+raiz = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(raiz))
+
+from modules.fichas import _campos_base, compactar_campos
+from modules.persistencia import codec
+
+_FRASES = [
+    "Em melhora clínica.", "Manter conduta.", "Sem intercorrências nas últimas 24h.",
+    "Meropenem 1g EV 8/8h", "Desmame de DVA em curso.", "Aguarda resultado de cultura.",
+]
+
+
+def _valor(chave: str, rng: random.Random) -> str:
+    if "data" in chave:
+        return f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2026"
+    if any(p in chave for p in ("_hoje", "_ult", "_antepen", "_ant4", "_ant5")):
+        return f"{rng.uniform(0.5, 300):.1f}"
+    return rng.choice(_FRASES)
+
+
+def _payloads(n: int, fracao: float = 0.12) -> list[dict]:
+    base = _campos_base()
+    chaves_texto = [k for k, v in base.items() if isinstance(v, str)]
+    rng = random.Random(42)
+    saida = []
+    for i in range(n):
+        dados = dict(base)
+        for k in rng.sample(chaves_texto, int(len(chaves_texto) * fracao)):
+            dados[k] = _valor(k, rng)
+        dados["prontuario"] = str(1000000 + i)
+        dados["nome"] = f"Paciente {i}"
+        saida.append(dados)
+    return saida
+
+
+def _medir(nome: str, payloads: list[dict], codificar) -> None:
+    t0 = time.perf_counter()
+    textos = [codificar(p) for p in payloads]
+    t_enc = (time.perf_counter() - t0) / len(payloads) * 1000
+    t0 = time.perf_counter()
+    for t in textos:
+        codec.descomprimir(t)
+    t_dec = (time.perf_counter() - t0) / len(payloads) * 1000
+    tamanho = sum(len(t) for t in textos) / len(textos)
+    print(f"{nome:<26} {tamanho:>9.0f} {t_enc:>10.3f} {t_dec:>10.3f}")
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    completos = _payloads(n)
+    esparsos = [compactar_campos(p) for p in completos]
+    variantes = [
+        ("GZ1", codec.comprimir_gz1),
+        ("GZ2 nível 9 b64", lambda d: codec.comprimir(d, nivel=9)),
+        ("GZ2 nível 6 b64", lambda d: codec.comprimir(d, nivel=6)),
+        ("GZ2 nível 1 b64", lambda d: codec.comprimir(d, nivel=1)),
+        ("GZ2 nível 9 b85", lambda d: codec.comprimir(d, nivel=9, alfabeto="b85")),
+    ]
+    for titulo, payloads in (("completo", completos), ("esparso", esparsos)):
+        print(f"\n== {n} payloads ({titulo}) ==")
+        print(f"{'codec':<26} {'chars':>9} {'enc (ms)':>10} {'dec (ms)':>10}")
+        for nome, fn in variantes:
+            _medir(nome, payloads, fn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark offline da camada de persistência (sem Google Sheets real).
+Execute da raiz: python scripts/benchmark_persistencia.py [n_pacientes] [latencia_ms] [taxa_erro_quota]
+
+Usa o backend em memória (modules.persistencia.planilha_fake) com latência e
+erros 429 injetados, e um diretório temporário para o espelho local. Mede
+save_evolucao, load_evolucao e load_data e conta as requisições feitas à
+"planilha".
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+raiz = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(raiz))
+os.environ.setdefault("INTENSIVA_DADOS_DIR", tempfile.mkdtemp(prefix="bench_persist_"))
+
+from modules.persistencia import espelho, planilha_fake
+import utils
+
+
+def _cronometrar(rotulo: str, fn, repeticoes: int) -> None:
+    t0 = time.perf_counter()
+    for i in range(repeticoes):
+        fn(i)
+    total = time.perf_counter() - t0
+    print(f"{rotulo:<32} {total / repeticoes * 1000:>9.1f} ms/op   ({repeticoes} ops)")
+
+
+def _verificar_save_antes_da_carga(backend) -> None:
+    """
+    Save + load com a carga inicial do espelho segurada: o espelho só tem o
+    delta recém-salvo, e o load precisa continuar achando a evolução (base
+    na planilha + delta pendente). Roda antes de qualquer outro uso do espelho.
+    """
+    pront = "9000"
+    base = {"nome": "Paciente", **{f"lab_1_campo_{i}": str(i) for i in range(40)}}
+    backend.criar_aba(utils.SHEET_URL, "EVOLUCOES", ["prontuario", "nome", "data_hora", "dados_json"],
+                      [[pront, "Paciente", "01/03/2026 08:00", utils._comprimir_dados(base)]])
+
+    liberar = threading.Event()
+    ler_cauda = utils._ler_cauda_evolucoes
+
+    def _ler_cauda_segurada(particao, inicio):
+        liberar.wait()
+        return ler_cauda(particao, inicio)
+
+    utils._ler_cauda_evolucoes = _ler_cauda_segurada
+    try:
+        novo = {**base, "lab_1_hb": "9.1"}
+        utils.save_evolucao(pront, "Paciente", novo)
+        carregado = utils.load_evolucao(pront) or {}
+        ok = espelho.pronto() is False and all(carregado.get(k) == v for k, v in novo.items())
+        print(f"load logo após o save, antes da carga inicial: {'ok' if ok else 'FALHOU'} "
+              f"(pronto={espelho.pronto()}, lab_1_hb={carregado.get('lab_1_hb')!r})")
+    finally:
+        liberar.set()
+        utils._ler_cauda_evolucoes = ler_cauda
+    inicio = time.time()
+    while not espelho.pronto() and time.time() - inicio < 60:
+        time.sleep(0.2)
+    print(f"carga inicial concluída em {time.time() - inicio:.1f}s após liberada\n")
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latencia = (float(sys.argv[2]) if len(sys.argv) > 2 else 150) / 1000
+    taxa_erro = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+
+    backend = planilha_fake.instalar(latencia_seg=latencia, jitter_seg=latencia / 3,
+                                     taxa_erro_quota=taxa_erro, semente=1)
+    backend.criar_aba(utils.SHEET_URL, "DB_INFUSAO", list(utils._DADOS_INFUSAO_PADRAO[0].keys()),
+                      [list(d.values()) for d in utils._DADOS_INFUSAO_PADRAO])
+    print(f"latência {latencia * 1000:.0f} ms, erro 429 {taxa_erro:.0%}, {n} pacientes\n")
+    _verificar_save_antes_da_carga(backend)
+
+    dados = {"nome": "Paciente", "hd_1_nome": "Sepse", "lab_1_hb": "9.1"}
+    _cronometrar("save_evolucao", lambda i: utils.save_evolucao(str(1000 + i), f"P{i}", dados), n)
+    _cronometrar("load_evolucao", lambda i: utils.load_evolucao(str(1000 + i)), n)
+    _cronometrar("load_data (aba invalidada)", lambda i: (utils.invalidar_aba("DB_INFUSAO"), utils.load_data("DB_INFUSAO")), n)
+
+    # Espera o reconciliador esvaziar a fila de pendentes
+    inicio = time.time()
+    while (utils.status_sincronizacao() or {}).get("pendentes") and time.time() - inicio < 120:
+        utils._RECONCILIADOR.acordar()
+        time.sleep(0.5)
+    status = utils.status_sincronizacao() or {}
+    linhas = sum(1 for l in backend.linhas(utils.SHEET_URL, "EVOLUCOES")[1:] if l[0] != "9000")
+    print(f"\nsincronização: {linhas}/{n} linhas na planilha em {time.time() - inicio:.1f}s, "
+          f"pendentes={status.get('pendentes')}, conectado={status.get('conectado')}, último erro={status.get('ultimo_erro')}")
+    print("requisições:", dict(backend.chamadas))
+    planilha_fake.desinstalar()
+
+
+if __name__ == "__main__":
+    main()
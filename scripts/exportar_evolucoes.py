@@ -0,0 +1,75 @@
+"""
+Exporta o arquivo completo de evoluções para análise (Parquet ou Arrow IPC).
+Execute da raiz: python scripts/exportar_evolucoes.py [destino] [opções]
+
+Lê as abas de evolução (EVOLUCOES + partições mensais) uma de cada vez — ou o
+espelho local com --fonte espelho, sem rede — e decodifica os dados_json num
+pool de processos, com uma coluna por campo do registro (fichas). Saída
+particionada por aba, legível por pandas, pyarrow ou DuckDB:
+
+    import pandas as pd
+    df = pd.read_parquet("exportacao/evolucoes")
+
+Opções:
+    --fonte planilha|espelho   origem das linhas (padrão: planilha; requer a
+                               service account em .streamlit/secrets.toml)
+    --formato parquet|ipc      Parquet (zstd) ou Arrow IPC (padrão: parquet)
+    --processos N              processos de decodificação (padrão: nº de CPUs, até 8)
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+raiz = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(raiz))
+
+from modules.fichas import _campos_base
+from modules.persistencia import conexao, espelho, exportacao, particoes
+
+
+def _abas_planilha(url: str):
+    sh = conexao.obter_planilha(url)
+    if sh is None:
+        sys.exit("ERRO: service account não configurada (.streamlit/secrets.toml). Use --fonte espelho.")
+    for aba in particoes.listar(url, forcar=True) or []:
+        valores = sh.worksheet(aba).get_all_values()
+        yield aba, [
+            (i + 2, *(list(l) + ["", "", "", ""])[:4]) for i, l in enumerate(valores[1:])
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exporta as evoluções para Parquet/Arrow IPC.")
+    parser.add_argument("destino", nargs="?", default="exportacao/evolucoes")
+    parser.add_argument("--fonte", choices=["planilha", "espelho"], default="planilha")
+    parser.add_argument("--formato", choices=list(exportacao.FORMATOS), default="parquet")
+    parser.add_argument("--processos", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.fonte == "espelho":
+        if not espelho.pronto():
+            print("AVISO: o espelho local ainda não terminou a carga inicial — exportação parcial.")
+        abas = espelho.por_particao()
+    else:
+        from utils import SHEET_URL
+        abas = _abas_planilha(SHEET_URL)
+
+    def _progresso(particao: str, linhas: int, arquivos: int) -> None:
+        print(f"  {particao:<20} {linhas:>8} linha(s) em {arquivos} arquivo(s)")
+
+    t0 = time.perf_counter()
+    resumo = exportacao.exportar(
+        abas, args.destino, _campos_base(), formato=args.formato,
+        processos=args.processos, progresso=_progresso,
+    )
+    print(
+        f"OK - {resumo['linhas']} evolução(ões) de {resumo['particoes']} aba(s) em "
+        f"{resumo['arquivos']} arquivo(s) ({time.perf_counter() - t0:.1f}s) → {args.destino}"
+    )
+    if resumo["irrecuperaveis"]:
+        print(f"     {resumo['irrecuperaveis']} linha(s) com base de delta ausente (recuperada = false)")
+
+
+if __name__ == "__main__":
+    main()
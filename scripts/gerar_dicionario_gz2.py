@@ -0,0 +1,30 @@
+"""
+Gera um novo dicionário congelado do codec GZ2 a partir do registro de campos.
+Execute da raiz: python scripts/gerar_dicionario_gz2.py <versao>
+
+Salva em modules/persistencia/dicionarios/gz2_v<versao>.txt. Nunca sobrescreve
+uma versão existente (células já gravadas dependem dela). Depois de gerar,
+atualize DICIONARIO_ATUAL em modules/persistencia/codec.py.
+"""
+import sys
+from pathlib import Path
+
+raiz = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(raiz))
+
+from modules.fichas import _campos_base
+from modules.persistencia import codec
+
+if len(sys.argv) != 2:
+    print(__doc__)
+    sys.exit(1)
+
+versao = sys.argv[1]
+destino = raiz / "modules" / "persistencia" / "dicionarios" / f"gz2_v{versao}.txt"
+if destino.exists():
+    print(f"ERRO - {destino.name} já existe; escolha outra versão.")
+    sys.exit(1)
+
+dicionario = codec.construir_dicionario(_campos_base())
+destino.write_bytes(dicionario)
+print(f"OK - {destino} ({len(dicionario)} bytes)")
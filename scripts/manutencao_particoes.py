@@ -0,0 +1,24 @@
+"""
+Job de manutenção das partições mensais da aba de evoluções.
+Execute da raiz (diariamente, ex. via cron): python scripts/manutencao_particoes.py
+
+Idempotente. Na primeira execução liga o particionamento: cria a aba
+EVOLUCOES_MANIFESTO e registra nela os prontuários da aba EVOLUCOES (backfill).
+Em toda execução cria as partições do mês corrente e do seguinte (rotação) e
+repara entradas do manifesto que faltem nas duas partições mais recentes.
+Requer a service account em .streamlit/secrets.toml.
+"""
+import sys
+from pathlib import Path
+
+raiz = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(raiz))
+
+from modules.persistencia import particoes
+from utils import SHEET_URL
+
+resumo = particoes.manutencao(SHEET_URL)
+print(f"OK - backfill: {resumo['backfill']} prontuário(s) do legado registrados no manifesto")
+print(f"     partições criadas: {', '.join(resumo['criadas']) or 'nenhuma'}")
+print(f"     entradas reparadas: {resumo['reparadas']}")
+print(f"     abas de evolução: {', '.join(particoes.listar(SHEET_URL, forcar=True) or [])}")
@@ -0,0 +1,47 @@
+"""
+Fixtures comuns. Execute da raiz: python -m pytest -q
+
+Nada toca o Google Sheets real: as abas ficam no backend em memória
+(modules.persistencia.planilha_fake) e o espelho SQLite num diretório
+temporário por teste.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+raiz = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(raiz))
+os.environ.setdefault("INTENSIVA_DADOS_DIR", tempfile.mkdtemp(prefix="testes_intensiva_"))
+
+from modules.persistencia import espelho, planilha_fake
+
+URL = "https://planilha.teste/evolucoes"
+CABECALHO = ["prontuario", "nome", "data_hora", "dados_json"]
+
+
+@pytest.fixture
+def backend():
+    """Planilha em memória instalada no lugar do gspread/st.connection."""
+    b = planilha_fake.instalar(semente=1)
+    yield b
+    planilha_fake.desinstalar()
+
+
+@pytest.fixture
+def espelho_vazio(tmp_path, monkeypatch):
+    """Espelho local novo (arquivo SQLite próprio) para o teste."""
+    monkeypatch.setenv("INTENSIVA_DADOS_DIR", str(tmp_path))
+
+    def _reabrir():
+        conn = getattr(espelho._LOCAL, "conn", None)
+        if conn is not None:
+            conn.close()
+        espelho._LOCAL.conn = None
+        espelho._CAMINHO = None
+
+    _reabrir()
+    yield espelho
+    _reabrir()
@@ -0,0 +1,36 @@
+from modules.persistencia import busca, codec, delta
+
+
+def _keyframe(leito):
+    return codec.comprimir({"nome": "Maria", "leito": leito})
+
+
+def test_linhas_fora_de_ordem_nao_regridem_o_paciente():
+    ind = busca.IndiceBusca()
+    ind.acrescentar([("10", "Maria Souza", "05/10/2026 08:00", _keyframe("Leito 7"))])
+    # Pendente antiga / aba anterior chegando depois: não volta o leito nem a data
+    ind.acrescentar([("10", "Maria Souza", "03/10/2026 08:00", _keyframe("Leito 2"))])
+    achado = ind.buscar("maria")[0]
+    assert (achado["leito"], achado["data_hora"]) == ("Leito 7", "05/10/2026 08:00")
+
+
+def test_lote_desordenado_usa_a_evolucao_mais_recente():
+    ind = busca.IndiceBusca()
+    base = {"nome": "Maria", "leito": "Leito 1"}
+    kf = codec.comprimir(base)
+    dl = delta.codificar(dict(base, leito="Leito 9"), [kf], codec.comprimir, codec.descomprimir)
+    ind.acrescentar([
+        ("10", "Maria Souza", "02/10/2026 08:00", dl),
+        ("10", "Maria Souza", "01/10/2026 08:00", kf),
+    ])
+    achado = ind.buscar("leito 9")[0]
+    assert (achado["prontuario"], achado["data_hora"]) == ("10", "02/10/2026 08:00")
+
+
+def test_busca_tolerante_a_erro_de_digitacao():
+    ind = busca.IndiceBusca()
+    ind.acrescentar([("10", "Maria Souza", "05/10/2026 08:00", _keyframe("Leito 7")),
+                     ("22", "João Pereira", "05/10/2026 09:00", _keyframe("Leito 3"))])
+    assert ind.buscar("mraia souza")[0]["prontuario"] == "10"
+    assert ind.buscar("joao")[0]["prontuario"] == "22"
+    assert ind.buscar("22")[0]["pontuacao"] == 1.0
@@ -0,0 +1,30 @@
+import pytest
+
+from modules.persistencia import codec
+
+DADOS = {"nome": "Paciente", "lab_1_hb": "9,1", "hd_1_nome": "Sepse — foco pulmonar", "n": 3, "ok": True}
+
+
+@pytest.mark.parametrize("alfabeto", ["b64", "b85"])
+def test_gz2_ida_e_volta(alfabeto):
+    texto = codec.comprimir(DADOS, alfabeto=alfabeto)
+    assert texto.startswith(f"{codec.GZ2_PREFIX}{codec.DICIONARIO_ATUAL}:{alfabeto}:")
+    assert codec.descomprimir(texto) == DADOS
+
+
+def test_gz2_menor_que_gz1():
+    assert len(codec.comprimir(DADOS)) < len(codec.comprimir_gz1(DADOS))
+
+
+def test_le_formatos_legados():
+    assert codec.descomprimir(codec.comprimir_gz1(DADOS)) == DADOS
+    assert codec.descomprimir('{"nome": "Paciente"}') == {"nome": "Paciente"}
+    assert codec.descomprimir_celula("") == {}
+    assert codec.descomprimir_celula(None) == {}
+
+
+def test_cabecalho_gz2_invalido():
+    with pytest.raises(ValueError):
+        codec.descomprimir(codec.GZ2_PREFIX + "sem-separadores")
+    with pytest.raises(ValueError):
+        codec.comprimir(DADOS, dicionario="999")
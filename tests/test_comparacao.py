@@ -0,0 +1,25 @@
+from modules import comparacao
+
+
+def test_agrupa_por_secao_na_ordem_do_formulario():
+    anterior = {"nome": "Paciente", "hd_1_nome": "Sepse", "lab_1_hb": "9,1"}
+    atual = {"nome": "Paciente", "hd_1_nome": "", "lab_1_hb": "8,4", "sis_renal_cr_hoje": "1,2"}
+    secoes = comparacao.comparar(anterior, atual)
+    assert list(secoes) == ["hd", "lab", "sis_renal"]
+    assert secoes["hd"]["removidos"] == [("hd_1_nome", "Sepse")]
+    assert secoes["lab"]["alterados"] == [("lab_1_hb", "9,1", "8,4")]
+    assert secoes["sis_renal"]["adicionados"] == [("sis_renal_cr_hoje", "1,2")]
+    assert secoes["lab"]["rotulo"] == "Laboratoriais"
+    assert comparacao.resumo(secoes) == {"alterados": 1, "adicionados": 1, "removidos": 1}
+
+
+def test_campo_ausente_vale_o_padrao():
+    # dict esparso × dict completo: "" ausente e "" explícito são iguais
+    assert comparacao.comparar({"lab_1_hb": ""}, {}) == {}
+    assert comparacao.comparar({"nome": None}, {"nome": ""}) == {}
+
+
+def test_ignora_campos_fora_do_conteudo_clinico():
+    anterior = {"texto_bruto_original": "a", "_data_hora": "01/10/2026", "campo_inexistente": 1}
+    atual = {"texto_bruto_original": "b", "_data_hora": "02/10/2026", "campo_inexistente": 2}
+    assert comparacao.comparar(anterior, atual) == {}
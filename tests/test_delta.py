@@ -0,0 +1,76 @@
+import base64
+import gzip
+import json
+
+from modules.persistencia import codec, delta
+
+
+def _historico(versoes, keyframe_cada=delta.KEYFRAME_CADA):
+    payloads = []
+    for dados in versoes:
+        payloads.append(delta.codificar(dados, payloads, codec.comprimir, codec.descomprimir,
+                                        keyframe_cada=keyframe_cada))
+    return payloads
+
+
+def _versoes(n):
+    base = {"nome": "Paciente", **{f"lab_1_campo_{i}": str(i) for i in range(40)}}
+    saida = []
+    for dia in range(n):
+        v = dict(base, lab_1_hb=f"9,{dia}")
+        if dia % 3 == 2:
+            v.pop("lab_1_campo_0")
+        saida.append(v)
+    return saida
+
+
+def test_primeira_versao_e_keyframe():
+    payloads = _historico(_versoes(1))
+    assert not delta.e_delta(payloads[0])
+    assert codec.descomprimir(payloads[0]) == _versoes(1)[0]
+
+
+def test_deltas_e_keyframes_ida_e_volta():
+    versoes = _versoes(12)
+    payloads = _historico(versoes, keyframe_cada=5)
+    eh_delta = [delta.e_delta(p) for p in payloads]
+    assert eh_delta == [False, True, True, True, True, False, True, True, True, True, False, True]
+    assert delta.reconstruir_historico(payloads, codec.descomprimir) == versoes
+    assert delta.reconstruir(payloads, codec.descomprimir)[-1] == versoes[-1]
+    for i in range(len(versoes)):
+        assert delta.reconstruir_versao(payloads, i, codec.descomprimir) == versoes[i]
+
+
+def test_delta_guarda_so_o_que_mudou():
+    versoes = _versoes(3)
+    payloads = _historico(versoes)
+    conteudo = delta.ler(payloads[2])
+    assert conteudo["s"] == {"lab_1_hb": "9,2"}
+    assert conteudo["d"] == ["lab_1_campo_0"]
+    assert conteudo["b"] == delta.assinatura(versoes[1])
+
+
+def test_base_perdida_fica_none():
+    payloads = _historico(_versoes(3))
+    payloads[0] = codec.comprimir({"nome": "Outro"})   # keyframe apagado/editado na planilha
+    versoes = delta.reconstruir_historico(payloads, codec.descomprimir)
+    assert versoes[0] == {"nome": "Outro"}
+    assert versoes[1] is None and versoes[2] is None
+
+
+def test_delta_usa_o_codec_gz2():
+    payloads = _historico(_versoes(2))
+    assert payloads[1].startswith(f"{delta.DL_PREFIX}{codec.DICIONARIO_ATUAL}:b64:")
+
+
+def test_le_deltas_dl1_legados():
+    versoes = _versoes(2)
+    corpo = {"b": delta.assinatura(versoes[0]), "k": 1, "s": {"lab_1_hb": "9,1"}, "d": []}
+    dl1 = "DL1:" + base64.b64encode(gzip.compress(json.dumps(corpo).encode("utf-8"))).decode("ascii")
+    payloads = [codec.comprimir(versoes[0]), dl1]
+    assert delta.e_delta(dl1)
+    assert delta.reconstruir_historico(payloads, codec.descomprimir) == versoes
+    # Um novo delta encadeia normalmente sobre a versão DL1
+    payloads.append(delta.codificar(dict(versoes[1], nome="Outro"), payloads,
+                                    codec.comprimir, codec.descomprimir))
+    assert delta.ler(payloads[-1])["b"] == delta.assinatura(versoes[1])
@@ -0,0 +1,115 @@
+import pytest
+
+from conftest import CABECALHO
+from modules.persistencia import delta, escrita, planilha_fake
+import utils
+
+ABA = "EVOLUCOES"
+
+
+def _reconciliador(espelho):
+    return espelho.Reconciliador(utils._enviar_evolucoes_lote, utils._ler_cauda_evolucoes,
+                                 listar_particoes=utils._listar_abas_evolucoes)
+
+
+def _journal(espelho, n):
+    for i in range(n):
+        espelho.inserir(str(100 + i), f"P{i}", f"0{1 + i % 9}/10/2026 08:{i:02d}", f"dados {i}")
+
+
+def _linhas_planilha(backend):
+    return [tuple(l) for l in backend.linhas(utils.SHEET_URL, ABA)[1:]]
+
+
+def _sincronizar(rec, espelho, tentativas=200):
+    for _ in range(tentativas):
+        rec.ciclo()
+        if not espelho.contar_pendentes():
+            return
+    pytest.fail(f"journal não esvaziou: {espelho.contar_pendentes()} pendentes")
+
+
+def test_replay_com_erros_de_quota_sem_duplicar(espelho_vazio):
+    backend = planilha_fake.instalar(taxa_erro_quota=0.3, semente=7)
+    try:
+        backend.criar_aba(utils.SHEET_URL, ABA, CABECALHO)
+        _journal(espelho_vazio, 30)
+        rec = _reconciliador(espelho_vazio)
+        _sincronizar(rec, espelho_vazio)
+        linhas = _linhas_planilha(backend)
+    finally:
+        planilha_fake.desinstalar()
+    assert backend.chamadas["erro_429"] > 0
+    assert len(linhas) == 30 and len(set(linhas)) == 30
+    numeros = [l[0] for _, linhas_aba in espelho_vazio.por_particao() for l in linhas_aba]
+    assert sorted(numeros) == list(range(2, 32))
+
+
+def test_append_aplicado_com_timeout_nao_reenvia(espelho_vazio, backend, monkeypatch):
+    backend.criar_aba(utils.SHEET_URL, ABA, CABECALHO)
+    original = escrita.acrescentar_com_cabecalho
+    falhas = [1]
+
+    def _aplica_e_estoura(*args, **kwargs):
+        resposta = original(*args, **kwargs)
+        if falhas[0]:
+            falhas[0] -= 1
+            raise TimeoutError("timeout lendo a resposta")
+        return resposta
+
+    monkeypatch.setattr(escrita, "acrescentar_com_cabecalho", _aplica_e_estoura)
+    _journal(espelho_vazio, 5)
+    rec = _reconciliador(espelho_vazio)
+    assert rec.enviar_pendentes() is False
+    assert len(_linhas_planilha(backend)) == 5        # o Google aplicou mesmo assim
+
+    _sincronizar(rec, espelho_vazio)
+    espelho_vazio.inserir("999", "Novo", "09/10/2026 10:00", "dados novo")
+    _sincronizar(rec, espelho_vazio)
+    linhas = _linhas_planilha(backend)
+    assert len(linhas) == 6 and len(set(linhas)) == 6
+
+
+def test_sem_leitura_de_confirmacao_nao_reenvia(espelho_vazio, backend, monkeypatch):
+    backend.criar_aba(utils.SHEET_URL, ABA, CABECALHO)
+    original = escrita.acrescentar_com_cabecalho
+
+    def _aplica_e_estoura(*args, **kwargs):
+        original(*args, **kwargs)
+        backend.falhar_proximas(100)                 # planilha cai logo depois do append
+        raise TimeoutError("timeout lendo a resposta")
+
+    monkeypatch.setattr(escrita, "acrescentar_com_cabecalho", _aplica_e_estoura)
+    _journal(espelho_vazio, 3)
+    rec = _reconciliador(espelho_vazio)
+    for _ in range(5):
+        assert rec.enviar_pendentes() is False
+    assert len(_linhas_planilha(backend)) == 3
+    assert espelho_vazio.contar_pendentes() == 3
+
+
+def test_aplicar_linhas_planilha_reconhece_pendentes(espelho_vazio):
+    espelho_vazio.inserir("1", "A", "01/10/2026 08:00", "x")
+    novas = espelho_vazio.aplicar_linhas_planilha(2, [["1", "A", "01/10/2026 08:00", "x"], ["2", "B", "", "y"]])
+    assert novas == 1
+    assert espelho_vazio.contar_pendentes() == 0
+    assert [r["linha"] for r in espelho_vazio.listar("1")] == [2]
+    assert espelho_vazio.ultima_linha_sincronizada() == 3
+
+
+def test_save_codifica_com_base_local_sem_ler_a_planilha(espelho_vazio, backend, monkeypatch):
+    # Espelho aberto sem a thread do reconciliador (nada é enviado durante o teste)
+    monkeypatch.setattr(utils, "_ESPELHO_OK", True)
+    monkeypatch.setattr(utils, "_RECONCILIADOR", _reconciliador(espelho_vazio))
+    base = {"nome": "Paciente", **{f"lab_1_campo_{i}": str(i) for i in range(40)}}
+    backend.criar_aba(utils.SHEET_URL, ABA, CABECALHO, [["500", "Paciente", "01/10/2026 08:00", utils._comprimir_dados(base)]])
+
+    # Carga inicial ainda não trouxe o paciente: keyframe, sem requisições
+    primeiro = utils._codificar_evolucao("500", dict(base, lab_1_hb="9,1"))
+    assert not delta.e_delta(primeiro)
+    assert sum(backend.chamadas.values()) == 0
+
+    espelho_vazio.inserir("500", "Paciente", "02/10/2026 08:00", primeiro)
+    segundo = utils._codificar_evolucao("500", dict(base, lab_1_hb="8,7"))
+    assert delta.e_delta(segundo)
+    assert sum(backend.chamadas.values()) == 0
@@ -0,0 +1,67 @@
+from conftest import CABECALHO, URL
+from modules.persistencia import cauda, indice
+
+ABA = "EVOLUCOES"
+
+
+def _linha(pront, n):
+    return [pront, f"P{pront}", f"0{n}/10/2026 08:00", f"dados {n}"]
+
+
+def test_indice_registra_append_sem_reler(backend):
+    backend.criar_aba(URL, ABA, CABECALHO, [_linha("1", 1), _linha("2", 2)])
+    assert indice.buscar_linhas(URL, ABA, "1") == [_linha("1", 1)]
+    leituras = backend.chamadas["get"]
+
+    aba = backend.cliente().open_by_url(URL).worksheet(ABA)
+    resposta = aba.append_rows([_linha("1", 3)])
+    indice.registrar_append(URL, ABA, "1", resposta)
+
+    assert indice.buscar_linhas(URL, ABA, "1") == [_linha("1", 1), _linha("1", 3)]
+    assert indice.buscar_linhas(URL, ABA, "1", ultimas=1) == [_linha("1", 3)]
+    assert backend.chamadas["get"] == leituras     # coluna A não foi relida
+
+
+def test_indice_invalidar_relê_apos_edicao_manual(backend):
+    backend.criar_aba(URL, ABA, CABECALHO, [_linha("1", 1), _linha("2", 2)])
+    assert indice.linhas_do_prontuario(URL, ABA, "2") == [3]
+
+    # Aba regravada por fora (linhas deslocadas): o índice velho aponta errado
+    backend.criar_aba(URL, ABA, CABECALHO, [_linha("3", 3), _linha("2", 2)])
+    assert indice.linhas_do_prontuario(URL, ABA, "3") == []    # índice ainda em cache
+    indice.invalidar(URL, ABA)
+    assert indice.linhas_do_prontuario(URL, ABA, "2") == [3]
+    assert indice.linhas_do_prontuario(URL, ABA, "3") == [2]
+
+
+def test_indice_se_corrige_quando_linhas_deslocam(backend):
+    backend.criar_aba(URL, ABA, CABECALHO, [_linha("1", 1), _linha("2", 2)])
+    assert indice.buscar_linhas(URL, ABA, "2") == [_linha("2", 2)]
+    backend.criar_aba(URL, ABA, CABECALHO, [_linha("2", 2)])   # linha 2 apagada
+    assert indice.buscar_linhas(URL, ABA, "2") == [_linha("2", 2)]
+
+
+def test_cauda_le_so_linhas_novas(backend):
+    backend.criar_aba(URL, ABA, CABECALHO, [_linha("1", 1)])
+    assert cauda.ler_valores(URL, ABA) == (CABECALHO, [_linha("1", 1)])
+    assert backend.chamadas["get_all_values"] == 1
+
+    backend.cliente().open_by_url(URL).worksheet(ABA).append_rows([_linha("2", 2)])
+    assert cauda.ler_valores(URL, ABA)[1] == [_linha("1", 1), _linha("2", 2)]
+    assert backend.chamadas["get_all_values"] == 1     # incremental (batch_get)
+    assert backend.chamadas["batch_get"] == 1
+
+
+def test_cauda_invalidar_e_aba_encolhida_releem_tudo(backend):
+    backend.criar_aba(URL, ABA, CABECALHO, [_linha("1", 1), _linha("2", 2)])
+    cauda.ler_valores(URL, ABA)
+
+    backend.criar_aba(URL, ABA, CABECALHO, [_linha("3", 3)])   # aba regravada
+    assert cauda.ler_valores(URL, ABA)[1] == [_linha("3", 3)]
+    assert backend.chamadas["get_all_values"] == 2
+
+    cauda.invalidar(URL, ABA)
+    assert cauda.ler_registros(URL, ABA) == [
+        {"prontuario": 3, "nome": "P3", "data_hora": "03/10/2026 08:00", "dados_json": "dados 3"}
+    ]
+    assert backend.chamadas["get_all_values"] == 3
@@ -0,0 +1,88 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from modules import roteador
+
+HOJE = date(2026, 10, 10)
+
+
+def _completar(secao, texto, resposta):
+    recebido = []
+
+    async def _agente(entrada):
+        recebido.append(entrada)
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+
+    rota = roteador.rotear(secao, texto, HOJE)
+    return asyncio.run(roteador.completar(secao, texto, rota, _agente, HOJE)), recebido
+
+
+def test_lab_no_formato_padrao_dispensa_a_ia():
+    dados, cobertura, resto = roteador.rotear("laboratoriais", "10/10/2026 – Hb 8,8 | Ht 27%", HOJE)
+    assert (cobertura, resto) == (1.0, "")
+    assert dados["lab_1_hb"] == "8,8" and dados["lab_1_data"] == "10/10/2026"
+
+    saida, recebido = _completar("laboratoriais", "10/10/2026 – Hb 8,8 | Ht 27%", {})
+    assert recebido == [] and saida["lab_1_ht"] == "27%"
+
+
+def test_lab_so_o_resto_vai_para_a_ia():
+    texto = "10/10/2026 – Hb 8,8 | Ht 27% | Xyz 4\n09/10/2026 – Hb 9,0"
+    dados, cobertura, resto = roteador.rotear("laboratoriais", texto, HOJE)
+    assert cobertura == pytest.approx(0.75)
+    assert resto == "10/10/2026 – Xyz 4"
+    assert dados["lab_2_hb"] == "9,0"
+
+
+def test_texto_livre_vai_inteiro_para_a_ia():
+    texto = "paciente com anemia, hb caiu"
+    assert roteador.rotear("laboratoriais", texto, HOJE) == ({}, 0.0, texto)
+    saida, recebido = _completar("laboratoriais", texto, {"lab_1_hb": "7"})
+    assert recebido == [texto] and saida == {"lab_1_hb": "7"}
+
+
+def test_valores_do_parser_prevalecem_e_slots_sao_realinhados():
+    texto = "10/10/2026 – Hb 8,8 | Xyz 4\n09/10/2026 – Hb 9,0 | Abc 1"
+    # O agente só viu o resto e numerou pela ordem: o exame de ontem vira lab_2
+    resposta = {"lab_1_data": "09/10/2026", "lab_1_abc": "1", "lab_1_hb": "999"}
+    saida, recebido = _completar("laboratoriais", texto, resposta)
+    assert recebido == ["10/10/2026 – Xyz 4\n09/10/2026 – Abc 1"]
+    assert saida["lab_2_abc"] == "1"
+    assert saida["lab_2_hb"] == "9,0" and saida["lab_1_hb"] == "8,8"
+
+
+def test_falha_do_agente_mantem_dados_do_parser():
+    saida, _ = _completar("laboratoriais", "10/10/2026 – Hb 8,8 | Xyz 4", RuntimeError("429"))
+    assert saida["lab_1_hb"] == "8,8"
+    assert "429" in saida["_aviso"]
+
+
+def test_controles_resto_leva_o_cabecalho_do_bloco():
+    texto = ("# Controles - 24 horas\n> 10/10/2026\n"
+             "PAS: 110 - 135 mmHg | FC: 72 - 98 bpm\n"
+             "Balanço Hídrico Total: +420ml | Diurese: 1450ml\n"
+             "observação livre")
+    dados, cobertura, resto = roteador.rotear("controles", texto, HOJE)
+    assert dados["ctrl_hoje_fc_max"] == "98" and dados["ctrl_hoje_diurese"] == "1450ml"
+    assert cobertura >= roteador.LIMIAR_COBERTURA
+    assert resto == "> 10/10/2026\nobservação livre"
+
+
+def test_sistemas_resto_leva_o_sistema():
+    texto = "# Evolução por sistemas\n- Neurológico\nECG 15 | RASS -2\nfrase livre"
+    dados, cobertura, resto = roteador.rotear("sistemas", texto, HOJE)
+    assert dados == {"sis_neuro_ecg": "15", "sis_neuro_rass": "-2"}
+    assert cobertura == pytest.approx(0.8)
+    assert resto == "- Neurológico\nfrase livre"
+
+    _, cobertura, resto = roteador.rotear("sistemas", "- Sistema Inexistente\nnada", HOJE)
+    assert cobertura == 0.0 and resto == "- Sistema Inexistente\nnada"
+
+
+def test_secao_vazia():
+    for secao in roteador.ROTEADORES:
+        assert roteador.rotear(secao, "", HOJE) == ({}, 0.0, "")
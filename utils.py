@@ -1,40 +1,27 @@
 import os
 import time
-import gzip
-import base64
 import streamlit as st
-from streamlit_gsheets import GSheetsConnection
-from gspread import service_account_from_dict
 import pandas as pd
-import json
-from datetime import datetime
+import re
+import threading
+from datetime import date, datetime, timedelta
 
-_GZ_PREFIX = "GZ1:"  # marcador de versão do formato comprimido
+from modules.persistencia import conexao, indice, espelho, delta, codec, cauda, escrita, referencia, historico, particoes, censo, busca
 
 
 def _comprimir_dados(dados: dict) -> str:
     """
-    Serializa o dict completo para JSON e comprime com gzip+base64.
+    Serializa o dict para JSON e comprime no formato atual (GZ2: deflate com
+    dicionário de campos + base64 — ver modules.persistencia.codec).
     Garante que o resultado caiba no limite de 50.000 chars/célula do Google Sheets
     (redução típica de 95-97%, mesmo com textos grandes).
     """
-    json_str = json.dumps(dados, ensure_ascii=False, default=str)
-    compressed = gzip.compress(json_str.encode("utf-8"), compresslevel=9)
-    b64 = base64.b64encode(compressed).decode("ascii")
-    return f"{_GZ_PREFIX}{b64}"
+    return codec.comprimir(dados)
 
 
 def _descomprimir_dados(texto: str) -> dict:
-    """Descomprime JSON salvo por _comprimir_dados. Aceita JSON puro (legado)."""
-    if not texto or not isinstance(texto, str):
-        return {}
-    if texto.startswith(_GZ_PREFIX):
-        b64 = texto[len(_GZ_PREFIX):]
-        compressed = base64.b64decode(b64.encode("ascii"))
-        json_str = gzip.decompress(compressed).decode("utf-8")
-        return json.loads(json_str)
-    # Legado: JSON puro
-    return json.loads(texto)
+    """Descomprime JSON salvo por _comprimir_dados. Aceita GZ2, GZ1 e JSON puro (legado)."""
+    return codec.descomprimir_celula(texto)
 
 
 def carregar_chave_api(nome_secret: str, nome_env: str) -> str:
@@ -166,118 +153,303 @@ def sync_infusao_to_sheet() -> bool:
     """
     try:
         df = pd.DataFrame(_DADOS_INFUSAO_PADRAO)
-        conn = st.connection("gsheets", type=GSheetsConnection)
+        conn = conexao.conexao_streamlit()
         conn.update(spreadsheet=SHEET_URL, worksheet="DB_INFUSAO", data=df)
+        cauda.invalidar(SHEET_URL, "DB_INFUSAO")
+        invalidar_aba("DB_INFUSAO")
         return True
     except Exception as e:
         st.error(f"❌ Erro ao sincronizar: {e}")
         return False
 
 
-@st.cache_data(ttl=600, show_spinner=False)
-def load_data(worksheet_name: str) -> pd.DataFrame:
-    """Carrega dados do Google Sheets com cache de 10 minutos."""
+# Geração por aba: uma escrita invalida só o cache da aba afetada (não o de
+# DB_INFUSAO/DB_IOT junto, como fazia load_data.clear()).
+_GERACOES_LOCK = threading.Lock()
+_GERACOES_ABA: dict[str, int] = {}
+
+
+def invalidar_aba(worksheet_name: str) -> None:
+    """Invalida o cache de load_data só para esta aba (incrementa a geração)."""
+    with _GERACOES_LOCK:
+        _GERACOES_ABA[worksheet_name] = _GERACOES_ABA.get(worksheet_name, 0) + 1
+    referencia.marcar_velho(worksheet_name)
+
+
+def _geracao_aba(worksheet_name: str) -> int:
+    with _GERACOES_LOCK:
+        return _GERACOES_ABA.get(worksheet_name, 0)
+
+
+@st.cache_data(ttl=600, show_spinner=False, max_entries=32)
+def _load_data_geracao(worksheet_name: str, geracao: int) -> pd.DataFrame:
+    """Leitura cacheada por (aba, geração) — geração nova = entrada nova."""
     try:
         df = _read_worksheet_gspread(worksheet_name)
         if df is not None:
             return df
-        conn = st.connection("gsheets", type=GSheetsConnection)
+        conn = conexao.conexao_streamlit()
         return conn.read(spreadsheet=SHEET_URL, worksheet=worksheet_name, ttl=600)
     except Exception as e:
         st.error(f"❌ Erro ao conectar com Google Sheets: {e}")
         return pd.DataFrame()
 
-def save_data_append(worksheet_name, new_data_row):
+
+def load_data(worksheet_name: str) -> pd.DataFrame:
+    """Carrega dados do Google Sheets com cache de 10 minutos (invalidado por aba via invalidar_aba)."""
+    return _load_data_geracao(worksheet_name, _geracao_aba(worksheet_name))
+
+# Abas de referência com dados embutidos no código (primeiro render sem rede)
+_REFERENCIAS_EMBUTIDAS = {"DB_INFUSAO": _DADOS_INFUSAO_PADRAO}
+
+
+def _ler_aba_referencia(worksheet_name: str) -> pd.DataFrame | None:
+    """Leitura para o refresh em background: sem st.error/st.cache (fora do script)."""
+    df = _read_worksheet_gspread(worksheet_name)
+    if df is not None:
+        return df
     try:
-        existing_data = _read_worksheet_gspread(worksheet_name)
-        if existing_data is None:
-            conn = st.connection("gsheets", type=GSheetsConnection)
-            existing_data = conn.read(spreadsheet=SHEET_URL, worksheet=worksheet_name, ttl=0)
-        
-        # --- DIAGNÓSTICO DE ERRO (Para sabermos o que acontece) ---
-        qtd_planilha = len(existing_data.columns)
-        qtd_codigo = len(new_data_row)
-        
-        # Se os números não baterem, ele vai te contar exatamente o porquê
-        if qtd_codigo != qtd_planilha:
-            st.error(f"❌ ERRO DE CONTAGEM: O código está enviando {qtd_codigo} dados, mas o Python achou {qtd_planilha} colunas na planilha.")
-            st.error("Motivo provável: O cache do Streamlit está lendo a versão antiga da planilha.")
-            return False
-            
-        # Se passou no teste, salva
-        new_df = pd.DataFrame([new_data_row], columns=existing_data.columns)
-        updated_df = pd.concat([existing_data, new_df], ignore_index=True)
-        conn.update(spreadsheet=SHEET_URL, worksheet=worksheet_name, data=updated_df)
+        return conexao.conexao_streamlit().read(spreadsheet=SHEET_URL, worksheet=worksheet_name, ttl=0)
+    except Exception:
+        return None
+
+
+def load_referencia(worksheet_name: str) -> pd.DataFrame:
+    """
+    Tabela de referência (DB_INFUSAO, DB_IOT) sem esperar a rede: usa o
+    snapshot em memória/disco/embutido e revalida em background quando passa
+    de 10 minutos (modules.persistencia.referencia). Só bloqueia se a aba
+    nunca foi lida e não tem dados embutidos.
+    """
+    return referencia.obter(
+        worksheet_name,
+        lambda: _ler_aba_referencia(worksheet_name),
+        embutido=_REFERENCIAS_EMBUTIDAS.get(worksheet_name),
+    )
+
+
+def save_data_append(worksheet_name: str, new_data_row: list) -> bool:
+    """Acrescenta uma linha (lista de valores na ordem das colunas) ao fim da aba."""
+    return save_data_append_lote(worksheet_name, [new_data_row])
+
+
+def save_data_append_lote(worksheet_name: str, linhas: list[list]) -> bool:
+    """
+    Acrescenta várias linhas ao fim da aba, direto por um único append_rows.
+    Não lê nem regrava os dados existentes; a contagem de colunas é validada
+    contra o cabeçalho em cache (modules.persistencia.escrita).
+    Sem service account, cai para o GSheetsConnection: lê a aba inteira,
+    concatena e regrava (conn.update) — sujeito a corrida entre escritores.
+    """
+    try:
+        resposta = escrita.acrescentar_linhas(SHEET_URL, worksheet_name, [list(l) for l in linhas])
+        if resposta is None:
+            return _save_data_append_conn(worksheet_name, linhas)
+        invalidar_aba(worksheet_name)
         return True
-        
+    except escrita.ColunasIncompativeis as e:
+        st.error(f"❌ ERRO DE CONTAGEM: {e}")
+        return False
     except Exception as e:
         st.error(f"Erro detalhado do Google: {e}")
         return False
 
+
+def _save_data_append_conn(worksheet_name: str, linhas: list[list]) -> bool:
+    """Fallback sem service account de save_data_append_lote (read + concat + update)."""
+    conn = conexao.conexao_streamlit()
+    existing_data = conn.read(spreadsheet=SHEET_URL, worksheet=worksheet_name, ttl=0)
+    larguras = {len(l) for l in linhas}
+    if larguras != {len(existing_data.columns)}:
+        st.error(
+            f"❌ ERRO DE CONTAGEM: A aba {worksheet_name} tem {len(existing_data.columns)} colunas, "
+            f"mas a linha enviada tem {', '.join(str(n) for n in sorted(larguras))}."
+        )
+        return False
+    novas = pd.DataFrame([list(l) for l in linhas], columns=existing_data.columns)
+    updated_df = pd.concat([existing_data, novas], ignore_index=True)
+    conn.update(spreadsheet=SHEET_URL, worksheet=worksheet_name, data=updated_df)
+    cauda.invalidar(SHEET_URL, worksheet_name)
+    invalidar_aba(worksheet_name)
+    return True
+
+
 def _read_worksheet_gspread(worksheet_name: str) -> pd.DataFrame | None:
     """
     Lê qualquer aba do Sheets via gspread (sem indicador técnico na UI).
+    Usa o client/aba em cache do processo (modules.persistencia.conexao) e o
+    cache incremental de linhas (modules.persistencia.cauda): após a primeira
+    leitura, só as linhas novas trafegam.
     Retorna DataFrame ou None em caso de erro.
     """
     try:
-        gs = st.secrets.get("connections", {}).get("gsheets", {})
-        if not gs or gs.get("type") != "service_account":
+        records = cauda.ler_registros(SHEET_URL, worksheet_name)
+        if records is None:
             return None
-        creds = {k: v for k, v in gs.items() if k not in ("spreadsheet", "worksheet")}
-        gc = service_account_from_dict(creds)
-        sh = gc.open_by_url(SHEET_URL)
-        ws = sh.worksheet(worksheet_name)
-        records = ws.get_all_records()
         return pd.DataFrame(records) if records else pd.DataFrame()
     except Exception:
         return None
 
 
-def _get_evolucao_worksheet():
-    """Retorna a aba EVOLUCOES via gspread."""
-    return _read_worksheet_gspread(_ABA_EVOLUCOES)
+def _get_evolucao_worksheet(aba: str = _ABA_EVOLUCOES):
+    """Retorna a aba de evoluções (EVOLUCOES ou uma partição mensal) via gspread."""
+    return _read_worksheet_gspread(aba)
+
 
+_CABECALHO_EVOLUCOES = particoes.CABECALHO
 
-def _append_evolucao_row(prontuario: str, nome: str, data_hora: str, dados_json: str) -> bool:
+
+def _enviar_evolucoes_lote(linhas: list[tuple]) -> list[tuple[str, int | None]]:
+    """
+    Acrescenta linhas (prontuario, nome, data_hora, dados_json) na aba de
+    evoluções — com o particionamento ativo, na partição mensal do data_hora de
+    cada linha (criada se preciso) — com um append_rows por aba, sem ler a
+    planilha inteira; o cabeçalho é conferido em cache
+    (escrita.acrescentar_com_cabecalho). Registra as linhas no índice de prontuários e no
+    manifesto de partições.
+    Retorna, para cada linha, (aba, número da linha) se foi criada (número
+    None se desconhecido) ou None se a aba dela falhou — num lote que mistura
+    meses, as abas que já receberam o append não podem ser reenviadas.
+    Levanta exceção se nenhuma aba recebeu as linhas ou sem service account.
     """
-    Adiciona uma linha na aba EVOLUCOES via append_row (sem ler a planilha inteira).
-    Retorna True se sucesso, False caso contrário.
+    if not conexao.tem_service_account():
+        raise RuntimeError("Service account do Google Sheets não configurada.")
+    por_aba: dict[str, list[int]] = {}
+    for i, l in enumerate(linhas):
+        por_aba.setdefault(particoes.particao_para_escrita(SHEET_URL, l[2]), []).append(i)
+
+    resultado: list[tuple[str, int | None] | None] = [None] * len(linhas)
+    erro: Exception | None = None
+    for aba, posicoes in por_aba.items():
+        valores = [list(linhas[i]) for i in posicoes]
+        try:
+            if aba != _ABA_EVOLUCOES:
+                particoes.garantir_aba(SHEET_URL, aba)
+            resp = escrita.acrescentar_com_cabecalho(SHEET_URL, aba, _CABECALHO_EVOLUCOES, valores)
+            if resp is None:
+                raise RuntimeError("Service account do Google Sheets não configurada.")
+        except Exception as e:
+            erro = e
+            continue
+        indice.registrar_append(SHEET_URL, aba, [v[0] for v in valores], resp)
+        primeira = indice.linha_da_resposta(resp)
+        if primeira is None:
+            indice.invalidar(SHEET_URL, aba)  # cabeçalho corrigido no mesmo lote: linhas sem número
+        for k, i in enumerate(posicoes):
+            resultado[i] = (aba, primeira + k if primeira else None)
+        if aba != _ABA_EVOLUCOES:
+            try:
+                particoes.registrar(SHEET_URL, [(v[0], aba) for v in valores])
+            except Exception:
+                pass  # o job de manutenção repara entradas faltantes do manifesto
+    if erro is not None and all(r is None for r in resultado):
+        raise erro
+    return resultado
+
+
+def _enviar_evolucao(prontuario: str, nome: str, data_hora: str, dados_json: str) -> tuple[str, int | None]:
+    """Envia uma única linha (ver _enviar_evolucoes_lote). Retorna (aba, número da linha)."""
+    return _enviar_evolucoes_lote([(prontuario, nome, data_hora, dados_json)])[0]  # 1 aba: falha levanta
+
+
+def _ler_cauda_evolucoes(aba: str, inicio: int) -> list[list[str]] | None:
+    """Linhas da aba de evoluções a partir de `inicio` (usado pelo reconciliador do espelho)."""
+    return conexao.executar(SHEET_URL, aba, lambda ws: ws.get(f"A{inicio}:D"))
+
+
+def _listar_abas_evolucoes() -> list[str] | None:
+    """Abas de evolução em ordem cronológica (EVOLUCOES + partições mensais)."""
+    return particoes.listar(SHEET_URL)
+
+
+# ── Espelho local (SQLite) ────────────────────────────────────────────────────
+_ESPELHO_LOCK = threading.Lock()
+_ESPELHO_OK: bool | None = None
+_RECONCILIADOR: espelho.Reconciliador | None = None
+
+
+def _espelho_disponivel() -> bool:
+    """Abre o espelho local e inicia o reconciliador na primeira chamada do processo."""
+    global _ESPELHO_OK, _RECONCILIADOR
+    if _ESPELHO_OK is None:
+        with _ESPELHO_LOCK:
+            if _ESPELHO_OK is None:
+                try:
+                    espelho.contar_pendentes()
+                    _RECONCILIADOR = espelho.Reconciliador(
+                        _enviar_evolucoes_lote, _ler_cauda_evolucoes,
+                        apos_envio=lambda: invalidar_aba(_ABA_EVOLUCOES),
+                        listar_particoes=_listar_abas_evolucoes,
+                    )
+                    _RECONCILIADOR.iniciar()
+                    _ESPELHO_OK = True
+                except Exception:
+                    _ESPELHO_OK = False  # ex.: sistema de arquivos somente leitura
+    return _ESPELHO_OK
+
+
+def status_sincronizacao() -> dict | None:
     """
+    Estado da fila de escrita (write-behind) para o indicador da UI:
+    {"pendentes", "ultimo_erro", "ultimo_envio", "proxima_tentativa_seg",
+    "conectado", "service_account"}. conectado: o Google Sheets já respondeu
+    e não há falha em aberto; service_account False = modo somente local
+    (o reconciliador não tem como enviar). None se o espelho local não
+    estiver disponível.
+    """
+    if not _espelho_disponivel():
+        return None
     try:
-        gs = st.secrets.get("connections", {}).get("gsheets", {})
-        if not gs or gs.get("type") != "service_account":
-            return False
-        creds = {k: v for k, v in gs.items() if k not in ("spreadsheet", "worksheet")}
-        gc = service_account_from_dict(creds)
-        sh = gc.open_by_url(SHEET_URL)
-        ws = sh.worksheet(_ABA_EVOLUCOES)
-        first_row = ws.row_values(1)
-        if not first_row or first_row[0] != "prontuario":
-            ws.update("A1:D1", [["prontuario", "nome", "data_hora", "dados_json"]])
-        ws.append_row([prontuario, nome, data_hora, dados_json], value_input_option="RAW")
-        return True
+        status = _RECONCILIADOR.status()
     except Exception:
-        return False
+        return None
+    status["service_account"] = conexao.tem_service_account()
+    status["conectado"] = status["conectado"] and status["service_account"]
+    return status
 
 
 def save_evolucao(prontuario: str, nome: str, dados: dict) -> bool:
     """
     Salva uma evolução diária na aba EVOLUCOES do Google Sheets.
     Cada chamada ACRESCENTA uma nova linha — o histórico é mantido.
-    Usa append_row quando possível (mais rápido); fallback para read+update.
+    A linha guarda só o delta contra a evolução anterior do paciente, com um
+    keyframe completo periódico (modules.persistencia.delta).
+    Grava no journal do espelho local (SQLite) e retorna na hora; o envio ao
+    Sheets é feito em lote pelo reconciliador (write-behind). Sem espelho ou
+    sem service account, envia na hora: append_row; fallback para read+update.
     """
+    global _BUSCA_ATUALIZADO_EM
     pront = str(prontuario).strip().replace(".0", "")
     nome_ = str(nome).strip()
     data_hora = datetime.now().strftime("%d/%m/%Y %H:%M")
-    dados_json = _comprimir_dados(dados)
+    dados_json = _codificar_evolucao(pront, dados)
+
+    _BUSCA_ATUALIZADO_EM = 0.0  # a próxima busca já encontra este paciente
+
+    id_local = None
+    if _espelho_disponivel():
+        try:
+            id_local = espelho.inserir(pront, nome_, data_hora, dados_json)
+        except Exception:
+            id_local = None
+
+    # Write-behind: a linha já está no journal local; o envio ao Sheets é em background
+    if id_local is not None and conexao.tem_service_account():
+        _RECONCILIADOR.acordar()
+        return True
 
-    if _append_evolucao_row(pront, nome_, data_hora, dados_json):
-        load_data.clear()
+    try:
+        aba, linha = _enviar_evolucao(pront, nome_, data_hora, dados_json)
+        if id_local is not None:
+            espelho.marcar_sincronizada(id_local, linha, aba)
+        invalidar_aba(_ABA_EVOLUCOES)
         return True
+    except Exception:
+        pass
 
     # Fallback: read + concat + update (aba nova ou append indisponível)
     try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
+        conn = conexao.conexao_streamlit()
         nova_linha = pd.DataFrame([{
             "prontuario": pront, "nome": nome_, "data_hora": data_hora,
             "dados_json": dados_json,
@@ -290,29 +462,186 @@ def save_evolucao(prontuario: str, nome: str, dados: dict) -> bool:
         except Exception:
             updated = nova_linha
         conn.update(spreadsheet=SHEET_URL, worksheet=_ABA_EVOLUCOES, data=updated)
-        load_data.clear()
+        if id_local is not None:
+            espelho.marcar_sincronizada(id_local, None)
+        indice.invalidar(SHEET_URL, _ABA_EVOLUCOES)
+        cauda.invalidar(SHEET_URL, _ABA_EVOLUCOES)
+        invalidar_aba(_ABA_EVOLUCOES)
         return True
     except Exception as e:
         st.error(f"❌ Erro ao salvar no Google Sheets: {e}")
         return False
 
 
-def _read_evolucoes_df() -> pd.DataFrame | None:
-    """Lê a aba EVOLUCOES via gspread (sem indicador técnico na UI). Fallback para conn.read."""
-    df = _get_evolucao_worksheet()
-    if df is not None:
-        return df
+def _read_evolucoes_df(abas: list[str] | None = None) -> pd.DataFrame | None:
+    """
+    Lê as abas de evoluções (padrão: EVOLUCOES) via gspread e concatena em
+    ordem cronológica, sem indicador técnico na UI. Fallback para conn.read
+    (só a aba EVOLUCOES).
+    """
+    frames = []
+    for aba in abas or [_ABA_EVOLUCOES]:
+        df = _get_evolucao_worksheet(aba)
+        if df is None:
+            frames = None
+            break
+        if not df.empty:
+            frames.append(df)
+    if frames is not None:
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
     try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
+        conn = conexao.conexao_streamlit()
         return conn.read(spreadsheet=SHEET_URL, worksheet=_ABA_EVOLUCOES, ttl=0)
     except Exception:
         return None
 
 
+def _buscar_linhas_indexadas(prontuario_normalizado: str, ultimas: int | None = None) -> list[list[str]] | None:
+    """
+    Linhas [prontuario, nome, data_hora, dados_json] do prontuário via índice
+    (sem varrer as abas), em ordem cronológica. Com partições, consulta só as
+    do manifesto, da mais recente para a mais antiga, até juntar `ultimas`.
+    None se o índice estiver indisponível (sem service account ou erro) — o
+    chamador cai na leitura completa.
+    """
+    try:
+        abas = particoes.do_prontuario(SHEET_URL, prontuario_normalizado)
+        if abas is None:
+            return None
+        linhas: list[list[str]] = []
+        for aba in reversed(abas):
+            falta = ultimas - len(linhas) if ultimas else None
+            achadas = indice.buscar_linhas(SHEET_URL, aba, prontuario_normalizado, ultimas=falta)
+            if achadas is None:
+                return None
+            linhas = achadas + linhas
+            if ultimas and len(linhas) >= ultimas:
+                break
+        return linhas
+    except Exception:
+        return None
+
+
+def _com_pendentes_locais(linhas: list[historico.LinhaEvolucao], pendentes: list,
+                          ultimas: int | None) -> list[historico.LinhaEvolucao]:
+    """Acrescenta as linhas do espelho que ainda não chegaram à planilha (sem duplicar)."""
+    vistas = {(l.data_hora, str(l.payload)) for l in linhas}
+    for r in pendentes:
+        linha = historico.LinhaEvolucao(r["prontuario"], str(r["nome"]), str(r["data_hora"]), r["dados_json"])
+        if (linha.data_hora, str(linha.payload)) not in vistas:
+            linhas.append(linha)
+    return linhas[-ultimas:] if ultimas else linhas
+
+
+def _historico_evolucoes(prontuario_normalizado: str, ultimas: int | None = None,
+                         usar_espelho: bool = True) -> list[historico.LinhaEvolucao] | None:
+    """
+    Linhas (preguiçosas: dados_json só é decodificado sob demanda) das
+    evoluções do prontuário, em ordem cronológica.
+    Ordem de consulta: espelho local (SQLite) → índice de prontuários
+    (1 requisição) → leitura completa da aba. O espelho só responde sozinho
+    depois da carga inicial (antes disso pode ter só os deltas salvos aqui,
+    sem o keyframe base); nas outras fontes entram no fim as linhas do
+    espelho ainda pendentes de envio. usar_espelho=False pula o espelho
+    (ex.: ele não reconstrói a última versão). ultimas=N limita às N mais
+    recentes. None se nenhuma fonte estiver disponível.
+    """
+    pendentes = []
+    try:
+        if _espelho_disponivel():
+            regs = espelho.listar(prontuario_normalizado)
+            if regs and usar_espelho and espelho.pronto():
+                regs = regs[-ultimas:] if ultimas else regs
+                return [
+                    historico.LinhaEvolucao(prontuario_normalizado, str(r["nome"]), str(r["data_hora"]), r["dados_json"])
+                    for r in regs
+                ]
+            pendentes = [r for r in regs if r["pendente"]]
+    except Exception:
+        pass
+
+    linhas = _buscar_linhas_indexadas(prontuario_normalizado, ultimas=ultimas)
+    if linhas is not None:
+        return _com_pendentes_locais([
+            historico.LinhaEvolucao(prontuario_normalizado, str(c[1]), str(c[2]), c[3])
+            for c in ((l + ["", "", "", ""])[:4] for l in linhas)
+        ], pendentes, ultimas)
+
+    try:
+        abas = particoes.do_prontuario(SHEET_URL, prontuario_normalizado)
+    except Exception:
+        abas = None
+    df = _read_evolucoes_df(abas)
+    if df is None:
+        return None
+    if df.empty:
+        return _com_pendentes_locais([], pendentes, ultimas)
+    df["prontuario"] = (
+        df["prontuario"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+    )
+    matches = df[df["prontuario"] == prontuario_normalizado]
+    if ultimas:
+        matches = matches.tail(ultimas)
+    return _com_pendentes_locais([
+        historico.LinhaEvolucao(prontuario_normalizado, str(nome), str(data_hora), dados_json)
+        for nome, data_hora, dados_json in zip(matches["nome"], matches["data_hora"], matches["dados_json"])
+    ], pendentes, ultimas)
+
+
+def _codificar_evolucao(prontuario_normalizado: str, dados: dict) -> str:
+    """
+    Célula dados_json da nova evolução: delta contra a anterior ou keyframe.
+    A base vem só do espelho local (linhas já trazidas da planilha + journal),
+    para o save não ler o Sheets. Sem base local — espelho indisponível, ou
+    carga inicial que ainda não trouxe o paciente — grava keyframe. A base
+    pode não ser a versão mais recente da planilha: o delta aponta para ela
+    pela assinatura, e a reconstrução a encontra (delta.py).
+    """
+    payloads = None
+    try:
+        if _espelho_disponivel():
+            payloads = [r["dados_json"] for r in espelho.listar(prontuario_normalizado)[-delta.KEYFRAME_CADA:]]
+    except Exception:
+        payloads = None
+    return delta.codificar(dados, payloads, _comprimir_dados, _descomprimir_dados)
+
+
+def carregar_historico_evolucoes(prontuario: str) -> list[dict]:
+    """
+    Reconstrói TODAS as evoluções salvas do prontuário (keyframes + deltas),
+    em ordem cronológica. Cada dict traz '_data_hora'. Versões irrecuperáveis
+    (base apagada da planilha) são omitidas.
+    """
+    busca = str(prontuario).strip().replace(".0", "")
+    linhas = _historico_evolucoes(busca) or []
+    resultado = []
+    for linha, dados in zip(linhas, historico.versoes(linhas, _descomprimir_dados)):
+        if dados is not None:
+            resultado.append({**dados, "_data_hora": linha.data_hora})
+    return resultado
+
+
 def check_evolucao_exists(prontuario: str) -> bool:
     """
     Verifica se já existe ao menos uma evolução cadastrada para o prontuário.
     """
+    busca = str(prontuario).strip().replace(".0", "")
+    try:
+        if _espelho_disponivel() and espelho.existe(busca):
+            return True
+    except Exception:
+        pass
+    try:
+        abas = particoes.do_prontuario(SHEET_URL, busca)
+        if abas is not None:
+            if particoes.ativo(SHEET_URL) and particoes.registrado(SHEET_URL, busca):
+                return True
+            for aba in abas:
+                if indice.linhas_do_prontuario(SHEET_URL, aba, busca):
+                    return True
+            return False
+    except Exception:
+        pass
     try:
         df = _read_evolucoes_df()
         if df is None or df.empty:
@@ -320,7 +649,6 @@ def check_evolucao_exists(prontuario: str) -> bool:
         df["prontuario"] = (
             df["prontuario"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
         )
-        busca = str(prontuario).strip().replace(".0", "")
         return not df[df["prontuario"] == busca].empty
     except Exception:
         return False
@@ -331,31 +659,281 @@ def load_evolucao(prontuario: str) -> dict | None:
     Carrega a ÚLTIMA evolução de um paciente pelo número do prontuário.
     Retorna um dict com todos os campos salvos, ou None se não encontrado.
     O campo '_data_hora' indica quando a evolução foi salva.
+    Ordem de consulta: espelho local (SQLite) → índice de prontuários
+    (1 requisição) → leitura completa da aba. Só decodifica a partir do
+    último keyframe do paciente, e versões já decodificadas vêm do LRU.
     """
+    busca_normalizada = str(prontuario).strip().replace(".0", "")
     try:
-        df = _read_evolucoes_df()
-        if df is None or df.empty:
+        linhas = _historico_evolucoes(busca_normalizada, ultimas=delta.KEYFRAME_CADA)
+        if not linhas:
+            return None
+        dados = historico.versao(linhas, -1, _descomprimir_dados)
+        if dados is None and len(linhas) >= delta.KEYFRAME_CADA:
+            # delta aponta para antes da janela: reconstrói com o histórico completo
+            linhas = _historico_evolucoes(busca_normalizada) or []
+            dados = historico.versao(linhas, -1, _descomprimir_dados)
+        if dados is None:
+            # espelho sem a base do delta: planilha + pendentes locais
+            linhas = _historico_evolucoes(busca_normalizada, usar_espelho=False) or []
+            dados = historico.versao(linhas, -1, _descomprimir_dados)
+        if dados is None:
             return None
+        dados["_data_hora"] = linhas[-1].data_hora
+        return dados
 
-        df["prontuario"] = (
-            df["prontuario"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
-        )
-        busca_normalizada = str(prontuario).strip().replace(".0", "")
-        matches = df[df["prontuario"] == busca_normalizada]
+    except Exception as e:
+        st.error(f"❌ Erro ao buscar no Google Sheets: {e}")
+        return None
+
+
+def _instante_consulta(when) -> datetime:
+    """datetime, date (fim do dia) ou texto "dd/mm/aaaa[ HH:MM]" → datetime."""
+    if isinstance(when, datetime):
+        return when
+    if isinstance(when, date):
+        return datetime.combine(when, datetime.max.time())
+    texto = str(when).strip()
+    try:
+        return datetime.strptime(texto, historico.FORMATO_DATA_HORA)
+    except ValueError:
+        return datetime.combine(datetime.strptime(texto, "%d/%m/%Y").date(), datetime.max.time())
+
+
+def list_evolucoes(prontuario: str) -> list[dict]:
+    """
+    Evoluções salvas do prontuário, em ordem cronológica, sem decodificar os
+    dados: [{"indice", "nome", "_data_hora"}, ...]. Serve para montar um
+    seletor de datas; a evolução escolhida vem de load_evolucao_at.
+    """
+    busca = str(prontuario).strip().replace(".0", "")
+    try:
+        linhas = _historico_evolucoes(busca) or []
+    except Exception as e:
+        st.error(f"❌ Erro ao buscar no Google Sheets: {e}")
+        return []
+    return [{"indice": i, "nome": l.nome, "_data_hora": l.data_hora} for i, l in enumerate(linhas)]
 
-        if matches.empty:
-            return None
 
-        latest = matches.iloc[-1]
-        dados = _descomprimir_dados(latest["dados_json"])
-        dados["_data_hora"] = str(latest.get("data_hora", ""))
+def load_evolucao_at(prontuario: str, when) -> dict | None:
+    """
+    Evolução do paciente vigente em `when` — a última salva até aquele
+    instante. `when`: datetime, date (considera o dia inteiro) ou texto
+    "dd/mm/aaaa[ HH:MM]". Mesmo formato de load_evolucao; None se não houver
+    evolução até lá.
+    Uma busca do histórico do paciente (espelho ou índice de prontuários) e
+    busca binária no índice temporal; só a versão pedida é decodificada (a
+    partir do keyframe anterior a ela), e versões já vistas vêm do LRU.
+    """
+    busca = str(prontuario).strip().replace(".0", "")
+    try:
+        quando = _instante_consulta(when)
+        linhas = _historico_evolucoes(busca) or []
+        pos = historico.localizar(linhas, quando)
+        if pos is None:
+            return None
+        dados = historico.versao(linhas, pos, _descomprimir_dados)
+        if dados is None:
+            return None
+        dados["_data_hora"] = linhas[pos].data_hora
         return dados
 
+    except ValueError:
+        st.error(f"❌ Data inválida: {when}. Use dd/mm/aaaa ou dd/mm/aaaa HH:MM.")
+        return None
     except Exception as e:
         st.error(f"❌ Erro ao buscar no Google Sheets: {e}")
         return None
 
 
+# ── Busca de pacientes (nome / prontuário / leito) ────────────────────────────
+_BUSCA = busca.IndiceBusca()
+_BUSCA_LOCK = threading.Lock()
+_BUSCA_ATUALIZADO_EM = 0.0
+# Intervalo mínimo entre atualizações do índice (cada uma é uma leitura de cauda)
+_BUSCA_TTL_SEG = 30
+
+
+def _linhas_evolucao(valores) -> list[tuple]:
+    return [tuple((list(l) + ["", "", "", ""])[:4]) for l in valores]
+
+
+def _atualizar_indice_busca() -> None:
+    """
+    Acrescenta ao índice de busca só as evoluções novas desde a última
+    atualização: pelo id no espelho local (se completo) ou pelo número de
+    linhas já vistas em cada aba (cache de cauda; partições antigas, que não
+    recebem linhas, não são relidas). Sem service account, reconstrói a
+    partir da leitura completa.
+    """
+    global _BUSCA_ATUALIZADO_EM
+    with _BUSCA_LOCK:
+        if time.time() - _BUSCA_ATUALIZADO_EM < _BUSCA_TTL_SEG:
+            return
+        try:
+            if _espelho_disponivel() and espelho.pronto():
+                if _BUSCA.fonte != "espelho":
+                    _BUSCA.limpar()
+                    _BUSCA.fonte = "espelho"
+                regs = espelho.novas_desde(_BUSCA.cursores.get("espelho", 0))
+                if regs:
+                    _BUSCA.acrescentar((r["prontuario"], r["nome"], r["data_hora"], r["dados_json"]) for r in regs)
+                    _BUSCA.cursores["espelho"] = max(r["id"] for r in regs)
+                _BUSCA_ATUALIZADO_EM = time.time()
+                return
+        except Exception:
+            pass
+
+        abas = _listar_abas_evolucoes()
+        if abas is None:
+            df = _read_evolucoes_df()
+            if df is not None:
+                _BUSCA.limpar()
+                if not df.empty and set(_CABECALHO_EVOLUCOES) <= set(df.columns):
+                    _BUSCA.acrescentar(zip(df["prontuario"], df["nome"], df["data_hora"], df["dados_json"]))
+                _BUSCA_ATUALIZADO_EM = time.time()
+            return
+
+        if _BUSCA.fonte != "planilha":
+            _BUSCA.limpar()
+            _BUSCA.fonte = "planilha"
+        if not _acrescentar_abas_busca(abas):
+            # aba editada à mão (linhas apagadas): reconstrói do zero
+            _BUSCA.limpar()
+            _BUSCA.fonte = "planilha"
+            _acrescentar_abas_busca(abas)
+        _BUSCA_ATUALIZADO_EM = time.time()
+
+
+def _acrescentar_abas_busca(abas: list[str]) -> bool:
+    """Linhas novas de cada aba para o índice de busca. False se alguma aba encolheu."""
+    for aba in abas:
+        if aba in _BUSCA.cursores and aba not in abas[-2:]:
+            continue
+        valores = cauda.ler_valores(SHEET_URL, aba)
+        if valores is None:
+            continue
+        linhas = valores[1]
+        vistas = _BUSCA.cursores.get(aba, 0)
+        if len(linhas) < vistas:
+            return False
+        _BUSCA.acrescentar(_linhas_evolucao(linhas[vistas:]))
+        _BUSCA.cursores[aba] = len(linhas)
+    return True
+
+
+def buscar_pacientes(consulta: str, limite: int = 8) -> list[dict]:
+    """
+    Busca tolerante a erros por nome, prontuário ou leito (também por começo
+    de palavra), sobre a evolução mais recente de cada paciente.
+    [{"prontuario", "nome", "leito", "data_hora", "pontuacao"}, ...], do mais
+    parecido para o menos. O índice (modules.persistencia.busca) é
+    incremental: a consulta em si é em memória.
+    """
+    try:
+        _atualizar_indice_busca()
+    except Exception as e:
+        st.error(f"❌ Erro ao atualizar a busca de pacientes: {e}")
+    return _BUSCA.buscar(consulta, limite)
+
+
+_COLUNAS_CENSO = [
+    "leito", "nome", "prontuario", "idade", "di_uti",
+    "diagnosticos", "paliativo", "conduta", "ultima_evolucao",
+]
+
+
+def _linhas_censo():
+    """
+    Todas as evoluções (prontuario, nome, data_hora, dados_json) em ordem
+    cronológica, numa leitura só: espelho local se a carga inicial já
+    terminou, senão todas as abas de evolução da planilha. None se nenhuma
+    fonte estiver disponível.
+    """
+    try:
+        if _espelho_disponivel() and espelho.pronto():
+            return espelho.percorrer()
+    except Exception:
+        pass
+    df = _read_evolucoes_df(_listar_abas_evolucoes())
+    if df is None:
+        return None
+    if df.empty or not set(_CABECALHO_EVOLUCOES) <= set(df.columns):
+        return []
+    return zip(df["prontuario"], df["nome"], df["data_hora"], df["dados_json"])
+
+
+def _data_hora_evolucao(texto: str) -> datetime | None:
+    try:
+        return datetime.strptime(str(texto).strip(), "%d/%m/%Y %H:%M")
+    except ValueError:
+        return None
+
+
+def _chave_leito(leito: str) -> tuple:
+    """Ordem natural dos leitos ("Leito 2" antes de "Leito 10"); sem leito por último."""
+    partes = re.findall(r"\d+|\D+", str(leito or "").strip().lower())
+    return (not partes, [(0, int(p), "") if p.isdigit() else (1, 0, p) for p in partes])
+
+
+def _registro_censo(prontuario: str, linha: historico.LinhaEvolucao, dados: dict) -> dict:
+    diagnosticos = []
+    for i in range(1, 9):
+        nome_hd = str(dados.get(f"hd_{i}_nome") or "").strip()
+        if nome_hd and dados.get(f"hd_{i}_status") != "Resolvida":
+            diagnosticos.append(nome_hd)
+    return {
+        "leito": str(dados.get("leito") or "").strip(),
+        "nome": str(dados.get("nome") or linha.nome or "").strip(),
+        "prontuario": prontuario,
+        "idade": str(dados.get("idade") or "").strip(),
+        "di_uti": str(dados.get("di_uti") or "").strip(),
+        "diagnosticos": "; ".join(diagnosticos),
+        "paliativo": bool(dados.get("paliativo")),
+        "conduta": str(dados.get("conduta_final_lista") or "").strip(),
+        "ultima_evolucao": linha.data_hora,
+    }
+
+
+def carregar_censo(dias: int | None = 3) -> pd.DataFrame:
+    """
+    Censo da unidade para a passagem de plantão: a última evolução de cada
+    paciente evoluído nos últimos `dias` dias (None = todos), com uma única
+    leitura do armazenamento e decodificação em paralelo
+    (modules.persistencia.censo). Uma linha por paciente, em ordem de leito;
+    colunas em _COLUNAS_CENSO.
+    """
+    try:
+        linhas = _linhas_censo()
+        if linhas is None:
+            st.error("❌ Não foi possível ler as evoluções do Google Sheets.")
+            return pd.DataFrame(columns=_COLUNAS_CENSO)
+        cadeias = censo.agrupar(linhas)
+        if dias is not None:
+            limite = datetime.now() - timedelta(days=dias)
+            cadeias = {
+                p: c for p, c in cadeias.items()
+                if (_data_hora_evolucao(c[-1].data_hora) or datetime.min) >= limite
+            }
+        versoes = censo.decodificar(cadeias)
+
+        registros = []
+        for pront, cadeia in cadeias.items():
+            dados = versoes.get(pront)
+            if dados is None:
+                # delta com base anterior à cadeia: reconstrói com o histórico completo
+                linhas_pac = _historico_evolucoes(pront) or []
+                dados = historico.versao(linhas_pac, -1, _descomprimir_dados) if linhas_pac else None
+            if dados is not None:
+                registros.append(_registro_censo(pront, cadeia[-1], dados))
+        registros.sort(key=lambda r: (_chave_leito(r["leito"]), r["nome"]))
+        return pd.DataFrame(registros, columns=_COLUNAS_CENSO)
+
+    except Exception as e:
+        st.error(f"❌ Erro ao montar o censo da unidade: {e}")
+        return pd.DataFrame(columns=_COLUNAS_CENSO)
+
+
 def mostrar_rodape():
     """Exibe rodapé padrão com nota legal em todas as páginas"""
     st.markdown("---")
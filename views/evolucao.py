@@ -2,13 +2,13 @@ import streamlit as st
 import json
 import streamlit.components.v1 as components
 from pathlib import Path
-from datetime import date
+from datetime import date, timedelta
 
-from modules import ui, fichas, gerador, fluxo, ia_extrator, agentes_secoes, extrator_exames
+from modules import ui, fichas, gerador, fluxo, ia_extrator, agentes_secoes, extrator_exames, comparacao
 from modules.parser_lab import parse_lab_deterministico
 from modules.parser_controles import parse_controles_deterministico
 from modules.secoes.condutas import render_condutas_registradas as _render_condutas_reg
-from utils import load_data, save_evolucao, load_evolucao, mostrar_rodape, carregar_chave_api, verificar_rate_limit, uso_rate_limit
+from utils import load_data, save_evolucao, load_evolucao, load_evolucao_at, buscar_pacientes, mostrar_rodape, carregar_chave_api, verificar_rate_limit, uso_rate_limit, status_sincronizacao
 
 # ── Chaves de API (secrets.toml → .env → vazio) ───────────────────────────────
 try:
@@ -54,6 +54,13 @@ with st.sidebar:
         else:
             st.error("❌ API Key não carregada!")
 
+        st.checkbox(
+            "Refazer sem cache",
+            key="_ia_sem_cache",
+            help="Completar Campos chama a IA de novo em vez de repetir a resposta guardada "
+                 "para o mesmo texto (use para tentar de novo uma extração ruim).",
+        )
+
 st.session_state["_ia_api_key"]  = api_key
 st.session_state["_ia_provider"] = _provider_completo()
 st.session_state["_ia_modelo"]   = modelo_escolhido
@@ -82,7 +89,7 @@ def _aplicar_dados_prontuario(dados: dict) -> bool:
     if not dados:
         return False
     data_hora = dados.pop("_data_hora", "")
-    dados = fichas.migrar_schema_legado(dados)
+    dados = fichas.expandir_campos(fichas.migrar_schema_legado(dados))
     campos_validos = fichas.get_todos_campos_keys()
     st.session_state.update({k: v for k, v in dados.items() if k in campos_validos})
     st.session_state["_data_hora_carregado"] = data_hora
@@ -90,34 +97,60 @@ def _aplicar_dados_prontuario(dados: dict) -> bool:
     return True
 
 
+def _abrir_prontuario(pront: str) -> bool:
+    with st.spinner("Consultando banco de dados..."):
+        dados = load_evolucao(pront)
+    if dados is None:
+        return False
+    _aplicar_dados_prontuario(dados)
+    return True
+
+
 @st.fragment
 def _fragment_busca():
-    with st.form(key="form_busca_paciente"):
-        c_input, c_btn = st.columns([5, 1], vertical_alignment="bottom")
-        with c_input:
-            busca_input = st.text_input(
-                "Número do Prontuário",
-                placeholder="Ex.: 1234567",
-                key="busca_input_field",
-            )
-        with c_btn:
-            btn_buscar = st.form_submit_button(
-                "Buscar", use_container_width=True, type="primary"
-            )
+    # Sem form: os resultados acompanham a digitação (live: commit após uma
+    # pausa curta). A consulta é em memória; o índice se atualiza no máximo
+    # a cada _BUSCA_TTL_SEG (utils._atualizar_indice_busca).
+    c_input, c_btn = st.columns([5, 1], vertical_alignment="bottom")
+    with c_input:
+        busca_input = st.text_input(
+            "Prontuário, nome ou leito",
+            placeholder="Ex.: 1234567, Maria Silva, Leito 12",
+            key="busca_input_field",
+            live="300ms",
+        )
+    busca = busca_input.strip() if busca_input else ""
+    eh_prontuario = busca.replace(".", "").isdigit()
+    with c_btn:
+        btn_abrir = st.button(
+            "Abrir", use_container_width=True, type="primary",
+            disabled=not eh_prontuario, key="_busca_btn_abrir",
+            help="Abre direto pelo número do prontuário",
+        )
 
-        busca = busca_input.strip() if busca_input else ""
-        if btn_buscar:
-            if not busca:
-                st.warning("Informe o número do prontuário para continuar.")
-            else:
-                with st.spinner("Consultando banco de dados..."):
-                    dados = load_evolucao(busca)
-                if dados is not None:
-                    _aplicar_dados_prontuario(dados)
-                    st.rerun()
-                else:
-                    st.session_state["_busca_pendente_criar"] = busca
-                    st.rerun()
+    if btn_abrir:
+        st.session_state.pop("_busca_pendente_criar", None)
+        if _abrir_prontuario(busca):
+            st.rerun()
+        # Prontuário não localizado (pode ter erro de digitação): os parecidos
+        # seguem listados abaixo, com a opção de criar um novo
+        st.session_state["_busca_pendente_criar"] = busca
+        st.rerun()
+
+    if len(busca) < 2:
+        return
+    resultados = buscar_pacientes(busca)
+    if not resultados:
+        st.caption(f"Nenhum paciente encontrado para “{busca}”.")
+    for r in resultados:
+        rotulo = " · ".join(p for p in (r["leito"], r["nome"] or "(sem nome)", r["prontuario"]) if p)
+        if st.button(
+            f"{rotulo} — última evolução {r['data_hora']}",
+            key=f"_busca_res_{r['prontuario']}", use_container_width=True,
+        ):
+            st.session_state.pop("_busca_pendente_criar", None)
+            if _abrir_prontuario(r["prontuario"]):
+                st.rerun()
 
 _fragment_busca()
 
@@ -153,6 +186,39 @@ if "_busca_pendente_criar" in st.session_state:
 ui.render_barra_paciente()
 
 
+# ── Mudanças desde a última evolução ───────────────────────────────────────────
+
+def _evolucao_referencia(pront: str) -> dict | None:
+    """Última evolução salva antes de hoje (uma busca por prontuário e dia, guardada na sessão)."""
+    chave = (pront, date.today())
+    cache = st.session_state.get("_diff_referencia")
+    if not cache or cache[0] != chave:
+        dados = load_evolucao_at(pront, date.today() - timedelta(days=1))
+        if dados is not None:
+            desde = dados.pop("_data_hora", "")
+            dados = (desde, fichas.compactar_campos(fichas.migrar_schema_legado(dados)))
+        cache = (chave, dados)
+        st.session_state["_diff_referencia"] = cache
+    return cache[1]
+
+
+def _render_painel_mudancas():
+    pront = str(st.session_state.get("prontuario", "") or "").strip()
+    if not pront:
+        return
+    referencia = _evolucao_referencia(pront)
+    if referencia is None:
+        return
+    desde, anterior = referencia
+    atual = fichas.compactar_campos(
+        {k: st.session_state.get(k) for k in fichas.get_todos_campos_keys()}
+    )
+    ui.render_mudancas(comparacao.comparar(anterior, atual), desde)
+
+
+_render_painel_mudancas()
+
+
 # ── Agentes em paralelo ────────────────────────────────────────────────────────
 
 def _aplicar_agentes_paralelo(secoes: list[str]):
@@ -179,6 +245,7 @@ def _aplicar_agentes_paralelo(secoes: list[str]):
         n_ok, erros = fluxo.rodar_agentes_paralelo(
             secoes, api_key, _provider_completo(), modelo_escolhido,
             on_progress=_on_progress,
+            usar_cache=not st.session_state.get("_ia_sem_cache", False),
         )
 
         progresso.empty()
@@ -556,12 +623,20 @@ with col_salvar:
         if not prontuario:
             st.error("❌ Preencha o número do prontuário antes de salvar.")
         else:
-            dados = {k: st.session_state.get(k) for k in fichas.get_todos_campos_keys()}
+            dados = fichas.compactar_campos(
+                {k: st.session_state.get(k) for k in fichas.get_todos_campos_keys()}
+            )
             with st.spinner("💾 Salvando evolução..."):
                 ok = save_evolucao(prontuario, st.session_state.get("nome", "").strip(), dados)
             if ok:
                 st.success(f"✅ Evolução salva com sucesso! Prontuário: {prontuario}")
 
+    @st.fragment(run_every=10)
+    def _fragment_status_sync():
+        ui.render_status_sincronizacao(status_sincronizacao())
+
+    _fragment_status_sync()
+
 with col_limpar:
     st.button("🗑️ Limpar Tudo", on_click=fluxo.limpar_tudo, use_container_width=True)
 
@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from utils import load_data, mostrar_rodape
+from utils import load_referencia, mostrar_rodape
 
 # ==============================================================================
 # CSS
@@ -150,7 +150,7 @@ def _render_simulador(
 # ==============================================================================
 st.header("💉 Calculadora de Infusão")
 
-df_inf = load_data("DB_INFUSAO")
+df_inf = load_referencia("DB_INFUSAO")
 if df_inf.empty:
     st.error("Banco de dados não encontrado. Verifique a conexão com o Google Sheets (aba DB_INFUSAO).")
     st.stop()
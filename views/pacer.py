@@ -1,12 +1,10 @@
 import streamlit as st
 from utils import mostrar_rodape
-from google import genai as _genai_new
-from google.genai import types as _genai_types
-from openai import OpenAI
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from modules.ia import motor
+from modules.ia.clientes import cliente_gemini
 from modules.extrator_exames import (
     PROMPT_AGENTE_IDENTIFICACAO,
     PROMPT_AGENTE_HEMATOLOGIA_RENAL,
@@ -771,8 +769,8 @@ def processar_multi_agente(api_source, api_key, model_name, agentes_selecionados
     
     exames_concatenados = []
     
-    def processar_agente_worker(agente_id):
-        """Worker para processar um agente em thread separada"""
+    async def processar_agente_worker(agente_id):
+        """Worker de um agente (corrotina no loop do motor)"""
         if agente_id not in AGENTES_EXAMES:
             return None
         
@@ -782,7 +780,7 @@ def processar_multi_agente(api_source, api_key, model_name, agentes_selecionados
         try:
             inicio_agente = time.time()
             # Usa input_text do escopo externo (já pré-processado)
-            resultado = processar_texto(api_source, api_key, model_name, prompt, input_text_limpo)
+            resultado = await processar_texto_async(api_source, api_key, model_name, prompt, input_text_limpo)
             tempo_agente = time.time() - inicio_agente
             
             print(f"[PARALELO] Agente '{agente['nome']}' concluído em {tempo_agente:.1f}s")
@@ -802,24 +800,19 @@ def processar_multi_agente(api_source, api_key, model_name, agentes_selecionados
         
         return None
     
-    # Executa agentes em paralelo com ThreadPoolExecutor
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        # Cria tarefas para todos os agentes
-        future_to_agente = {
-            executor.submit(processar_agente_worker, agente_id): agente_id 
-            for agente_id in agentes_selecionados
-        }
-        
-        # Coleta resultados conforme terminam (em dicionário para preservar ordem)
-        resultados_dict = {}
-        for future in as_completed(future_to_agente):
-            agente_id = future_to_agente[future]
-            try:
-                resultado = future.result(timeout=60)  # Timeout de 60s por agente
-                if resultado:
-                    resultados_dict[agente_id] = resultado
-            except Exception as e:
-                print(f"[PARALELO] Exceção ao processar agente '{agente_id}': {str(e)}")
+    # Executa os agentes concorrentemente no motor assíncrono (60s para a rodada)
+    resultados_motor = motor.executar(
+        {agente_id: processar_agente_worker(agente_id) for agente_id in agentes_selecionados},
+        prazo=60,
+    )
+    
+    # Coleta resultados (em dicionário para preservar ordem)
+    resultados_dict = {}
+    for agente_id, resultado in resultados_motor.items():
+        if isinstance(resultado, Exception):
+            print(f"[PARALELO] Exceção ao processar agente '{agente_id}': {str(resultado)}")
+        elif resultado:
+            resultados_dict[agente_id] = resultado
     
     # IMPORTANTE: Ordena resultados pela ordem FIXA dos agentes (não por conclusão)
     # Mantém a ordem: Hematologia/Renal > Gastro > Cardio/Coag > Urina > Gasometria
@@ -990,7 +983,7 @@ def processar_multi_agente_prescricao(api_source, api_key, model_name, input_tex
 
 def verificar_modelos_ativos(api_key):
     modelos_validos = []
-    client = _genai_new.Client(api_key=api_key)
+    client = cliente_gemini(api_key)
     status_msg = st.empty()
     for modelo in CANDIDATOS_GEMINI:
         status_msg.text(f"Testando: {modelo}...")
@@ -1070,33 +1063,19 @@ def preprocessar_texto_exames(texto):
     
     return texto_processado.strip()
 
-def processar_texto(api_source, api_key, model_name, prompt_system, input_text):
+async def processar_texto_async(api_source, api_key, model_name, prompt_system, input_text):
     if not input_text: return "⚠️ O campo de entrada está vazio."
     if not api_key: return f"⚠️ Configure a chave de API do {api_source}."
 
     try:
         if api_source == "Google Gemini":
-            client = _genai_new.Client(api_key=api_key)
-            response = client.models.generate_content(
-                model=model_name,
-                contents=input_text,
-                config=_genai_types.GenerateContentConfig(
-                    system_instruction=prompt_system,
-                    temperature=0.0,
-                ),
-            )
-            return response.text
+            # Mesmo texto + mesmo prompt: resposta do cache (sem nova chamada)
+            return await motor.gerar("gemini", api_key, model_name, prompt_system, input_text,
+                                     {"temperature": 0.0})
 
         elif api_source == "OpenAI GPT":
-            client = OpenAI(api_key=api_key)
-            
             # Otimizações da API OpenAI (mantém qualidade)
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": prompt_system}, 
-                    {"role": "user", "content": input_text}
-                ],
+            params = dict(
                 temperature=0.0,        # Determinístico (já estava)
                 top_p=0.1,              # Foco nas respostas mais prováveis
                 frequency_penalty=0.0,  # Sem penalidade (dados médicos)
@@ -1104,11 +1083,17 @@ def processar_texto(api_source, api_key, model_name, prompt_system, input_text):
                 max_tokens=2000,        # Limite adequado para extração
                 seed=42                 # Reprodutibilidade (GPT-4o suporta)
             )
-            return response.choices[0].message.content
+            return await motor.gerar("openai", api_key, model_name, prompt_system, input_text, params)
             
     except Exception as e:
         return f"❌ Erro na API: {str(e)}"
 
+def processar_texto(api_source, api_key, model_name, prompt_system, input_text):
+    """Versão síncrona (roda no motor assíncrono de modules/ia/motor.py)."""
+    return motor.executar_uma(
+        processar_texto_async(api_source, api_key, model_name, prompt_system, input_text)
+    )
+
 def limpar_campos(lista_chaves):
     for chave in lista_chaves:
         if chave in st.session_state: st.session_state[chave] = ""
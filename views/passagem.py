@@ -0,0 +1,48 @@
+import streamlit as st
+
+from modules import ui
+from utils import carregar_censo, mostrar_rodape
+
+# ── Setup ──────────────────────────────────────────────────────────────────────
+ui.carregar_css()
+
+st.title("🔁 Passagem de Plantão")
+st.caption(
+    "Censo da unidade a partir da última evolução salva de cada paciente. "
+    "Leitura única do banco de evoluções — sem abrir prontuário por prontuário."
+)
+
+c_periodo, c_btn, _ = st.columns([3, 1, 4], vertical_alignment="bottom")
+with c_periodo:
+    dias = st.selectbox(
+        "Pacientes evoluídos nos últimos",
+        [1, 2, 3, 7, 30],
+        index=2,
+        format_func=lambda d: "1 dia" if d == 1 else f"{d} dias",
+    )
+with c_btn:
+    if st.button("Atualizar", use_container_width=True):
+        st.session_state.pop("_censo", None)
+
+chave = ("censo", dias)
+if st.session_state.get("_censo", (None, None))[0] != chave:
+    with st.spinner("Montando o censo da unidade..."):
+        st.session_state["_censo"] = (chave, carregar_censo(dias))
+df_censo = st.session_state["_censo"][1]
+
+c1, c2, c3 = st.columns(3)
+c1.metric("Pacientes", len(df_censo))
+c2.metric("Em cuidados paliativos", int(df_censo["paliativo"].sum()) if not df_censo.empty else 0)
+c3.metric("Sem leito informado", int((df_censo["leito"] == "").sum()) if not df_censo.empty else 0)
+
+ui.render_censo(df_censo)
+
+if not df_censo.empty:
+    st.download_button(
+        "Baixar censo (CSV)",
+        df_censo.to_csv(index=False).encode("utf-8-sig"),
+        file_name="passagem_de_plantao.csv",
+        mime="text/csv",
+    )
+
+mostrar_rodape()